@@ -1,461 +1,57 @@
+import html
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+from urllib.parse import quote
+
 import gradio as gr
-import pandas as pd
-import numpy as np
-import math
-from datetime import datetime, timedelta
-import math
 
-class Player:
-    def __init__(self, name, gender, skill_level):
-        self.name = name
-        self.gender = gender  # 'M' or 'F'
-        self.skill_level = skill_level  # 'Amateur' or 'Advanced'
-        self.matches = []
+from court_allocation.api import create_api, edit_allowed
+from court_allocation.instrumentation import configure_logging, log_event, time_stage
+from court_allocation.overrun import simulate_overruns
+from court_allocation.render import SCHEDULE_PAGE_SIZE, create_tournament_summary, iter_schedule_page, parse_court_filter
+from court_allocation.store import MATCH_STATUSES, ScheduleStore
+from court_allocation.sweep import SWEEP_MINIMUMS, TEAMS_PER_GROUP_FIELDS, parse_int_range, run_sweep
+from court_allocation.tournament import TOURNAMENT_PARAMETERS, calculate_schedule_statistics, estimate_tournament, generate_tournament
+from court_allocation.workers import PoolBusyError, WorkerPool
 
-class Team:
-    def __init__(self, id, category, players):
-        self.id = id
-        self.group_id = None
-        self.category = category
-        self.players = players
-        self.matches = []
-        self.group_number = None
-    
-    def __str__(self):
-        return f"Team {self.group_number}"
+logger = logging.getLogger("court_allocation.app")
 
-class Match:
-    def __init__(self, team1, team2, group_id, round_num, category):
-        self.team1 = team1
-        self.team2 = team2
-        self.group_id = group_id
-        self.round_num = round_num
-        self.court = None
-        self.start_time = None
-        self.category = category
-    
-    def __str__(self):
-        time_str = self.start_time.strftime("%H:%M") if self.start_time else "TBD"
-        return f"[{time_str}] Court {self.court}: {self.category} Group {self.group_id} - {self.team1} vs {self.team2}"
+# Columns of the what-if sweep results table
+SWEEP_COLUMNS = [
+    "Courts", "Duration (min)",
+    "Men's Doubles", "Mixed Doubles", "Amateur", "35+", "Open", "Parent-Child",
+    "Required", "Scheduled", "Scheduled %", "Utilization %", "Finish"
+]
 
-def generate_matches_for_group(teams, category, group_id, qualifying_teams):
-    """Generate round-robin matches for a group of teams"""
-    matches = []
-    teams_in_group = [team for team in teams if team.group_id == group_id]
-    
-    if len(teams_in_group) < 2:
-        return matches
-    
-    # Generate round-robin matches
-    for i in range(len(teams_in_group)):
-        for j in range(i + 1, len(teams_in_group)):
-            team1 = teams_in_group[i]
-            team2 = teams_in_group[j]
-            match = Match(
-                category=category,
-                team1=team1,
-                team2=team2,
-                group_id=group_id,
-                round_num=len(matches) + 1
-            )
-            matches.append(match)
-    
-    return matches
+# Columns of the match lookup results table
+LOOKUP_COLUMNS = ["#", "Time", "Court", "Category", "Stage", "Match", "Score", "Status"]
 
-def generate_round_robin_matches(teams, group_id):
-    """Generate round-robin matches for a group of teams"""
-    matches = []
-    n = len(teams)
-    
-    if n < 2:
-        return matches
-    
-    # If odd number of teams, add a dummy team for byes
-    if n % 2:
-        teams = teams + [None]
-        n += 1
-    
-    for round_num in range(n - 1):
-        round_matches = []
-        for i in range(n // 2):
-            team1 = teams[i]
-            team2 = teams[n - 1 - i]
-            
-            # Skip matches with dummy team (byes)
-            if team1 is not None and team2 is not None:
-                match = Match(team1, team2, group_id, round_num + 1, team1.category)
-                round_matches.append(match)
-        
-        # Rotate teams for next round: fix team[0], rotate others clockwise
-        teams = [teams[0]] + [teams[-1]] + teams[1:-1]
-        matches.extend(round_matches)
-    
-    return matches
+# Minimum time between sweep table refreshes while results stream in
+SWEEP_UPDATE_SECONDS = 0.5
 
-def schedule_matches(matches, start_time, end_time, match_duration, courts_available, keep_categories_separate=False, category_priority=None):
-    """Schedule matches across available courts and time slots"""
-    if not matches:
-        return []
-    
-    # Convert times to datetime
-    current_date = datetime.now().date()
-    current_time = datetime.combine(current_date, datetime.strptime(start_time, "%H:%M").time())
-    end_time = datetime.combine(current_date, datetime.strptime(end_time, "%H:%M").time())
-    match_duration_delta = timedelta(minutes=match_duration)
-    
-    # Create time slots for the day
-    time_slots = []
-    current = current_time
-    while current + match_duration_delta <= end_time:
-        time_slots.append(current)
-        current += match_duration_delta
-    
-    scheduled_matches = []
-    unscheduled_matches = matches.copy()
-    
-    # Initialize court availability tracking
-    court_slots = {court: {slot: None for slot in time_slots} for court in range(1, courts_available + 1)}
-    
-    # Get unique categories and sort by priority (lower number = higher priority)
-    categories = sorted(set(match.category for match in matches))
-    if category_priority:
-        priority_map = {cat: priority for cat, priority in category_priority.items()}
-        categories.sort(key=lambda x: priority_map.get(x, 999))  # Lower numbers first
-    
-    if keep_categories_separate:
-        current_slot_idx = 0
-        while unscheduled_matches and current_slot_idx < len(time_slots):
-            time_slot = time_slots[current_slot_idx]
-            available_courts = list(range(1, courts_available + 1))
-            matches_scheduled_this_slot = False
-            
-            # Try to schedule matches from each category in this time slot
-            for category in categories:
-                if not available_courts:
-                    break
-                    
-                # Get matches for this category, sorted by group and round
-                category_matches = sorted(
-                    [m for m in unscheduled_matches if m.category == category],
-                    key=lambda x: (x.group_id, x.round_num)
-                )
-                
-                # Try to schedule each match in this category
-                for match in category_matches[:]:  # Create a copy to avoid modification during iteration
-                    if not available_courts:
-                        break
-                    
-                    court = available_courts[0]
-                    match.start_time = time_slot
-                    match.court = court
-                    court_slots[court][time_slot] = match
-                    scheduled_matches.append(match)
-                    unscheduled_matches.remove(match)
-                    available_courts.pop(0)
-                    matches_scheduled_this_slot = True
-            
-            # Move to next time slot if we scheduled something or no courts were available
-            if matches_scheduled_this_slot or not available_courts:
-                current_slot_idx += 1
-    else:
-        current_slot_idx = 0
-        while unscheduled_matches and current_slot_idx < len(time_slots):
-            time_slot = time_slots[current_slot_idx]
-            available_courts = list(range(1, courts_available + 1))
-            matches_scheduled_this_slot = False
-            
-            # Get all matches sorted by priority (lower = higher priority), group, and round
-            sorted_matches = sorted(
-                unscheduled_matches,
-                key=lambda x: (category_priority.get(x.category, 999), x.group_id, x.round_num)
-            )
-            
-            # Schedule as many matches as possible in current time slot
-            for match in sorted_matches[:]:  # Create a copy to avoid modification during iteration
-                if not available_courts:
-                    break
-                
-                court = available_courts[0]
-                match.start_time = time_slot
-                match.court = court
-                court_slots[court][time_slot] = match
-                scheduled_matches.append(match)
-                unscheduled_matches.remove(match)
-                available_courts.pop(0)
-                matches_scheduled_this_slot = True
-            
-            # Move to next time slot if we scheduled something or no courts were available
-            if matches_scheduled_this_slot or not available_courts:
-                current_slot_idx += 1
-    
-    # Sort matches by start time and court number
-    scheduled_matches.sort(key=lambda x: (x.start_time, x.court))
-    
-    # Calculate and print court utilization statistics
-    total_slots = len(time_slots) * courts_available
-    used_slots = sum(1 for court in court_slots.values() for slot in court.values() if slot is not None)
-    utilization = (used_slots / total_slots) * 100
-    print(f"Court utilization: {utilization:.1f}%")
-    
-    if unscheduled_matches:
-        print(f"Warning: {len(unscheduled_matches)} matches could not be scheduled")
-        for match in unscheduled_matches:
-            print(f"- Unscheduled: {match.category} Group {match.group_id} Round {match.round_num}")
-    
-    return scheduled_matches
+# Worker processes generating schedules, one per available CPU unless SCHEDULE_WORKERS is set
+SCHEDULE_WORKERS = int(os.environ.get("SCHEDULE_WORKERS") or 0) or None
 
-def create_teams_for_category(category, total_participants, amateur_ratio, women_advanced_ratio, plus_35_ratio, parent_child_ratio, teams_per_group):
-    """Create teams for a specific category"""
-    # Calculate player distributions
-    total_amateur = int(total_participants * amateur_ratio)
-    total_advanced = total_participants - total_amateur
-    advanced_women = int(total_advanced * women_advanced_ratio)
-    advanced_men = total_advanced - advanced_women
-    
-    teams = []
-    
-    if category == "Men's Doubles":
-        # Create teams with advanced men players
-        players = [Player(f"M{i+1}", "M", "Advanced") for i in range(advanced_men)]
-        for i in range(0, len(players), 2):
-            if i + 1 < len(players):
-                team = Team(len(teams) + 1, category, [players[i], players[i+1]])
-                teams.append(team)
-    
-    elif category == "Mixed Doubles":
-        # Create mixed doubles teams (one man + one woman)
-        men = [Player(f"M{i+1}", "M", "Advanced") for i in range(advanced_men)]
-        women = [Player(f"W{i+1}", "F", "Advanced") for i in range(advanced_women)]
-        min_pairs = min(len(men), len(women))
-        for i in range(min_pairs):
-            team = Team(len(teams) + 1, category, [men[i], women[i]])
-            teams.append(team)
-    
-    elif category == "Amateur":
-        # Create amateur teams, excluding those reserved for parent-child
-        parent_child_players = int(total_amateur * parent_child_ratio)
-        available_amateurs = total_amateur - parent_child_players
-        players = [Player(f"A{i+1}", "M" if i % 2 == 0 else "F", "Amateur") 
-                  for i in range(available_amateurs)]
-        for i in range(0, len(players), 2):
-            if i + 1 < len(players):
-                team = Team(len(teams) + 1, category, [players[i], players[i+1]])
-                teams.append(team)
-    
-    elif category == "35+":
-        # Use a subset of advanced players for 35+
-        players = ([Player(f"M{i+1}", "M", "Advanced") for i in range(int(advanced_men * plus_35_ratio))] +
-                  [Player(f"W{i+1}", "F", "Advanced") for i in range(int(advanced_women * plus_35_ratio))])
-        for i in range(0, len(players), 2):
-            if i + 1 < len(players):
-                team = Team(len(teams) + 1, category, [players[i], players[i+1]])
-                teams.append(team)
-    
-    elif category == "Open":
-        # Create teams with any advanced players not used in 35+
-        non_35_ratio = 1 - plus_35_ratio
-        players = ([Player(f"M{i+1}", "M", "Advanced") for i in range(int(advanced_men * non_35_ratio))] +
-                  [Player(f"W{i+1}", "F", "Advanced") for i in range(int(advanced_women * non_35_ratio))])
-        for i in range(0, len(players), 2):
-            if i + 1 < len(players):
-                team = Team(len(teams) + 1, category, [players[i], players[i+1]])
-                teams.append(team)
-    
-    elif category == "Parent-Child":
-        # Calculate number of parent-child pairs
-        num_pairs = int((total_amateur * parent_child_ratio) / 2)  # Divide by 2 as each team needs one parent and one child
-        
-        # Create parent-child teams
-        for i in range(num_pairs):
-            child = Player(f"Child{i+1}", "M" if i % 2 == 0 else "F", "Amateur")
-            parent = Player(f"Parent{i+1}", "M" if i % 2 == 0 else "F", "Advanced")
-            team = Team(len(teams) + 1, category, [parent, child])
-            teams.append(team)
-    
-    # Distribute teams into groups
-    if teams:
-        num_teams = len(teams)
-        if num_teams < teams_per_group:
-            # If we have fewer teams than the minimum group size, put them all in one group
-            for team in teams:
-                team.group_id = 1
-        else:
-            # Calculate number of groups needed
-            num_groups = max(1, (num_teams + teams_per_group - 1) // teams_per_group)
-            teams_per_actual_group = num_teams // num_groups
-            remainder = num_teams % num_groups
-            
-            current_group = 1
-            teams_in_current_group = 0
-            target_teams_in_group = teams_per_actual_group + (1 if current_group <= remainder else 0)
-            
-            for team in teams:
-                if teams_in_current_group >= target_teams_in_group:
-                    current_group += 1
-                    teams_in_current_group = 0
-                    target_teams_in_group = teams_per_actual_group + (1 if current_group <= remainder else 0)
-                
-                team.group_id = current_group
-                teams_in_current_group += 1
-    
-    return teams
+# Schedule requests that may wait for a free worker, and the longest one may run
+SCHEDULE_QUEUE_SIZE = 16
+SCHEDULE_TIMEOUT_SECONDS = 120
 
-def calculate_groups_and_matches(total_participants, amateur_ratio, women_advanced_ratio, plus_35_ratio, parent_child_ratio, enabled_categories, teams_per_group_settings, qualifying_teams):
-    """Calculate groups and generate matches for enabled categories"""
-    all_teams = {}
-    all_matches = []
-    group_info = {
-        'Player Distribution': {
-            'Total': total_participants,
-            'Amateur': int(total_participants * amateur_ratio),
-            'Advanced Men': int((total_participants - int(total_participants * amateur_ratio)) * (1 - women_advanced_ratio)),
-            'Advanced Women': int((total_participants - int(total_participants * amateur_ratio)) * women_advanced_ratio),
-            '35+ Players': int((total_participants - int(total_participants * amateur_ratio)) * plus_35_ratio),
-            'Parent-Child Teams': int(total_participants * amateur_ratio * parent_child_ratio / 2)
-        },
-        'Total Matches': 0,
-        'Men\'s Doubles Groups': 0,
-        'Mixed Doubles Groups': 0,
-        'Amateur Groups': 0,
-        '35+ Groups': 0,
-        'Open Groups': 0,
-        'Parent-Child Groups': 0
-    }
-    
-    for category in enabled_categories:
-        teams = create_teams_for_category(category, total_participants, amateur_ratio, women_advanced_ratio, plus_35_ratio, parent_child_ratio, teams_per_group_settings[category])
-        if teams:
-            all_teams[category] = teams
-            
-            # Count groups for this category
-            num_groups = max(team.group_id for team in teams)
-            if category == "Men's Doubles":
-                group_info['Men\'s Doubles Groups'] = num_groups
-            elif category == "Mixed Doubles":
-                group_info['Mixed Doubles Groups'] = num_groups
-            elif category == "Amateur":
-                group_info['Amateur Groups'] = num_groups
-            elif category == "35+":
-                group_info['35+ Groups'] = num_groups
-            elif category == "Open":
-                group_info['Open Groups'] = num_groups
-            elif category == "Parent-Child":
-                group_info['Parent-Child Groups'] = num_groups
-            
-            # Generate matches for each group
-            for group_id in range(1, num_groups + 1):
-                group_matches = generate_matches_for_group(teams, category, group_id, qualifying_teams)
-                all_matches.extend(group_matches)
-    
-    group_info['Total Matches'] = len(all_matches)
-    
-    return all_matches, all_teams, group_info
+# Progress bar position and description shown as each stage of a schedule request starts
+STAGE_PROGRESS = {
+    'roster': (0.05, "Reading roster"),
+    'teams': (0.1, "Building teams and matches"),
+    'matches': (0.1, "Building matches"),
+    'scheduling': (0.3, "Scheduling matches"),
+    'optimization': (0.5, "Optimizing schedule"),
+    'simulation': (0.8, "Simulating match overruns"),
+    'rendering': (0.9, "Rendering schedule")
+}
 
-def calculate_available_match_slots(start_time, end_time, match_duration, courts_available):
-    # Convert times to datetime
-    current_date = datetime.now().date()
-    start_datetime = datetime.combine(current_date, datetime.strptime(start_time, "%H:%M").time())
-    end_datetime = datetime.combine(current_date, datetime.strptime(end_time, "%H:%M").time())
-    
-    # Calculate total minutes available
-    total_minutes = (end_datetime - start_datetime).total_seconds() / 60
-    
-    # Calculate how many match slots are available per court
-    matches_per_court = int(total_minutes / match_duration)
-    
-    # Total available match slots across all courts
-    total_available_slots = matches_per_court * courts_available
-    
-    return total_available_slots
-
-def create_schedule_display(scheduled_matches, all_teams, group_info, enabled_categories):
-    if not scheduled_matches:
-        return "No matches could be scheduled within the given time constraints."
-    
-    # Create tournament summary box
-    summary = """
-<div style='border:1px solid var(--border-color-primary); padding:15px; border-radius:8px; margin-bottom:20px; background-color:var(--background-fill-primary); box-shadow: 0 1px 3px rgba(0,0,0,0.1)'>
-<h2 style='color:var(--body-text-color); margin-top:0'>🏆 Tournament Summary</h2>
-<div style='display:grid; grid-template-columns:1fr 1fr; gap:20px'>
-<div>
-<h3 style='color:var(--body-text-color)'>📊 Player Distribution</h3>
-<ul style='list-style-type:none; padding-left:0; color:var(--body-text-color)'>
-<li>🏸 Total Participants: <b>{total}</b></li>
-<li>👥 Amateur Players: <b>{amateur}</b></li>
-<li>👨 Advanced Men: <b>{adv_men}</b></li>
-<li>👩 Advanced Women: <b>{adv_women}</b></li>
-<li>🎯 35+ Players: <b>{plus_35}</b></li>
-<li>👨‍👦 Parent-Child Teams: <b>{parent_child}</b></li>
-</ul>
-</div>
-<div>
-<h3 style='color:var(--body-text-color)'>🏟️ Group Distribution</h3>
-<ul style='list-style-type:none; padding-left:0; color:var(--body-text-color)'>
-""".format(
-        total=group_info['Player Distribution']['Total'],
-        amateur=group_info['Player Distribution']['Amateur'],
-        adv_men=group_info['Player Distribution']['Advanced Men'],
-        adv_women=group_info['Player Distribution']['Advanced Women'],
-        plus_35=group_info['Player Distribution']['35+ Players'],
-        parent_child=group_info['Player Distribution']['Parent-Child Teams']
-    )
-    
-    # Add group distribution for each category
-    for category in enabled_categories:
-        if category in all_teams:
-            num_groups = len(set(team.group_id for team in all_teams[category]))
-            teams_per_group = {i: len([t for t in all_teams[category] if t.group_id == i]) 
-                             for i in range(1, num_groups + 1)}
-            summary += f"<li>🎯 {category}: <b>{num_groups}</b> groups ("
-            summary += ", ".join(f"G{g}: {n} teams" for g, n in teams_per_group.items())
-            summary += ")</li>\n"
-    
-    summary += """
-</ul>
-</div>
-</div>
-</div>
-"""
-    
-    # Create schedule table
-    schedule = "<div style='margin-top:20px'><h2 style='color:var(--body-text-color)'>📅 Match Schedule</h2>"
-    schedule += "<div style='overflow-x:auto'><table style='width:100%; border-collapse:collapse; margin-top:10px'>"
-    schedule += "<tr style='background-color:var(--background-fill-primary)'>"
-    schedule += "<th style='padding:10px; border:1px solid var(--border-color-primary); color:var(--body-text-color)'>Time</th>"
-    schedule += "<th style='padding:10px; border:1px solid var(--border-color-primary); color:var(--body-text-color)'>Court</th>"
-    schedule += "<th style='padding:10px; border:1px solid var(--border-color-primary); color:var(--body-text-color)'>Category</th>"
-    schedule += "<th style='padding:10px; border:1px solid var(--border-color-primary); color:var(--body-text-color)'>Group</th>"
-    schedule += "<th style='padding:10px; border:1px solid var(--border-color-primary); color:var(--body-text-color)'>Match</th>"
-    schedule += "</tr>"
-    
-    # Sort matches by time and court
-    scheduled_matches.sort(key=lambda x: (x.start_time, x.court))
-    
-    current_time = None
-    for match in scheduled_matches:
-        time_str = match.start_time.strftime("%H:%M")
-        
-        # Add time separator
-        if current_time != time_str:
-            schedule += f"<tr style='background-color:var(--background-fill-secondary)'>"
-            schedule += f"<td colspan='5' style='padding:5px; text-align:center; border:1px solid var(--border-color-primary); color:var(--body-text-color)'><b>{time_str}</b></td></tr>"
-            current_time = time_str
-        
-        # Format team names
-        team1_name = f"Team {match.team1.id}" if match.team1 else "TBD"
-        team2_name = f"Team {match.team2.id}" if match.team2 else "TBD"
-        
-        schedule += "<tr>"
-        schedule += f"<td style='padding:10px; border:1px solid var(--border-color-primary); color:var(--body-text-color)'>{time_str}</td>"
-        schedule += f"<td style='padding:10px; border:1px solid var(--border-color-primary); color:var(--body-text-color)'>Court {match.court}</td>"
-        schedule += f"<td style='padding:10px; border:1px solid var(--border-color-primary); color:var(--body-text-color)'>{match.category}</td>"
-        schedule += f"<td style='padding:10px; border:1px solid var(--border-color-primary); color:var(--body-text-color)'>Group {match.group_id}</td>"
-        schedule += f"<td style='padding:10px; border:1px solid var(--border-color-primary); color:var(--body-text-color)'>{team1_name} vs {team2_name}</td>"
-        schedule += "</tr>"
-    
-    schedule += "</table></div></div>"
-    
-    return summary + schedule
+# Generated schedules are saved here for the Lookup tab and the /api/schedules routes
+schedule_store = ScheduleStore()
 
 def create_tournament_schedule(
     total_participants,
@@ -486,30 +82,66 @@ def create_tournament_schedule(
     amateur_priority,
     plus_35_priority,
     open_priority,
-    parent_child_priority
+    parent_child_priority,
+    min_rest_slots=0,
+    roster=None,
+    optimize_seconds=0,
+    venues="",
+    days="",
+    partition_by="category",
+    category_durations="",
+    changeover_minutes=0,
+    slot_assignment="greedy",
+    page=1,
+    page_size=SCHEDULE_PAGE_SIZE,
+    court_filter="",
+    category_filter=None,
+    window_start="",
+    window_end="",
+    overrun_minutes=0
 ):
-    # Create list of enabled categories and their priorities
-    enabled_categories = []
-    category_priorities = {}
-    
-    if include_mens_doubles:
-        enabled_categories.append("Men's Doubles")
-        category_priorities["Men's Doubles"] = int(mens_doubles_priority)
-    if include_mixed_doubles:
-        enabled_categories.append("Mixed Doubles")
-        category_priorities["Mixed Doubles"] = int(mixed_doubles_priority)
-    if include_amateur:
-        enabled_categories.append("Amateur")
-        category_priorities["Amateur"] = int(amateur_priority)
-    if include_35plus:
-        enabled_categories.append("35+")
-        category_priorities["35+"] = int(plus_35_priority)
-    if include_open:
-        enabled_categories.append("Open")
-        category_priorities["Open"] = int(open_priority)
-    if include_parent_child:
-        enabled_categories.append("Parent-Child")
-        category_priorities["Parent-Child"] = int(parent_child_priority)
+    """Schedule HTML for the settings, run in a schedule worker; invalid settings raise ValueError"""
+    settings = {
+        'total_participants': total_participants,
+        'amateur_ratio': amateur_ratio,
+        'women_advanced_ratio': women_advanced_ratio,
+        'plus_35_ratio': plus_35_ratio,
+        'parent_child_ratio': parent_child_ratio,
+        'include_mens_doubles': include_mens_doubles,
+        'include_mixed_doubles': include_mixed_doubles,
+        'include_amateur': include_amateur,
+        'include_35plus': include_35plus,
+        'include_open': include_open,
+        'include_parent_child': include_parent_child,
+        'match_duration': match_duration,
+        'mens_doubles_teams': mens_doubles_teams,
+        'mixed_doubles_teams': mixed_doubles_teams,
+        'amateur_teams': amateur_teams,
+        'plus_35_teams': plus_35_teams,
+        'open_teams': open_teams,
+        'parent_child_teams': parent_child_teams,
+        'qualifying_teams': qualifying_teams,
+        'start_time': start_time,
+        'end_time': end_time,
+        'courts_available': courts_available,
+        'keep_categories_separate': keep_categories_separate,
+        'mens_doubles_priority': mens_doubles_priority,
+        'mixed_doubles_priority': mixed_doubles_priority,
+        'amateur_priority': amateur_priority,
+        'plus_35_priority': plus_35_priority,
+        'open_priority': open_priority,
+        'parent_child_priority': parent_child_priority,
+        'min_rest_slots': min_rest_slots,
+        'roster': roster,
+        'optimize_seconds': optimize_seconds,
+        'venues': venues,
+        'days': days,
+        'partition_by': partition_by,
+        'category_durations': category_durations,
+        'changeover_minutes': changeover_minutes,
+        'slot_assignment': slot_assignment
+    }
+    enabled_categories, all_teams, group_info, grid = generate_tournament(**settings)
     
     if not enabled_categories:
         return """
@@ -519,24 +151,7 @@ def create_tournament_schedule(
 </div>
 """
     
-    # Calculate total available match slots
-    total_slots = calculate_available_match_slots(start_time, end_time, match_duration, courts_available)
-    
-    # Generate matches and teams
-    teams_per_group_settings = {
-        "Men's Doubles": mens_doubles_teams,
-        "Mixed Doubles": mixed_doubles_teams,
-        "Amateur": amateur_teams,
-        "35+": plus_35_teams,
-        "Open": open_teams,
-        "Parent-Child": parent_child_teams
-    }
-    all_matches, all_teams, group_info = calculate_groups_and_matches(
-        total_participants, amateur_ratio, women_advanced_ratio, plus_35_ratio, parent_child_ratio,
-        enabled_categories, teams_per_group_settings, qualifying_teams
-    )
-    
-    if not all_matches:
+    if grid is None:
         return """
 <div style='text-align: center; padding: 20px;'>
     <h2>⚠️ No Matches Generated</h2>
@@ -544,22 +159,45 @@ def create_tournament_schedule(
 </div>
 """
     
-    # Schedule matches with priorities
-    scheduled_matches = schedule_matches(
-        all_matches,
-        start_time,
-        end_time,
-        match_duration,
-        courts_available,
-        keep_categories_separate,
-        category_priorities
-    )
-    
-    # Calculate scheduling statistics
-    total_scheduled = len(scheduled_matches)
-    total_matches = group_info["Total Matches"]
-    scheduling_success_rate = (total_scheduled / total_matches * 100) if total_matches > 0 else 0
-    court_utilization_rate = (total_scheduled / total_slots * 100) if total_slots > 0 else 0
+    # A schedule that can't be saved is still shown, it just can't be looked up
+    try:
+        schedule_store.save_schedule(grid, settings)
+    except (OSError, sqlite3.Error) as error:
+        log_event(logger, logging.WARNING, "schedule_not_saved", error=str(error))
+    
+    # Calculate scheduling statistics from the occupancy grid
+    statistics = calculate_schedule_statistics(grid, group_info)
+    total_slots = statistics['available_slots']
+    total_scheduled = statistics['scheduled_matches']
+    total_matches = statistics['required_matches']
+    scheduling_success_rate = statistics['scheduling_success_rate']
+    court_utilization_rate = statistics['court_utilization_rate']
+    peak_idle_courts = statistics['peak_idle_courts']
+    knockout_matches = statistics['knockout_matches']
+    
+    # Matches on a minute timeline: per-category lengths and a changeover on each court
+    durations_note = ""
+    if category_durations.strip():
+        durations_note += ", " + html.escape("; ".join(line.strip() for line in category_durations.splitlines() if line.strip()))
+    if changeover_minutes:
+        durations_note += f", {changeover_minutes} minute changeover"
+    
+    # Venues and days replace the single day's courts and times
+    if statistics['venue_utilization']:
+        # Venue names and days are free text, so they are escaped before going into the page
+        venue_list = html.escape("; ".join(line.strip() for line in venues.splitlines() if line.strip()) or "One venue")
+        venue_settings = f"<li>🏟️ Venues: <b>{venue_list}</b>, split by {html.escape(partition_by)}</li>"
+        if days.strip():
+            venue_settings += f"<li>📅 Days: <b>{html.escape(days.strip())}</b></li>"
+        venue_statistics = "".join(
+            f"<li>🏟️ {html.escape(row['venue'] or 'Courts')} on {row['day']}: <b>{row['utilization']:.1f}%</b> "
+            f"({row['scheduled_matches']} of {row['available_slots']} slots)</li>"
+            for row in statistics['venue_utilization']
+        )
+    else:
+        venue_settings = (f"<li>🏸 Courts Available: <b>{courts_available}</b></li>"
+                          f"<li>📅 Time: <b>{html.escape(start_time)}</b> to <b>{html.escape(end_time)}</b></li>")
+        venue_statistics = ""
     
     # Create configuration summary
     config_summary = f"""
@@ -569,10 +207,10 @@ def create_tournament_schedule(
 <div>
 <h3 style='color:var(--body-text-color)'>📊 Basic Settings</h3>
 <ul style='list-style-type:none; padding-left:0; color:var(--body-text-color)'>
-<li>👥 Total Participants: <b>{total_participants}</b></li>
+<li>👥 Total Participants: <b>{group_info['Player Distribution']['Total'] if roster else total_participants}</b></li>
 <li>🎾 Amateur Ratio: <b>{amateur_ratio * 100}%</b></li>
 <li>👩 Women in Advanced: <b>{women_advanced_ratio * 100}%</b></li>
-<li>⏱️ Match Duration: <b>{match_duration} minutes</b></li>
+<li>⏱️ Match Duration: <b>{match_duration} minutes</b>{durations_note}</li>
 </ul>
 </div>
 <div>
@@ -588,8 +226,10 @@ def create_tournament_schedule(
 <li>👪 Parent-Child: <b>{parent_child_teams}</b></li>
 </ul>
 <li>🏆 Qualifying Teams: <b>{qualifying_teams}</b></li>
-<li>🏸 Courts Available: <b>{courts_available}</b></li>
-<li>📅 Time: <b>{start_time}</b> to <b>{end_time}</b></li>
+{venue_settings}
+<li>😮‍💨 Minimum Rest: <b>{min_rest_slots} slots</b></li>
+<li>🔧 Optimizer Budget: <b>{optimize_seconds} seconds</b></li>
+<li>🧩 Slot Assignment: <b>{html.escape(slot_assignment)}</b></li>
 </ul>
 </div>
 </div>
@@ -602,6 +242,7 @@ def create_tournament_schedule(
 <h3 style='color:var(--body-text-color)'>🎯 Match Statistics</h3>
 <ul style='list-style-type:none; padding-left:0; color:var(--body-text-color)'>
 <li>📊 Required Matches: <b>{total_matches}</b></li>
+<li>🏆 Knockout Matches: <b>{knockout_matches}</b></li>
 <li>✅ Scheduled Matches: <b>{total_scheduled}</b></li>
 <li>📈 Scheduling Success: <b>{scheduling_success_rate:.1f}%</b></li>
 </ul>
@@ -611,14 +252,225 @@ def create_tournament_schedule(
 <ul style='list-style-type:none; padding-left:0; color:var(--body-text-color)'>
 <li>🎯 Available Time Slots: <b>{total_slots}</b></li>
 <li>📊 Court Utilization: <b>{court_utilization_rate:.1f}%</b></li>
+<li>💤 Most Idle Courts in a Slot: <b>{peak_idle_courts}</b></li>
 <li>⚠️ Unscheduled Matches: <b>{total_matches - total_scheduled}</b></li>
+{venue_statistics}
+</ul>
+</div>
+</div>
+</div>
+"""
+    
+    if not grid.used_slots:
+        return config_summary + "No matches could be scheduled within the given time constraints."
+    
+    # How late the day really finishes when matches run over
+    risk_summary = ""
+    if overrun_minutes:
+        risk = simulate_overruns(grid, mean_overrun=overrun_minutes, rest_minutes=min_rest_slots * match_duration,
+                                 changeover_minutes=changeover_minutes)
+        first_day = grid.time_slots[0].date()
+        
+        def format_time(value):
+            return value.strftime("%H:%M" if value.date() == first_day else "%a %H:%M")
+        
+        late_matches = "".join(
+            f"<li>{match['category']} {match['stage'] or 'Group ' + str(match['group_id'])} "
+            f"on {match['court_name']} at {format_time(match['start_time'])}: late in <b>{match['late_probability'] * 100:.0f}%</b> "
+            f"of runs, by {match['mean_delay_minutes']:.0f} minutes on average</li>"
+            for match in risk['late_matches']
+        ) or "<li>No match starts late in any run</li>"
+        risk_summary = f"""
+<div style='border:1px solid var(--border-color-primary); padding:15px; border-radius:8px; margin-bottom:20px; background-color:var(--background-fill-primary); box-shadow: 0 1px 3px rgba(0,0,0,0.1)'>
+<h2 style='color:var(--body-text-color); margin-top:0'>🎲 Finish Time Risk</h2>
+<p style='color:var(--body-text-color)'>{risk['runs']:,} simulated days with matches running <b>{overrun_minutes} minutes</b> over on average</p>
+<div style='display:grid; grid-template-columns:1fr 1fr; gap:20px'>
+<div>
+<h3 style='color:var(--body-text-color)'>🏁 Finish Time</h3>
+<ul style='list-style-type:none; padding-left:0; color:var(--body-text-color)'>
+<li>📅 Planned: <b>{format_time(risk['planned_finish'])}</b></li>
+<li>📊 Median (P50): <b>{format_time(risk['finish_p50'])}</b> ({risk['delay_p50_minutes']:.0f} minutes late)</li>
+<li>⚠️ 9 in 10 Days (P90): <b>{format_time(risk['finish_p90'])}</b> ({risk['delay_p90_minutes']:.0f} minutes late)</li>
+</ul>
+</div>
+<div>
+<h3 style='color:var(--body-text-color)'>⏳ Matches Most Likely to Start Late</h3>
+<ul style='list-style-type:none; padding-left:0; color:var(--body-text-color)'>
+{late_matches}
 </ul>
 </div>
 </div>
 </div>
 """
     
-    return config_summary + create_schedule_display(scheduled_matches, all_teams, group_info, enabled_categories)
+    # Only the requested page of the filtered schedule is rendered
+    with time_stage('rendering'):
+        summary = create_tournament_summary(all_teams, group_info, enabled_categories)
+        schedule = "".join(iter_schedule_page(
+            grid, page, page_size, window_start, window_end,
+            parse_court_filter(court_filter), category_filter
+        ))
+    return config_summary + risk_summary + summary + schedule
+
+schedule_pool = WorkerPool(create_tournament_schedule, SCHEDULE_WORKERS, SCHEDULE_QUEUE_SIZE, SCHEDULE_TIMEOUT_SECONDS)
+
+def generate_schedule(progress=gr.Progress(), *inputs):
+    """Run create_tournament_schedule on a schedule worker, reporting its progress
+    
+    Gradio passes progress ahead of the inputs because it comes first. An
+    empty update is yielded at every heartbeat, so a cancelled request is
+    noticed within a heartbeat and its worker stopped.
+    """
+    with time_stage('request'):
+        try:
+            with closing(schedule_pool.iter_run(*inputs)) as events:
+                for kind, value in events:
+                    if kind == 'result':
+                        yield value
+                        return
+                    if kind == 'queued':
+                        progress(0, desc=f"Waiting for a free worker (position {value} in the queue)")
+                    elif kind == 'stage' and value in STAGE_PROGRESS:
+                        fraction, description = STAGE_PROGRESS[value]
+                        progress(fraction, desc=description)
+                    yield gr.update()
+        except ValueError as error:
+            # Invalid roster rows are reported to the user as-is
+            raise gr.Error(str(error))
+        except PoolBusyError:
+            raise gr.Error("The server is busy generating other schedules. Please try again in a minute.")
+        except TimeoutError:
+            raise gr.Error(f"Schedule generation took longer than {SCHEDULE_TIMEOUT_SECONDS} seconds and was stopped. "
+                           "Try a smaller optimizer budget or fewer participants.")
+
+def lookup_matches(category, team, court, group, after, before):
+    """Matches of the most recently generated schedule that pass the lookup filters"""
+    schedule = schedule_store.get_schedule()
+    if schedule is None:
+        return "No schedule has been generated yet.", []
+    try:
+        matches = schedule_store.find_matches(
+            schedule['id'],
+            court=int(court) if court else None,
+            team_id=int(team) if team else None,
+            category=category or None,
+            group_id=int(group) if group else None,
+            after=after or None,
+            before=before or None
+        )
+    except ValueError:
+        raise gr.Error("Times must be HH:MM.")
+    
+    rows = []
+    for match in matches:
+        team1 = f"Team {match['team1']}" if match['team1'] is not None else match['seed1'] or "TBD"
+        team2 = f"Team {match['team2']}" if match['team2'] is not None else match['seed2'] or "TBD"
+        rows.append([match['match_id'], match['start_time'][-5:], match['court'], match['category'],
+                     match['stage'] or f"Group {match['group_id']}", f"{team1} vs {team2}", match['score'] or "", match['status']])
+    summary = (f"Schedule **{schedule['id']}**, generated {schedule['saved_at'].replace('T', ' ')}: "
+               f"**{len(rows)}** matching matches.")
+    if category and team:
+        # A calendar subscribed to the feed picks up later moves
+        summary += (f" [Team calendar](/api/schedules/{schedule['id']}/export.ics"
+                    f"?category={quote(category)}&team={int(team)}) (.ics)")
+    return summary, rows
+
+def update_match(match_id, score, status, court, start_time, edit_token, request: gr.Request):
+    """Record a result or move a match in the most recently generated schedule; live boards show it at once"""
+    client = request.client.host if request and request.client else ""
+    forwarded_for = request.headers.get("x-forwarded-for", "") if request else ""
+    if not edit_allowed(client, forwarded_for, edit_token or ""):
+        raise gr.Error("Editing matches needs the organisers' edit token.")
+    schedule = schedule_store.get_schedule()
+    if schedule is None:
+        raise gr.Error("No schedule has been generated yet.")
+    if match_id is None:
+        raise gr.Error("Enter the # of the match from the lookup results.")
+    try:
+        match = schedule_store.update_match(
+            schedule['id'],
+            int(match_id),
+            score=score if score else None,
+            status=status or None,
+            court=int(court) if court else None,
+            start_time=start_time or None
+        )
+    except KeyError:
+        raise gr.Error(f"Schedule {schedule['id']} has no match #{int(match_id)}.")
+    except ValueError as error:
+        raise gr.Error(str(error))
+    return f"Match **#{match['match_id']}** updated: {match['start_time'] or 'unscheduled'} on court {match['court']}, {match['status']}."
+
+def describe_feasibility(*settings):
+    """One-line closed-form check of whether the current settings fit the day"""
+    settings = dict(zip(TOURNAMENT_PARAMETERS, settings))
+    try:
+        estimate = estimate_tournament(settings)
+    except ValueError as error:
+        if settings.get('roster'):
+            return "⚠️ " + str(error).replace("\n", "  \n")
+        return "⏳ Enter valid settings to check feasibility."
+    except (TypeError, ZeroDivisionError):
+        return "⏳ Enter valid settings to check feasibility."
+    
+    required = estimate['required_matches']
+    available = estimate['available_slots']
+    if not required:
+        return "⚠️ These settings produce no matches."
+    if required > available:
+        return f"⚠️ **{required}** matches need more than the **{available}** available court slots ({estimate['load'] * 100:.0f}% load)."
+    if not estimate['fits']:
+        return (f"⚠️ **{required}** matches fit in **{available}** court slots, but a finalist from the largest groups needs "
+                f"**{estimate['slots_needed_per_team']}** slots and the day only has **{estimate['slots_per_court']}**.")
+    return f"✅ **{required}** matches fit in **{available}** court slots ({estimate['load'] * 100:.0f}% load)."
+
+def sweep_table(rows, base_params):
+    """Sweep result rows as table values, best scheduling rate and earliest finish first"""
+    rows = sorted(rows, key=lambda row: (-row['scheduling_success_rate'], row['finish_time'] or "99:99",
+                                         row['courts_available'], row['match_duration']))
+    return [
+        [row['courts_available'], row['match_duration']]
+        + [row.get(field, base_params[field]) for field in TEAMS_PER_GROUP_FIELDS]
+        + [row['required_matches'], row['scheduled_matches'], round(row['scheduling_success_rate'], 1),
+           round(row['court_utilization_rate'], 1), row['finish_time'] or "-"]
+        for row in rows
+    ]
+
+def run_parameter_sweep(
+    courts_range,
+    durations_range,
+    mens_doubles_range,
+    mixed_doubles_range,
+    amateur_range,
+    plus_35_range,
+    open_range,
+    parent_child_range,
+    prune_infeasible,
+    *settings
+):
+    """Run a what-if sweep and stream the growing results table"""
+    base_params = dict(zip(TOURNAMENT_PARAMETERS, settings))
+    team_ranges = [mens_doubles_range, mixed_doubles_range, amateur_range, plus_35_range, open_range, parent_child_range]
+    try:
+        rows = run_sweep(
+            base_params,
+            parse_int_range(courts_range, minimum=SWEEP_MINIMUMS['courts_available']),
+            parse_int_range(durations_range, minimum=SWEEP_MINIMUMS['match_duration']),
+            {field: parse_int_range(spec, minimum=SWEEP_MINIMUMS[field]) for field, spec in zip(TEAMS_PER_GROUP_FIELDS, team_ranges)},
+            prune_infeasible=prune_infeasible
+        )
+    except ValueError as error:
+        raise gr.Error(str(error))
+    
+    results = []
+    last_update = time.monotonic()
+    for row in rows:
+        results.append(row)
+        if time.monotonic() - last_update >= SWEEP_UPDATE_SECONDS:
+            yield sweep_table(results, base_params)
+            last_update = time.monotonic()
+    
+    yield sweep_table(results, base_params)
 
 def create_interface():
     with gr.Blocks(title="Tournament Schedule Generator") as demo:
@@ -629,13 +481,14 @@ def create_interface():
                 # Player Distribution
                 gr.Markdown("### Player Distribution")
                 total_participants = gr.Number(label="Total Participants", value=120, minimum=4)
+                roster = gr.File(label="Roster (CSV or XLSX, replaces the participants and ratios)", file_types=[".csv", ".xlsx"], type="filepath")
                 
                 # Player Ratios
                 gr.Markdown("#### Player Ratios")
-                amateur_ratio = gr.Slider(label="Amateur Players Ratio", minimum=0, value=0.33, step=0.01)
-                women_advanced_ratio = gr.Slider(label="Advanced Women Ratio (of Advanced Players)", minimum=0, value=0.33, step=0.01)
-                plus_35_ratio = gr.Slider(label="35+ Players Ratio (of Advanced Players)", minimum=0, value=0.3, step=0.01)
-                parent_child_ratio = gr.Slider(label="Parent-Child Teams Ratio (of Amateur Players)", minimum=0, value=0.3, step=0.01)
+                amateur_ratio = gr.Slider(label="Amateur Players Ratio", minimum=0, maximum=1, value=0.33, step=0.01)
+                women_advanced_ratio = gr.Slider(label="Advanced Women Ratio (of Advanced Players)", minimum=0, maximum=1, value=0.33, step=0.01)
+                plus_35_ratio = gr.Slider(label="35+ Players Ratio (of Advanced Players)", minimum=0, maximum=1, value=0.3, step=0.01)
+                parent_child_ratio = gr.Slider(label="Parent-Child Teams Ratio (of Amateur Players)", minimum=0, maximum=1, value=0.3, step=0.01)
                 
                 # Category Selection, Priorities, and Group Settings
                 gr.Markdown("### Categories and Group Settings")
@@ -679,55 +532,200 @@ def create_interface():
                 # Schedule Settings
                 gr.Markdown("### Schedule Settings")
                 match_duration = gr.Slider(label="Match Duration (minutes)", minimum=15, value=15, step=5)
+                category_durations = gr.Text(label="Match Duration by Category (e.g. Parent-Child: 8, Open: 20)", value="")
+                changeover_minutes = gr.Slider(label="Changeover Between Matches on a Court (minutes)", minimum=0, maximum=15, value=0, step=1)
                 qualifying_teams = gr.Slider(label="Qualifying Teams", minimum=1, value=2, step=1)
                 start_time = gr.Text(label="Start Time (HH:MM)", value="09:00")
                 end_time = gr.Text(label="End Time (HH:MM)", value="18:00")
                 courts_available = gr.Slider(label="Courts Available", minimum=1, value=4, step=1)
                 keep_categories_separate = gr.Checkbox(label="Keep Categories Separate", value=True)
+                min_rest_slots = gr.Slider(label="Minimum Rest Between Matches (slots)", minimum=0, maximum=4, value=0, step=1)
+                optimize_seconds = gr.Slider(label="Optimizer Time Budget (seconds, 0 = greedy only)", minimum=0, maximum=30, value=0, step=1)
+                slot_assignment = gr.Radio(label="Slot Assignment (greedy fills slots in priority order, coloring places the most constrained matches first)",
+                                           choices=["greedy", "coloring"], value="greedy")
+                
+                # Venues and days replace the courts and times above
+                gr.Markdown("### Venues and Days")
+                venues = gr.Textbox(label="Venues (one per line, e.g. Main Hall: 6, 09:00-18:00)", value="", lines=2)
+                days = gr.Text(label="Days (YYYY-MM-DD, comma separated)", value="")
+                partition_by = gr.Radio(label="Split Across Venue-Days By", choices=["category", "group"], value="category")
         
-        # Output Display
-        output_display = gr.HTML()
+        schedule_settings = [
+            total_participants,
+            amateur_ratio,
+            women_advanced_ratio,
+            plus_35_ratio,
+            parent_child_ratio,
+            include_mens_doubles,
+            include_mixed_doubles,
+            include_amateur,
+            include_35plus,
+            include_open,
+            include_parent_child,
+            match_duration,
+            mens_doubles_teams,
+            mixed_doubles_teams,
+            amateur_teams,
+            plus_35_teams,
+            open_teams,
+            parent_child_teams,
+            qualifying_teams,
+            start_time,
+            end_time,
+            courts_available,
+            keep_categories_separate,
+            mens_doubles_priority,
+            mixed_doubles_priority,
+            amateur_priority,
+            plus_35_priority,
+            open_priority,
+            parent_child_priority,
+            min_rest_slots,
+            roster,
+            optimize_seconds,
+            venues,
+            days,
+            partition_by,
+            category_durations,
+            changeover_minutes,
+            slot_assignment
+        ]
         
-        # Submit Button
-        gr.Button("Generate Schedule").click(
-            fn=create_tournament_schedule,
-            inputs=[
-                total_participants,
-                amateur_ratio,
-                women_advanced_ratio,
-                plus_35_ratio,
-                parent_child_ratio,
-                include_mens_doubles,
-                include_mixed_doubles,
-                include_amateur,
-                include_35plus,
-                include_open,
-                include_parent_child,
-                match_duration,
-                mens_doubles_teams,
-                mixed_doubles_teams,
-                amateur_teams,
-                plus_35_teams,
-                open_teams,
-                parent_child_teams,
-                qualifying_teams,
-                start_time,
-                end_time,
-                courts_available,
-                keep_categories_separate,
-                mens_doubles_priority,
-                mixed_doubles_priority,
-                amateur_priority,
-                plus_35_priority,
-                open_priority,
-                parent_child_priority
-            ],
-            outputs=output_display
+        # Live closed-form feasibility check, refreshed whenever a setting changes
+        feasibility = gr.Markdown()
+        gr.on(
+            triggers=[demo.load] + [setting.change for setting in schedule_settings],
+            fn=describe_feasibility,
+            inputs=schedule_settings,
+            outputs=feasibility,
+            show_progress="hidden"
         )
+        
+        with gr.Tab("Schedule"):
+            # Schedule View
+            with gr.Row():
+                page = gr.Number(label="Page", value=1, minimum=1, precision=0)
+                page_size = gr.Slider(label="Matches per Page", minimum=50, maximum=2000, value=SCHEDULE_PAGE_SIZE, step=50)
+                window_start = gr.Text(label="From (HH:MM, or YYYY-MM-DD HH:MM)", value="")
+                window_end = gr.Text(label="Until (HH:MM, or YYYY-MM-DD HH:MM)", value="")
+            with gr.Row():
+                overrun_minutes = gr.Slider(label="Simulate Overruns: Average Minutes Over per Match (0 = off)",
+                                            minimum=0, maximum=10, value=0, step=0.5)
+            with gr.Row():
+                court_filter = gr.Text(label="Courts (e.g. 1,3-5)", value="")
+                category_filter = gr.CheckboxGroup(
+                    label="Categories",
+                    choices=["Men's Doubles", "Mixed Doubles", "Amateur", "35+", "Open", "Parent-Child"]
+                )
+            
+            # Output Display
+            output_display = gr.HTML()
+            
+            # Submit and Stop Buttons; requests run concurrently, bounded by the schedule workers' queue
+            with gr.Row():
+                generate_button = gr.Button("Generate Schedule", variant="primary")
+                stop_button = gr.Button("Stop")
+            generate_event = generate_button.click(
+                fn=generate_schedule,
+                inputs=schedule_settings + [
+                    page,
+                    page_size,
+                    court_filter,
+                    category_filter,
+                    window_start,
+                    window_end,
+                    overrun_minutes
+                ],
+                outputs=output_display,
+                concurrency_limit=None
+            )
+            stop_button.click(fn=None, cancels=[generate_event])
+        
+        with gr.Tab("Lookup"):
+            gr.Markdown("Find matches in the most recently generated schedule, e.g. when a team plays next "
+                        "or what is on a court after a given time. Download the whole schedule as "
+                        "[CSV](/api/schedules/latest/export.csv) or [JSON Lines](/api/schedules/latest/export.jsonl), "
+                        "or give a category and team to get that team's calendar.")
+            with gr.Row():
+                lookup_category = gr.Dropdown(
+                    label="Category",
+                    choices=["", "Men's Doubles", "Mixed Doubles", "Amateur", "35+", "Open", "Parent-Child"],
+                    value=""
+                )
+                lookup_team = gr.Number(label="Team", value=None, minimum=1, precision=0)
+                lookup_group = gr.Number(label="Group", value=None, minimum=1, precision=0)
+                lookup_court = gr.Number(label="Court", value=None, minimum=1, precision=0)
+            with gr.Row():
+                lookup_after = gr.Text(label="From (HH:MM, or YYYY-MM-DD HH:MM)", value="")
+                lookup_before = gr.Text(label="Until (HH:MM, or YYYY-MM-DD HH:MM)", value="")
+            
+            lookup_summary = gr.Markdown()
+            lookup_results = gr.Dataframe(headers=LOOKUP_COLUMNS, interactive=False)
+            
+            gr.Button("Find Matches").click(
+                fn=lookup_matches,
+                inputs=[lookup_category, lookup_team, lookup_court, lookup_group, lookup_after, lookup_before],
+                outputs=[lookup_summary, lookup_results]
+            )
+            
+            # Edits are pushed to everyone watching the live board
+            gr.Markdown("### Update a Match\nScores, statuses and moves appear on the [live board](/board/latest) as they are saved.")
+            with gr.Row():
+                update_match_id = gr.Number(label="#", value=None, minimum=0, precision=0)
+                update_score = gr.Text(label="Score", value="")
+                update_status = gr.Dropdown(label="Status", choices=["", *MATCH_STATUSES], value="")
+                update_court = gr.Number(label="Move to Court", value=None, minimum=1, precision=0)
+                update_start_time = gr.Text(label="Move to (HH:MM)", value="")
+                update_token = gr.Text(label="Edit Token", value="", type="password")
+            update_result = gr.Markdown()
+            gr.Button("Update Match").click(
+                fn=update_match,
+                inputs=[update_match_id, update_score, update_status, update_court, update_start_time, update_token],
+                outputs=update_result
+            )
+        
+        with gr.Tab("What-if Sweep"):
+            gr.Markdown("Evaluate every combination of the ranges below (e.g. `4-8`, `4,6,8` or `15-45/15`). "
+                        "Empty ranges keep the value from the settings above.")
+            with gr.Row():
+                sweep_courts = gr.Text(label="Courts Available", value="2-8")
+                sweep_durations = gr.Text(label="Match Duration (minutes)", value="15-30/5")
+            with gr.Row():
+                sweep_mens_doubles_teams = gr.Text(label="Men's Doubles Teams per Group", value="")
+                sweep_mixed_doubles_teams = gr.Text(label="Mixed Doubles Teams per Group", value="")
+                sweep_amateur_teams = gr.Text(label="Amateur Teams per Group", value="")
+            with gr.Row():
+                sweep_plus_35_teams = gr.Text(label="35+ Teams per Group", value="")
+                sweep_open_teams = gr.Text(label="Open Teams per Group", value="")
+                sweep_parent_child_teams = gr.Text(label="Parent-Child Teams per Group", value="")
+            sweep_prune = gr.Checkbox(label="Skip configurations that cannot fit (closed-form estimate)", value=False)
+            
+            sweep_results = gr.Dataframe(headers=SWEEP_COLUMNS, interactive=False)
+            
+            gr.Button("Run Sweep").click(
+                fn=run_parameter_sweep,
+                inputs=[
+                    sweep_courts,
+                    sweep_durations,
+                    sweep_mens_doubles_teams,
+                    sweep_mixed_doubles_teams,
+                    sweep_amateur_teams,
+                    sweep_plus_35_teams,
+                    sweep_open_teams,
+                    sweep_parent_child_teams,
+                    sweep_prune
+                ] + schedule_settings,
+                outputs=sweep_results
+            )
     
     return demo
 
-if __name__ == "__main__":
-    demo = create_interface()
-    demo.launch(server_name="0.0.0.0", share=False)
+def create_app():
+    """JSON API with the Gradio interface mounted at the root"""
+    return gr.mount_gradio_app(create_api(schedule_store), create_interface(), path="/")
 
+if __name__ == "__main__":
+    import uvicorn
+    
+    configure_logging()
+    uvicorn.run(create_app(), host="0.0.0.0", port=7860)
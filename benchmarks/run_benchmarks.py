@@ -0,0 +1,199 @@
+"""Benchmark team generation, scheduling and rendering at fixed tournament sizes
+
+Every preset generates its teams and matches once, then schedules and renders
+them for each court count in both category modes. For every stage the best
+wall time over a few runs, the peak memory it allocated (traced in a separate
+run) and the size of what it produced are recorded and compared with a stored
+baseline.
+
+Usage: python benchmarks/run_benchmarks.py [--presets tiny,club] [--repeat N]
+           [--baseline PATH] [--save-baseline] [--output PATH] [--tolerance FRACTION]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import numpy as np  # noqa: E402
+
+from court_allocation.generation import calculate_groups_and_matches  # noqa: E402
+from court_allocation.render import create_schedule_display  # noqa: E402
+from court_allocation.scheduling import build_schedule_grid  # noqa: E402
+
+BASELINE_PATH = os.path.join(REPO_ROOT, "benchmarks", "baseline.json")
+
+# Preset name, participants and the court counts it is scheduled on
+PRESETS = [
+    ("tiny", 100, [2, 4]),
+    ("club", 1000, [8, 16]),
+    ("regional", 10000, [32, 64]),
+    ("league", 100000, [128, 256])
+]
+
+CATEGORIES = ["Men's Doubles", "Mixed Doubles", "Amateur", "35+", "Open", "Parent-Child"]
+
+# Settings shared by every preset, matching the UI defaults where there is one
+RATIOS = (0.33, 0.33, 0.3, 0.3)
+TEAMS_PER_GROUP = {category: 4 for category in CATEGORIES}
+QUALIFYING_TEAMS = 2
+START_TIME = "08:00"
+END_TIME = "22:00"
+MATCH_DURATION = 15
+CATEGORY_PRIORITY = {category: priority for priority, category in enumerate(CATEGORIES, start=1)}
+
+# Slowdown or memory growth over the baseline that counts as a regression
+REGRESSION_TOLERANCE = 0.25
+
+# Fast stages are repeated until they have run this long, to steady their best time
+MIN_MEASURE_SECONDS = 0.5
+MAX_RUNS = 200
+
+# Differences this small are timer and allocator noise, whatever the ratio
+NOISE_SECONDS = 0.002
+NOISE_BYTES = 64 * 1024
+
+def measure(stage, repeat):
+    """Best wall time of stage() over at least repeat runs, its traced peak memory and its result"""
+    best = None
+    runs = 0
+    total = 0.0
+    while runs < repeat or (total < MIN_MEASURE_SECONDS and runs < MAX_RUNS):
+        start = time.perf_counter()
+        result = stage()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        runs += 1
+        total += elapsed
+    
+    # Tracing slows allocation down, so memory is measured in its own run
+    tracemalloc.start()
+    try:
+        stage()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak, result
+
+def record(results, name, seconds, peak_bytes, output, unit):
+    """Store one stage measurement and print it"""
+    results[name] = {'seconds': round(seconds, 6), 'peak_bytes': peak_bytes, 'output': output, 'unit': unit}
+    print(f"{name:<36} {seconds * 1000:10.1f} ms {peak_bytes / 2 ** 20:9.1f} MiB {output:>10} {unit}", flush=True)
+
+def run_preset(name, participants, court_counts, repeat):
+    """Measure every stage of one preset"""
+    results = {}
+    
+    seconds, peak, generation = measure(lambda: calculate_groups_and_matches(
+        participants, *RATIOS, CATEGORIES, TEAMS_PER_GROUP, QUALIFYING_TEAMS
+    ), repeat)
+    all_matches, all_teams, group_info = generation
+    record(results, f"{name} generate", seconds, peak, len(all_matches), "matches")
+    
+    for courts in court_counts:
+        for keep_categories_separate in (True, False):
+            case = f"{name} {'separate' if keep_categories_separate else 'mixed'} {courts}c"
+            
+            seconds, peak, grid = measure(lambda: build_schedule_grid(
+                all_matches, START_TIME, END_TIME, MATCH_DURATION, courts,
+                keep_categories_separate, CATEGORY_PRIORITY
+            ), repeat)
+            record(results, f"{case} schedule", seconds, peak, grid.used_slots, "scheduled")
+            
+            seconds, peak, html = measure(lambda: create_schedule_display(grid, all_teams, group_info, CATEGORIES), repeat)
+            record(results, f"{case} render", seconds, peak, len(html), "bytes")
+    
+    return results
+
+def compare(results, baseline, tolerance):
+    """Stage names that got slower or used more memory than the baseline allows"""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        
+        notes = []
+        time_ratio = result['seconds'] / previous['seconds'] if previous['seconds'] else 1.0
+        memory_ratio = result['peak_bytes'] / previous['peak_bytes'] if previous['peak_bytes'] else 1.0
+        if time_ratio > 1 + tolerance and result['seconds'] - previous['seconds'] > NOISE_SECONDS:
+            notes.append(f"{time_ratio:.2f}x time")
+        if memory_ratio > 1 + tolerance and result['peak_bytes'] - previous['peak_bytes'] > NOISE_BYTES:
+            notes.append(f"{memory_ratio:.2f}x memory")
+        if notes:
+            regressions.append(name)
+        
+        # A different output size is a behaviour change, worth a look but not a regression
+        if result['output'] != previous['output']:
+            notes.append(f"output {previous['output']} -> {result['output']} {result['unit']}")
+        print(f"{name:<36} {time_ratio:6.2f}x time {memory_ratio:6.2f}x memory  {', '.join(notes) or 'ok'}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--presets", default=",".join(name for name, _, _ in PRESETS),
+                        help="comma separated preset names (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage, the fastest is kept")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline results to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE,
+                        help="allowed slowdown or memory growth as a fraction of the baseline")
+    args = parser.parse_args()
+    
+    selected = [name.strip() for name in args.presets.split(",") if name.strip()]
+    unknown = sorted(set(selected) - {name for name, _, _ in PRESETS})
+    if unknown:
+        parser.error(f"unknown preset(s): {', '.join(unknown)}")
+    
+    print(f"{'stage':<36} {'time':>13} {'peak memory':>13} {'output':>10}")
+    results = {}
+    for name, participants, court_counts in PRESETS:
+        if name in selected:
+            results.update(run_preset(name, participants, court_counts, args.repeat))
+    
+    report = {
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor() or platform.machine()
+        },
+        'results': results
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    
+    if args.save_baseline:
+        # Keep the baseline of presets that were not run this time
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)['results']
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(dict(report, results=baseline), f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    print(f"\nCompared with the baseline from Python {baseline['environment']['python']} on {baseline['environment']['machine']}:")
+    regressions = compare(results, baseline['results'], args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} stage(s) regressed by more than {args.tolerance * 100:.0f}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""Tournament scheduling core, importable without the Gradio UI"""
+
+import importlib
+import logging
+
+# Log events stay silent until the application configures logging
+logging.getLogger(__name__).addHandler(logging.NullHandler())
+
+# Public names are loaded from their submodules on first access, so importing the
+# package doesn't pay for numpy or FastAPI until something actually needs them
+_EXPORTS = {
+    'Player': 'models',
+    'Team': 'models',
+    'Match': 'models',
+    'CourtGrid': 'grid',
+    'MatchTable': 'grid',
+    'LRUCache': 'cache',
+    'create_teams_for_category': 'generation',
+    'calculate_groups_and_matches': 'generation',
+    'calculate_available_match_slots': 'generation',
+    'generate_round_robin_matches': 'generation',
+    'iter_category_matches': 'generation',
+    'create_knockout_stage': 'knockout',
+    'load_roster': 'roster',
+    'calculate_roster_groups_and_matches': 'roster',
+    'create_time_slots': 'scheduling',
+    'schedule_matches': 'scheduling',
+    'build_schedule_grid': 'scheduling',
+    'build_venue_grid': 'venues',
+    'build_timeline_grid': 'timeline',
+    'build_coloring_grid': 'coloring',
+    'build_conflict_graph': 'coloring',
+    'repair_schedule': 'repair',
+    'optimize_schedule': 'optimize',
+    'simulate_overruns': 'overrun',
+    'generate_tournament': 'tournament',
+    'calculate_schedule_statistics': 'tournament',
+    'get_cache_stats': 'tournament',
+    'create_schedule_display': 'render',
+    'iter_schedule_page': 'render',
+    'WorkerPool': 'workers',
+    'ScheduleStore': 'store',
+    'ChangeBroadcaster': 'live',
+    'create_api': 'api',
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,422 @@
+"""Headless JSON scheduling API"""
+
+import hmac
+import ipaddress
+import os
+import time
+from datetime import timedelta
+
+import numpy as np
+import orjson
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import HTMLResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from .export import EXPORT_MEDIA_TYPES, iter_csv, iter_grid_records, iter_ics, iter_jsonl
+from .grid import MatchTable
+from .instrumentation import render_metrics, request_seconds
+from .live import ChangeBroadcaster
+from .overrun import LATE_MINUTES, MAX_OVERRUN_RUNS, OVERRUN_RUNS, OVERRUN_VARIABILITY, simulate_overruns
+from .render import render_live_board
+from .repair import repair_schedule
+from .store import MAX_LOOKUP_MATCHES, ScheduleStore
+from .sweep import SWEEP_MINIMUMS, parse_int_range, run_sweep
+from .tournament import calculate_schedule_statistics, generate_tournament, get_cache_stats, resolve_categories
+
+# Longest local search a single request may ask for
+MAX_OPTIMIZE_SECONDS = 60
+
+# Token organisers give to edit matches, sent as "Authorization: Bearer <token>" to the API;
+# without one, edits are only accepted from the local or private network
+EDIT_TOKEN = os.environ.get("SCHEDULE_EDIT_TOKEN", "")
+
+# Upper end of the UI's sliders that don't set their own maximum (Gradio's default)
+SLIDER_MAXIMUM = 100
+
+class ScheduleRequest(BaseModel):
+    """Parameters of create_tournament_schedule, defaulting to the UI's initial values and bounded like its inputs"""
+    total_participants: int = Field(120, ge=4)
+    amateur_ratio: float = Field(0.33, ge=0, le=1)
+    women_advanced_ratio: float = Field(0.33, ge=0, le=1)
+    plus_35_ratio: float = Field(0.3, ge=0, le=1)
+    parent_child_ratio: float = Field(0.3, ge=0, le=1)
+    include_mens_doubles: bool = True
+    include_mixed_doubles: bool = True
+    include_amateur: bool = True
+    include_35plus: bool = True
+    include_open: bool = True
+    include_parent_child: bool = True
+    match_duration: int = Field(15, ge=15, le=SLIDER_MAXIMUM)
+    mens_doubles_teams: int = Field(4, ge=3, le=SLIDER_MAXIMUM)
+    mixed_doubles_teams: int = Field(4, ge=3, le=SLIDER_MAXIMUM)
+    amateur_teams: int = Field(4, ge=3, le=SLIDER_MAXIMUM)
+    plus_35_teams: int = Field(4, ge=3, le=SLIDER_MAXIMUM)
+    open_teams: int = Field(4, ge=3, le=SLIDER_MAXIMUM)
+    parent_child_teams: int = Field(4, ge=3, le=SLIDER_MAXIMUM)
+    qualifying_teams: int = Field(2, ge=1, le=SLIDER_MAXIMUM)
+    start_time: str = "09:00"
+    end_time: str = "18:00"
+    courts_available: int = Field(4, ge=1, le=SLIDER_MAXIMUM)
+    keep_categories_separate: bool = True
+    mens_doubles_priority: int = Field(1, ge=1)
+    mixed_doubles_priority: int = Field(2, ge=1)
+    amateur_priority: int = Field(3, ge=1)
+    plus_35_priority: int = Field(4, ge=1)
+    open_priority: int = Field(5, ge=1)
+    parent_child_priority: int = Field(6, ge=1)
+    min_rest_slots: int = Field(0, ge=0, le=4)
+    optimize_seconds: float = Field(0, ge=0, le=MAX_OPTIMIZE_SECONDS)
+    venues: str = ""
+    days: str = ""
+    partition_by: str = "category"
+    category_durations: str = ""
+    changeover_minutes: int = Field(0, ge=0, le=15)
+    slot_assignment: str = "greedy"
+
+def serialize_schedule(grid):
+    """Scheduled and unscheduled matches as plain dicts, read from the grid's match table"""
+    table = MatchTable(grid.matches, grid)
+    match_duration = timedelta(minutes=grid.match_duration)
+    end_times = [slot + match_duration for slot in grid.time_slots]
+    
+    def records(indices):
+        columns = [table.category, table.group_id, table.round_num, table.team1, table.team2, table.court, table.slot]
+        for index, category, group_id, round_num, team1, team2, court, slot in zip(indices.tolist(), *(column[indices].tolist() for column in columns)):
+            record = {
+                'category': table.categories[category],
+                'group_id': group_id,
+                'round_num': round_num,
+                'team1': team1 if team1 >= 0 else None,
+                'team2': team2 if team2 >= 0 else None
+            }
+            # Knockout matches name their round and where their teams qualify from
+            match = grid.matches[index]
+            if match.stage:
+                record['stage'] = match.stage
+                record['seeds'] = list(match.seeds)
+            if slot >= 0:
+                record['court'] = court
+                if grid.venues:
+                    record['court_name'] = grid.court_name(court)
+                record['start_time'] = grid.time_slots[slot]
+                if grid.durations is None:
+                    record['end_time'] = end_times[slot]
+                else:
+                    record['end_time'] = grid.time_slots[slot] + timedelta(minutes=grid.duration(index))
+            yield record
+    
+    return list(records(table.scheduled_order())), list(records(np.flatnonzero(table.slot < 0)))
+
+def run_generation(settings):
+    """generate_tournament for a request's settings, with invalid venues or days as a 422"""
+    try:
+        return generate_tournament(**settings)
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error))
+
+def schedule_endpoint(request: ScheduleRequest, http_request: Request):
+    """Generate a schedule, save it to the schedule store and return it as JSON"""
+    settings = request.model_dump()
+    enabled_categories, all_teams, group_info, grid = run_generation(settings)
+    if not enabled_categories:
+        raise HTTPException(status_code=422, detail="Select at least one category to generate a schedule.")
+    
+    teams = {
+        category: [{'id': team.id, 'group_id': team.group_id, 'players': [player.name for player in team.players]}
+                   for team in category_teams]
+        for category, category_teams in all_teams.items()
+    }
+    scheduled, unscheduled = serialize_schedule(grid) if grid is not None else ([], [])
+    schedule_id = http_request.app.state.schedule_store.save_schedule(grid, settings) if grid is not None else None
+    
+    # Returning the response directly skips FastAPI's jsonable_encoder pass
+    return ORJSONResponse({
+        'schedule_id': schedule_id,
+        'categories': enabled_categories,
+        'group_info': group_info,
+        'statistics': calculate_schedule_statistics(grid, group_info) if grid is not None else None,
+        'teams': teams,
+        'matches': scheduled,
+        'unscheduled': unscheduled
+    })
+
+class RepairRequest(BaseModel):
+    """A generated schedule plus the courts and slots that became unavailable on the day"""
+    schedule: ScheduleRequest = Field(default_factory=ScheduleRequest)
+    freeze_time: str
+    closed_courts: list[int] = Field(default_factory=list)
+    closed_slots: list[str] = Field(default_factory=list)
+    blocked_cells: list[tuple[int, str]] = Field(default_factory=list)
+
+def repair_endpoint(request: RepairRequest):
+    """Re-place the matches displaced by closures and return only the moves"""
+    settings = request.schedule.model_dump()
+    enabled_categories, all_teams, group_info, grid = run_generation(settings)
+    if grid is None:
+        raise HTTPException(status_code=422, detail="These settings produce no schedule to repair.")
+    
+    try:
+        repaired, moves = repair_schedule(
+            grid,
+            request.freeze_time,
+            request.closed_courts,
+            request.closed_slots,
+            request.blocked_cells,
+            category_priority=resolve_categories(settings)[2],
+            min_rest_slots=request.schedule.min_rest_slots
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error))
+    return ORJSONResponse({
+        'statistics': calculate_schedule_statistics(repaired, group_info),
+        'moves': [
+            {
+                'category': move['match'].category,
+                'group_id': move['match'].group_id,
+                'round_num': move['match'].round_num,
+                'stage': move['match'].stage,
+                'team1': move['match'].team1.id if move['match'].team1 else None,
+                'team2': move['match'].team2.id if move['match'].team2 else None,
+                'from_court': move['from_court'],
+                'from_time': move['from_time'],
+                'to_court': move['to_court'],
+                'to_time': move['to_time']
+            }
+            for move in moves
+        ]
+    })
+
+class SimulationRequest(BaseModel):
+    """A generated schedule plus how far its matches run over, on average and in spread"""
+    schedule: ScheduleRequest = Field(default_factory=ScheduleRequest)
+    runs: int = Field(OVERRUN_RUNS, ge=1, le=MAX_OVERRUN_RUNS)
+    mean_overrun: float = 2.0
+    variability: float = Field(OVERRUN_VARIABILITY, ge=0)
+    late_minutes: float = Field(LATE_MINUTES, ge=0)
+    seed: int | None = None
+
+def simulate_endpoint(request: SimulationRequest):
+    """Simulate random match overruns on a generated schedule and return its finish time risk"""
+    settings = request.schedule.model_dump()
+    enabled_categories, all_teams, group_info, grid = run_generation(settings)
+    if grid is None:
+        raise HTTPException(status_code=422, detail="These settings produce no schedule to simulate.")
+    return ORJSONResponse(simulate_overruns(
+        grid,
+        request.runs,
+        request.mean_overrun,
+        request.variability,
+        rest_minutes=settings['min_rest_slots'] * settings['match_duration'],
+        changeover_minutes=settings['changeover_minutes'],
+        late_minutes=request.late_minutes,
+        seed=request.seed
+    ))
+
+class SweepRequest(BaseModel):
+    """Fixed schedule settings plus the parameter ranges to sweep, e.g. "4-8" or "15-30/5"
+    
+    An empty range keeps the value from base.
+    """
+    base: ScheduleRequest = Field(default_factory=ScheduleRequest)
+    courts: str = ""
+    match_durations: str = ""
+    teams_per_group: dict[str, str] = Field(default_factory=dict)
+    prune_infeasible: bool = False
+
+def sweep_endpoint(request: SweepRequest):
+    """Stream what-if sweep results as JSON lines, one configuration per line"""
+    try:
+        rows = run_sweep(
+            request.base.model_dump(),
+            parse_int_range(request.courts, minimum=SWEEP_MINIMUMS['courts_available']),
+            parse_int_range(request.match_durations, minimum=SWEEP_MINIMUMS['match_duration']),
+            {field: parse_int_range(spec, minimum=SWEEP_MINIMUMS.get(field)) for field, spec in request.teams_per_group.items()},
+            prune_infeasible=request.prune_infeasible
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error))
+    
+    return StreamingResponse((orjson.dumps(row) + b"\n" for row in rows), media_type="application/x-ndjson")
+
+def schedules_endpoint(request: Request):
+    """Stored schedules, most recently saved first"""
+    return ORJSONResponse(request.app.state.schedule_store.list_schedules())
+
+def schedule_matches_endpoint(
+    request: Request,
+    schedule_id: str,
+    court: int = None,
+    team: int = None,
+    category: str = None,
+    group: int = None,
+    after: str = None,
+    before: str = None,
+    limit: int = MAX_LOOKUP_MATCHES
+):
+    """Scheduled matches of a stored schedule ("latest" for the most recent one), filtered by court, team, group and time"""
+    store = request.app.state.schedule_store
+    schedule = resolve_schedule(store, schedule_id)
+    try:
+        matches = store.find_matches(schedule['id'], court, team, category, group, after, before, limit)
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error))
+    return ORJSONResponse({'schedule': schedule, 'matches': matches})
+
+def resolve_schedule(store, schedule_id):
+    """Summary of a stored schedule from an id or "latest" in a path, or a 404"""
+    if schedule_id != "latest" and not schedule_id.isdigit():
+        raise HTTPException(status_code=404, detail="Unknown schedule.")
+    schedule = store.get_schedule(None if schedule_id == "latest" else int(schedule_id))
+    if schedule is None:
+        raise HTTPException(status_code=404, detail="Unknown schedule.")
+    return schedule
+
+class MatchUpdate(BaseModel):
+    """Edits to one stored match; fields left out stay as they are"""
+    score: str | None = None
+    status: str | None = None
+    court: int | None = None
+    start_time: str | None = None
+
+def update_match_endpoint(request: Request, schedule_id: str, match_id: int, update: MatchUpdate):
+    """Record a score or status, or move a match, and log the change for live board viewers"""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    client = request.client.host if request.client else ""
+    if not edit_allowed(client, request.headers.get("x-forwarded-for", ""), token.strip() if scheme.lower() == "bearer" else ""):
+        raise HTTPException(status_code=403, detail="Editing matches needs the organisers' edit token.")
+    store = request.app.state.schedule_store
+    schedule = resolve_schedule(store, schedule_id)
+    try:
+        match = store.update_match(schedule['id'], match_id, **update.model_dump())
+    except KeyError as error:
+        raise HTTPException(status_code=404, detail=str(error.args[0]))
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error))
+    return ORJSONResponse(match)
+
+def board_endpoint(request: Request, schedule_id: str, after: str = None):
+    """Scheduled matches for a live board, with the change log position to stream edits from"""
+    store = request.app.state.schedule_store
+    schedule = resolve_schedule(store, schedule_id)
+    # Read the position first: a change made in between is sent again, never missed
+    last_change_id = store.last_change_id(schedule['id'])
+    try:
+        matches = store.find_matches(schedule['id'], after=after)
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error))
+    return ORJSONResponse({'schedule': schedule, 'last_change_id': last_change_id, 'matches': matches})
+
+def board_events_endpoint(request: Request, schedule_id: int, since: int = 0):
+    """Server-Sent Events stream of a schedule's edits after since (or the Last-Event-ID of a reconnect)"""
+    last_event_id = request.headers.get("last-event-id", "")
+    if last_event_id.isdigit():
+        since = max(since, int(last_event_id))
+    return StreamingResponse(
+        request.app.state.broadcaster.stream(schedule_id, since),
+        media_type="text/event-stream",
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def export_response(records, export_format, filename, category=None, team=None, uid_prefix="schedule"):
+    """Stream export records as CSV, JSON Lines or an iCalendar feed, as a file download"""
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=404, detail="Unknown export format; use csv, jsonl or ics.")
+    if team is not None and not category:
+        raise HTTPException(status_code=422, detail="A team is identified within a category; give both.")
+    
+    if export_format == 'csv':
+        chunks = iter_csv(records)
+    elif export_format == 'jsonl':
+        chunks = iter_jsonl(records)
+    else:
+        calendar_name = f"{category} Team {team}" if team is not None else "Tournament Schedule"
+        chunks = iter_ics(records, calendar_name, uid_prefix)
+    if team is not None:
+        filename += f"-team-{team}"
+    return StreamingResponse(
+        (chunk.encode() for chunk in chunks),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}.{export_format}"'}
+    )
+
+def export_endpoint(request: ScheduleRequest, export_format: str, category: str = None, team: int = None):
+    """Generate a schedule (or reuse the cached one) and stream its matches, or one team's, without building a response in memory"""
+    enabled_categories, all_teams, group_info, grid = run_generation(request.model_dump())
+    if grid is None:
+        raise HTTPException(status_code=422, detail="These settings produce no schedule to export.")
+    return export_response(iter_grid_records(grid, category, team), export_format, "schedule", category, team)
+
+def stored_export_endpoint(request: Request, schedule_id: str, export_format: str, category: str = None, team: int = None):
+    """Stream a stored schedule's matches, or one team's, including recorded scores and moves
+    
+    Calendars subscribed to a team's .ics feed pick up moved matches on their next refresh.
+    """
+    store = request.app.state.schedule_store
+    schedule = resolve_schedule(store, schedule_id)
+    records = store.iter_matches(schedule['id'], category, team)
+    return export_response(records, export_format, f"schedule-{schedule['id']}", category, team, f"schedule-{schedule['id']}")
+
+def live_board_page(schedule_id: str):
+    """Live board page for a stored schedule, or "latest" for the most recently saved one"""
+    return HTMLResponse(render_live_board(schedule_id))
+
+# Content type of the Prometheus text exposition format
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def is_private_address(host):
+    """Whether a client address is loopback or on a private network, such as the Docker network"""
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return address.is_loopback or address.is_private
+
+def from_private_network(client, forwarded_for=""):
+    """Whether a client address and every address in its X-Forwarded-For header are local or private"""
+    # Traefik forwards outside requests from its own private address, so the
+    # original client in X-Forwarded-For has to be private too
+    forwarded = [host.strip() for host in forwarded_for.split(",") if host.strip()]
+    return all(is_private_address(host) for host in [client] + forwarded)
+
+def edit_allowed(client, forwarded_for="", token=""):
+    """Whether a request may edit matches: with the edit token when one is set, otherwise from the private network"""
+    if EDIT_TOKEN:
+        return hmac.compare_digest(token.encode(), EDIT_TOKEN.encode())
+    return from_private_network(client, forwarded_for)
+
+def metrics_endpoint(request: Request):
+    """Prometheus metrics, only for scrapers on the local or private network"""
+    client = request.client.host if request.client else ""
+    if not from_private_network(client, request.headers.get("x-forwarded-for", "")):
+        raise HTTPException(status_code=404)
+    return PlainTextResponse(render_metrics(get_cache_stats()), media_type=PROMETHEUS_CONTENT_TYPE)
+
+async def record_request_time(request, call_next):
+    """Middleware observing each request's latency under its route template"""
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Only API routes set the route; the mounted Gradio app and unknown paths share one label
+    route = getattr(request.scope.get('route'), 'path', 'other')
+    request_seconds.observe(time.perf_counter() - start, route, request.method)
+    return response
+
+def create_api(schedule_store=None):
+    """FastAPI app serving the JSON scheduling API, saving schedules to schedule_store (default: a ScheduleStore())"""
+    api = FastAPI(title="Tournament Schedule API")
+    api.state.schedule_store = schedule_store or ScheduleStore()
+    api.state.broadcaster = ChangeBroadcaster(api.state.schedule_store)
+    api.add_api_route("/api/schedule", schedule_endpoint, methods=["POST"], response_class=ORJSONResponse)
+    api.add_api_route("/api/schedules", schedules_endpoint, methods=["GET"], response_class=ORJSONResponse)
+    api.add_api_route("/api/schedules/{schedule_id}/matches", schedule_matches_endpoint, methods=["GET"], response_class=ORJSONResponse)
+    api.add_api_route("/api/schedules/{schedule_id}/matches/{match_id}", update_match_endpoint, methods=["PATCH"], response_class=ORJSONResponse)
+    api.add_api_route("/api/schedules/{schedule_id}/board", board_endpoint, methods=["GET"], response_class=ORJSONResponse)
+    api.add_api_route("/api/schedules/{schedule_id}/events", board_events_endpoint, methods=["GET"])
+    api.add_api_route("/api/schedules/{schedule_id}/export.{export_format}", stored_export_endpoint, methods=["GET"])
+    api.add_api_route("/api/export.{export_format}", export_endpoint, methods=["POST"])
+    api.add_api_route("/board/{schedule_id}", live_board_page, methods=["GET"], include_in_schema=False)
+    api.add_api_route("/api/sweep", sweep_endpoint, methods=["POST"])
+    api.add_api_route("/api/repair", repair_endpoint, methods=["POST"], response_class=ORJSONResponse)
+    api.add_api_route("/api/simulate", simulate_endpoint, methods=["POST"], response_class=ORJSONResponse)
+    api.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
+    api.middleware("http")(record_request_time)
+    return api
@@ -0,0 +1,125 @@
+"""Slot assignment by coloring the graph of matches that share a player"""
+
+import heapq
+import time
+from itertools import combinations
+
+import numpy as np
+
+from .grid import CourtGrid
+from .instrumentation import notify_stage
+from .scheduling import create_time_slots, mark_slot_busy, match_participants, prerequisite_counts, record_schedule, slot_window
+
+# Ways of assigning matches to time slots: slot by slot in priority order, or by coloring the conflict graph
+SLOT_ASSIGNMENTS = ('greedy', 'coloring')
+
+def build_conflict_graph(matches):
+    """Matches sharing a team or player, across every category, as CSR adjacency (indptr, indices)
+    
+    Built once from each player's list of matches, so it costs the pairs
+    of matches each player has rather than a comparison of every match with
+    every other. A team's matches are covered by its players'.
+    """
+    incidence = {}
+    for seq, match in enumerate(matches):
+        for team in (match.team1, match.team2):
+            if team is not None:
+                for participant in team.players or (team,):
+                    incidence.setdefault(id(participant), []).append(seq)
+    
+    pairs = [pair for seqs in incidence.values() if len(seqs) > 1 for pair in combinations(seqs, 2)]
+    if not pairs:
+        return np.zeros(len(matches) + 1, dtype=np.int64), np.zeros(0, dtype=np.int32)
+    pairs = np.unique(np.array(pairs, dtype=np.int64), axis=0)
+    sources = np.concatenate([pairs[:, 0], pairs[:, 1]])
+    targets = np.concatenate([pairs[:, 1], pairs[:, 0]])
+    order = np.argsort(sources, kind='stable')
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(sources, minlength=len(matches)))])
+    return indptr, targets[order].astype(np.int32)
+
+def build_coloring_grid(matches, start_time, end_time, match_duration, courts_available, keep_categories_separate=False, category_priority=None, min_rest_slots=0, event_date=None):
+    """Schedule matches into a court x time slot grid by DSatur coloring of their conflict graph
+    
+    Time slots are the colors, and each holds at most courts_available
+    matches. Categories are placed in priority order, and within one the
+    match whose neighbours are placed in the most distinct slots goes next,
+    ties going to a longer chain of matches still to follow and then to more
+    neighbours. It takes the earliest slot with a free court that no
+    neighbour plays within min_rest_slots of. A knockout match is only placed
+    once its prerequisites are, after their rest. keep_categories_separate
+    makes no difference, since categories already go one at a time.
+    """
+    notify_stage('scheduling')
+    start = time.perf_counter()
+    
+    for match in matches:
+        match.court = None
+        match.start_time = None
+        for participant in match_participants(match):
+            participant.busy_slots = 0
+    
+    time_slots = create_time_slots(start_time, end_time, match_duration, event_date)
+    grid = CourtGrid(matches, time_slots, courts_available, match_duration)
+    indptr, indices = build_conflict_graph(matches)
+    degree = np.diff(indptr).tolist()
+    category_priority = category_priority or {}
+    
+    open_slots = (1 << len(time_slots)) - 1  # slots with a court left
+    courts_used = [0] * len(time_slots)
+    taken = [0] * len(matches)  # bitset of the slots a match can't take
+    neighbour_slots = [0] * len(matches)  # bitset of the slots its neighbours are placed in
+    placed = [False] * len(matches)
+    waiting, position = prerequisite_counts(matches)
+    
+    def entry(seq):
+        match = matches[seq]
+        return (category_priority.get(match.category, 999), -neighbour_slots[seq].bit_count(), -match.critical_path,
+                -degree[seq], match.round_num, match.group_id, seq)
+    
+    heap = [entry(seq) for seq in range(len(matches)) if seq not in waiting]
+    heapq.heapify(heap)
+    while heap:
+        item = heapq.heappop(heap)
+        seq = item[-1]
+        # A match is pushed again whenever a neighbour is placed in a new slot; older entries are stale
+        if placed[seq] or -item[1] != neighbour_slots[seq].bit_count():
+            continue
+        placed[seq] = True
+        
+        candidates = open_slots & ~taken[seq]
+        if not candidates:
+            continue
+        slot_idx = (candidates & -candidates).bit_length() - 1
+        courts_used[slot_idx] += 1
+        if courts_used[slot_idx] == courts_available:
+            open_slots &= ~(1 << slot_idx)
+        match = matches[seq]
+        match.start_time = time_slots[slot_idx]
+        match.court = courts_used[slot_idx]
+        grid.place(seq, courts_used[slot_idx], slot_idx)
+        mark_slot_busy(match, slot_idx)
+        
+        window = slot_window(slot_idx, min_rest_slots)
+        slot_bit = 1 << slot_idx
+        for neighbour in indices[indptr[seq]:indptr[seq + 1]].tolist():
+            if placed[neighbour]:
+                continue
+            taken[neighbour] |= window
+            if not neighbour_slots[neighbour] & slot_bit:
+                neighbour_slots[neighbour] |= slot_bit
+                if neighbour not in waiting:
+                    heapq.heappush(heap, entry(neighbour))
+        
+        # Winners play on only after every match they depend on, and its rest
+        for dependent in match.dependents:
+            successor = position.get(id(dependent))
+            if successor is None:
+                continue
+            waiting[successor] -= 1
+            taken[successor] |= (slot_bit << (min_rest_slots + 1)) - 1
+            if not waiting[successor]:
+                del waiting[successor]
+                heapq.heappush(heap, entry(successor))
+    
+    record_schedule(grid, time.perf_counter() - start)
+    return grid
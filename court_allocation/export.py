@@ -0,0 +1,126 @@
+"""Streaming schedule exports: CSV, JSON Lines and per-team iCalendar feeds"""
+
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from .store import RESULT_COLUMNS, TIME_FORMAT
+
+# Time slots read from the grid at a time, and output rows joined into one chunk
+EXPORT_CHUNK_SLOTS = 64
+EXPORT_CHUNK_ROWS = 500
+
+# Columns of an exported match, in CSV column order; the same as a store lookup, so stored schedules export alike
+EXPORT_COLUMNS = RESULT_COLUMNS
+
+# Content type of each export format
+EXPORT_MEDIA_TYPES = {
+    'csv': "text/csv; charset=utf-8",
+    'jsonl': "application/x-ndjson",
+    'ics': "text/calendar; charset=utf-8"
+}
+
+def iter_grid_records(grid, category=None, team_id=None):
+    """Scheduled matches of a grid as export records, in time then court order
+    
+    Only EXPORT_CHUNK_SLOTS time slots of the grid are examined at once, so
+    memory doesn't grow with the schedule. With category and team_id only that
+    team's matches are produced.
+    """
+    court_names = [grid.court_name(court) for court in range(1, grid.courts_available + 1)]
+    for first_slot in range(0, len(grid.time_slots), EXPORT_CHUNK_SLOTS):
+        by_slot = grid.cells[:, first_slot:first_slot + EXPORT_CHUNK_SLOTS].T
+        for slot_offset, court_idx in np.argwhere(by_slot >= 0).tolist():
+            match_id = int(by_slot[slot_offset, court_idx])
+            match = grid.matches[match_id]
+            team1 = match.team1.id if match.team1 else None
+            team2 = match.team2.id if match.team2 else None
+            if team_id is not None and (match.category != category or team_id not in (team1, team2)):
+                continue
+            start = grid.time_slots[first_slot + slot_offset]
+            seeds = match.seeds or (None, None)
+            yield {
+                'match_id': match_id,
+                'category': match.category,
+                'group_id': match.group_id,
+                'round_num': match.round_num,
+                'stage': match.stage,
+                'team1': team1,
+                'team2': team2,
+                'seed1': seeds[0],
+                'seed2': seeds[1],
+                'court': court_idx + 1,
+                'court_name': court_names[court_idx],
+                'start_time': start.strftime(TIME_FORMAT),
+                'end_time': (start + timedelta(minutes=grid.duration(match_id))).strftime(TIME_FORMAT),
+                'score': None,
+                'status': 'scheduled'
+            }
+
+def iter_chunks(lines, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Join lines into chunks of up to chunk_rows, so a response isn't written one row at a time"""
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= chunk_rows:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+def iter_csv(records, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Export records as CSV text chunks, header first"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for count, record in enumerate(records, start=1):
+        writer.writerow([record[column] for column in EXPORT_COLUMNS])
+        if count % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def iter_jsonl(records):
+    """Export records as JSON Lines text chunks, one match per line"""
+    return iter_chunks(json.dumps({column: record[column] for column in EXPORT_COLUMNS}) + "\n" for record in records)
+
+def escape_ics_text(text):
+    """Escape a value for an iCalendar TEXT property"""
+    return str(text).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+def format_ics_time(value):
+    """Stored "YYYY-MM-DD HH:MM" time as a floating iCalendar date-time, in the venue's local time"""
+    return datetime.strptime(value, TIME_FORMAT).strftime("%Y%m%dT%H%M%S")
+
+def iter_ics(records, calendar_name, uid_prefix):
+    """Export records as an iCalendar feed, one event per match
+    
+    Event UIDs are uid_prefix plus the match id, so a calendar that refreshes
+    the feed moves an event rather than duplicating it.
+    """
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    yield ("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Court Allocation//Tournament Schedule//EN\r\n"
+           f"CALSCALE:GREGORIAN\r\nX-WR-CALNAME:{escape_ics_text(calendar_name)}\r\n")
+    
+    def events():
+        for record in records:
+            team1 = f"Team {record['team1']}" if record['team1'] is not None else record['seed1'] or "TBD"
+            team2 = f"Team {record['team2']}" if record['team2'] is not None else record['seed2'] or "TBD"
+            summary = f"{record['category']} {record['stage'] or 'Group ' + str(record['group_id'])}: {team1} vs {team2}"
+            if record['status'] == 'cancelled':
+                summary += " (cancelled)"
+            # Schedules stored before court names were kept only have the number
+            location = record['court_name'] or f"Court {record['court']}"
+            yield (
+                f"BEGIN:VEVENT\r\nUID:{uid_prefix}-{record['match_id']}@court-allocation\r\nDTSTAMP:{stamp}\r\n"
+                f"DTSTART:{format_ics_time(record['start_time'])}\r\nDTEND:{format_ics_time(record['end_time'])}\r\n"
+                f"SUMMARY:{escape_ics_text(summary)}\r\nLOCATION:{escape_ics_text(location)}\r\n"
+                "END:VEVENT\r\n"
+            )
+    
+    yield from iter_chunks(events())
+    yield "END:VCALENDAR\r\n"
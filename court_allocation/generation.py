@@ -0,0 +1,360 @@
+"""Team creation, group assignment and match generation"""
+
+import math
+import time
+from datetime import datetime
+
+from .instrumentation import notify_stage, stage_seconds
+from .knockout import create_knockout_stage
+from .models import Match, Player, Team
+
+def iter_round_robin_rounds(teams, group_id):
+    """Yield the rounds of a circle-method round robin, each as a list of matches
+    
+    Every team plays at most once per round; with an odd number of teams one
+    team has a bye in each round. A match's critical_path counts the rounds
+    left in the group, its own included.
+    """
+    n = len(teams)
+    
+    if n < 2:
+        return
+    
+    # If odd number of teams, add a dummy team for byes
+    if n % 2:
+        teams = teams + [None]
+        n += 1
+    
+    for round_num in range(n - 1):
+        round_matches = []
+        for i in range(n // 2):
+            team1 = teams[i]
+            team2 = teams[n - 1 - i]
+            
+            # Skip matches with dummy team (byes)
+            if team1 is not None and team2 is not None:
+                match = Match(team1, team2, group_id, round_num + 1, team1.category, critical_path=n - 1 - round_num)
+                round_matches.append(match)
+        
+        yield round_matches
+        
+        # Rotate teams for next round: fix team[0], rotate others clockwise
+        teams = [teams[0]] + [teams[-1]] + teams[1:-1]
+
+def generate_round_robin_matches(teams, group_id):
+    """Generate round-robin matches for a group of teams"""
+    return [match for round_matches in iter_round_robin_rounds(teams, group_id) for match in round_matches]
+
+def iter_category_matches(groups):
+    """Lazily yield a category's matches round by round across all of its groups
+    
+    groups lists the teams of each group, group 1 first. Every group's first
+    round comes before any second round, so the scheduler sees a team's next
+    match only after the rest of its round.
+    """
+    rounds = [iter_round_robin_rounds(group, group_id) for group_id, group in enumerate(groups, start=1)]
+    while rounds:
+        remaining = []
+        for group_rounds in rounds:
+            round_matches = next(group_rounds, None)
+            if round_matches is not None:
+                yield from round_matches
+                remaining.append(group_rounds)
+        rounds = remaining
+
+def bucket_groups(teams):
+    """Teams split into their groups in a single pass, group 1 first"""
+    groups = {}
+    for team in teams:
+        groups.setdefault(team.group_id, []).append(team)
+    return [groups[group_id] for group_id in sorted(groups)]
+
+def get_player(shared_players, name, gender, skill_level):
+    """The player called name, created on first use when shared_players is a dict shared between categories"""
+    if shared_players is None:
+        return Player(name, gender, skill_level)
+    player = shared_players.get(name)
+    if player is None:
+        player = shared_players[name] = Player(name, gender, skill_level)
+    return player
+
+def create_teams_for_category(category, total_participants, amateur_ratio, women_advanced_ratio, plus_35_ratio, parent_child_ratio, teams_per_group, shared_players=None):
+    """Create teams for a specific category
+    
+    Advanced players M1, W1, ... are the same people in every category they
+    play: the first of them make up 35+ and the rest Open, and any of them
+    may also play Men's or Mixed Doubles. With shared_players, a dict of name
+    to Player shared between calls, each of them is one Player, so the
+    scheduler keeps them from being booked on two courts at once.
+    """
+    # Calculate player distributions
+    total_amateur = int(total_participants * amateur_ratio)
+    total_advanced = total_participants - total_amateur
+    advanced_women = int(total_advanced * women_advanced_ratio)
+    advanced_men = total_advanced - advanced_women
+    
+    teams = []
+    
+    if category == "Men's Doubles":
+        # Create teams with advanced men players
+        players = [get_player(shared_players, f"M{i+1}", "M", "Advanced") for i in range(advanced_men)]
+        for i in range(0, len(players), 2):
+            if i + 1 < len(players):
+                team = Team(len(teams) + 1, category, [players[i], players[i+1]])
+                teams.append(team)
+    
+    elif category == "Mixed Doubles":
+        # Create mixed doubles teams (one man + one woman)
+        men = [get_player(shared_players, f"M{i+1}", "M", "Advanced") for i in range(advanced_men)]
+        women = [get_player(shared_players, f"W{i+1}", "F", "Advanced") for i in range(advanced_women)]
+        min_pairs = min(len(men), len(women))
+        for i in range(min_pairs):
+            team = Team(len(teams) + 1, category, [men[i], women[i]])
+            teams.append(team)
+    
+    elif category == "Amateur":
+        # Create amateur teams, excluding those reserved for parent-child
+        parent_child_players = int(total_amateur * parent_child_ratio)
+        available_amateurs = total_amateur - parent_child_players
+        players = [Player(f"A{i+1}", "M" if i % 2 == 0 else "F", "Amateur") 
+                  for i in range(available_amateurs)]
+        for i in range(0, len(players), 2):
+            if i + 1 < len(players):
+                team = Team(len(teams) + 1, category, [players[i], players[i+1]])
+                teams.append(team)
+    
+    elif category == "35+":
+        # Use a subset of advanced players for 35+
+        players = ([get_player(shared_players, f"M{i+1}", "M", "Advanced") for i in range(int(advanced_men * plus_35_ratio))] +
+                  [get_player(shared_players, f"W{i+1}", "F", "Advanced") for i in range(int(advanced_women * plus_35_ratio))])
+        for i in range(0, len(players), 2):
+            if i + 1 < len(players):
+                team = Team(len(teams) + 1, category, [players[i], players[i+1]])
+                teams.append(team)
+    
+    elif category == "Open":
+        # Create teams with the advanced players not used in 35+, numbered on from them
+        plus_35_men = int(advanced_men * plus_35_ratio)
+        plus_35_women = int(advanced_women * plus_35_ratio)
+        non_35_ratio = 1 - plus_35_ratio
+        players = ([get_player(shared_players, f"M{plus_35_men + i + 1}", "M", "Advanced") for i in range(int(advanced_men * non_35_ratio))] +
+                  [get_player(shared_players, f"W{plus_35_women + i + 1}", "F", "Advanced") for i in range(int(advanced_women * non_35_ratio))])
+        for i in range(0, len(players), 2):
+            if i + 1 < len(players):
+                team = Team(len(teams) + 1, category, [players[i], players[i+1]])
+                teams.append(team)
+    
+    elif category == "Parent-Child":
+        # Calculate number of parent-child pairs
+        num_pairs = int((total_amateur * parent_child_ratio) / 2)  # Divide by 2 as each team needs one parent and one child
+        
+        # Create parent-child teams
+        for i in range(num_pairs):
+            child = Player(f"Child{i+1}", "M" if i % 2 == 0 else "F", "Amateur")
+            parent = Player(f"Parent{i+1}", "M" if i % 2 == 0 else "F", "Advanced")
+            team = Team(len(teams) + 1, category, [parent, child])
+            teams.append(team)
+    
+    # Distribute teams into groups
+    assign_groups(teams, teams_per_group)
+    
+    return teams
+
+def assign_groups(teams, teams_per_group):
+    """Split teams into balanced groups in a single pass, setting each team's group id
+    
+    Fewer teams than teams_per_group form one group; otherwise there are
+    ceil(teams / teams_per_group) groups and the first ones take one extra team.
+    Returns the groups as lists of teams, group 1 first.
+    """
+    num_groups, group_size, larger_groups = estimate_groups(len(teams), teams_per_group)
+    groups = [[] for _ in range(num_groups)]
+    group_idx = 0
+    for team in teams:
+        if len(groups[group_idx]) == group_size + (1 if group_idx < larger_groups else 0):
+            group_idx += 1
+        team.group_id = group_idx + 1
+        groups[group_idx].append(team)
+    return groups
+
+def calculate_groups_and_matches(total_participants, amateur_ratio, women_advanced_ratio, plus_35_ratio, parent_child_ratio, enabled_categories, teams_per_group_settings, qualifying_teams):
+    """Calculate groups and generate matches for enabled categories"""
+    all_teams = {}
+    all_matches = []
+    group_info = {
+        'Player Distribution': {
+            'Total': total_participants,
+            'Amateur': int(total_participants * amateur_ratio),
+            'Advanced Men': int((total_participants - int(total_participants * amateur_ratio)) * (1 - women_advanced_ratio)),
+            'Advanced Women': int((total_participants - int(total_participants * amateur_ratio)) * women_advanced_ratio),
+            '35+ Players': int((total_participants - int(total_participants * amateur_ratio)) * plus_35_ratio),
+            'Parent-Child Teams': int(total_participants * amateur_ratio * parent_child_ratio / 2)
+        },
+        'Total Matches': 0,
+        'Men\'s Doubles Groups': 0,
+        'Mixed Doubles Groups': 0,
+        'Amateur Groups': 0,
+        '35+ Groups': 0,
+        'Open Groups': 0,
+        'Parent-Child Groups': 0,
+        'Knockout Matches': 0
+    }
+    
+    notify_stage('teams')
+    shared_players = {}
+    teams_seconds = 0.0
+    matches_seconds = 0.0
+    for category in enabled_categories:
+        start = time.perf_counter()
+        teams = create_teams_for_category(category, total_participants, amateur_ratio, women_advanced_ratio, plus_35_ratio, parent_child_ratio, teams_per_group_settings[category], shared_players)
+        teams_seconds += time.perf_counter() - start
+        if teams:
+            all_teams[category] = teams
+            
+            # Count groups for this category
+            groups = bucket_groups(teams)
+            num_groups = len(groups)
+            if category == "Men's Doubles":
+                group_info['Men\'s Doubles Groups'] = num_groups
+            elif category == "Mixed Doubles":
+                group_info['Mixed Doubles Groups'] = num_groups
+            elif category == "Amateur":
+                group_info['Amateur Groups'] = num_groups
+            elif category == "35+":
+                group_info['35+ Groups'] = num_groups
+            elif category == "Open":
+                group_info['Open Groups'] = num_groups
+            elif category == "Parent-Child":
+                group_info['Parent-Child Groups'] = num_groups
+            
+            # Generate each group's matches, round by round, then the knockout bracket of the qualifiers.
+            # The list is kept because the bracket walks the group matches again to set their dependents.
+            start = time.perf_counter()
+            category_matches = list(iter_category_matches(groups))
+            knockout_matches = create_knockout_stage(category, groups, category_matches, qualifying_teams)
+            all_matches.extend(category_matches)
+            all_matches.extend(knockout_matches)
+            group_info['Knockout Matches'] += len(knockout_matches)
+            matches_seconds += time.perf_counter() - start
+    
+    stage_seconds.observe(teams_seconds, 'teams')
+    stage_seconds.observe(matches_seconds, 'matches')
+    group_info['Total Matches'] = len(all_matches)
+    
+    return all_matches, all_teams, group_info
+
+def calculate_available_match_slots(start_time, end_time, match_duration, courts_available):
+    # Convert times to datetime
+    current_date = datetime.now().date()
+    start_datetime = datetime.combine(current_date, datetime.strptime(start_time, "%H:%M").time())
+    end_datetime = datetime.combine(current_date, datetime.strptime(end_time, "%H:%M").time())
+    
+    # Calculate total minutes available
+    total_minutes = (end_datetime - start_datetime).total_seconds() / 60
+    
+    # Calculate how many match slots are available per court
+    matches_per_court = int(total_minutes / match_duration)
+    
+    # Total available match slots across all courts
+    total_available_slots = matches_per_court * courts_available
+    
+    return total_available_slots
+
+def count_teams_for_category(category, total_participants, amateur_ratio, women_advanced_ratio, plus_35_ratio, parent_child_ratio):
+    """Number of teams create_teams_for_category would build, without building them"""
+    total_amateur = int(total_participants * amateur_ratio)
+    total_advanced = total_participants - total_amateur
+    advanced_women = int(total_advanced * women_advanced_ratio)
+    advanced_men = total_advanced - advanced_women
+    
+    if category == "Men's Doubles":
+        return advanced_men // 2
+    elif category == "Mixed Doubles":
+        return min(advanced_men, advanced_women)
+    elif category == "Amateur":
+        return (total_amateur - int(total_amateur * parent_child_ratio)) // 2
+    elif category == "35+":
+        return (int(advanced_men * plus_35_ratio) + int(advanced_women * plus_35_ratio)) // 2
+    elif category == "Open":
+        non_35_ratio = 1 - plus_35_ratio
+        return (int(advanced_men * non_35_ratio) + int(advanced_women * non_35_ratio)) // 2
+    elif category == "Parent-Child":
+        return int((total_amateur * parent_child_ratio) / 2)
+    return 0
+
+def estimate_groups(num_teams, teams_per_group):
+    """(groups, smallest group size, groups with one extra team) for the grouping in create_teams_for_category"""
+    if num_teams <= 0:
+        return 0, 0, 0
+    if num_teams < teams_per_group:
+        return 1, num_teams, 0
+    num_groups = math.ceil(num_teams / teams_per_group)
+    return num_groups, num_teams // num_groups, num_teams % num_groups
+
+def estimate_groups_and_matches(total_participants, amateur_ratio, women_advanced_ratio, plus_35_ratio, parent_child_ratio, enabled_categories, teams_per_group_settings, qualifying_teams=0):
+    """Closed-form team, group, round-robin and knockout match counts per category
+    
+    Mirrors calculate_groups_and_matches without creating any Player, Team or
+    Match objects: a group of n teams plays n*(n-1)/2 matches, and a bracket
+    of q qualifiers plays q-1.
+    """
+    team_counts = {category: count_teams_for_category(category, total_participants, amateur_ratio, women_advanced_ratio, plus_35_ratio, parent_child_ratio)
+                   for category in enabled_categories}
+    return estimate_matches_for_teams(team_counts, teams_per_group_settings, qualifying_teams)
+
+def estimate_matches_for_teams(team_counts, teams_per_group_settings, qualifying_teams=0):
+    """Closed-form group, round-robin and knockout match counts for known team counts per category"""
+    categories = {}
+    for category, num_teams in team_counts.items():
+        num_groups, group_size, larger_groups = estimate_groups(num_teams, teams_per_group_settings[category])
+        smaller_groups = num_groups - larger_groups
+        qualifiers = larger_groups * min(qualifying_teams, group_size + 1) + smaller_groups * min(qualifying_teams, group_size)
+        knockout_matches = max(0, qualifiers - 1)
+        categories[category] = {
+            'teams': num_teams,
+            'groups': num_groups,
+            'largest_group': group_size + (1 if larger_groups else 0),
+            'knockout_matches': knockout_matches,
+            'knockout_rounds': knockout_matches.bit_length(),
+            'matches': (larger_groups * (group_size + 1) * group_size + smaller_groups * group_size * (group_size - 1)) // 2 + knockout_matches
+        }
+    
+    return {
+        'categories': categories,
+        'total_matches': sum(estimate['matches'] for estimate in categories.values())
+    }
+
+def estimate_feasibility(estimate, start_time, end_time, match_duration, courts_available, min_rest_slots=0, venue_days=None):
+    """Compare an estimate_groups_and_matches result with the available court time
+    
+    A configuration fits when there are enough court slots for every match and the
+    day is long enough for the busiest team to play all of its group matches and
+    then every knockout round with the required rest between them. Both are
+    necessary conditions, so a configuration that fits can still leave matches
+    unscheduled. venue_days, (start, end, courts) for each venue on each day,
+    replace the single day's times and courts; a team's matches then have to
+    fit in the longest of them.
+    """
+    if venue_days:
+        day_slots = [(calculate_available_match_slots(start, end, match_duration, courts), courts)
+                     for start, end, courts in venue_days]
+        available_slots = sum(slots for slots, _ in day_slots)
+        slots_per_court = max(slots // courts for slots, courts in day_slots)
+    else:
+        available_slots = calculate_available_match_slots(start_time, end_time, match_duration, courts_available)
+        slots_per_court = available_slots // courts_available if courts_available else 0
+    
+    # The busiest team plays every other team in the largest group, then wins through to the final
+    team_matches = max((max(0, category['largest_group'] - 1) + category['knockout_rounds']
+                        for category in estimate['categories'].values()), default=0)
+    slots_needed_per_team = team_matches + max(0, team_matches - 1) * min_rest_slots
+    
+    required = estimate['total_matches']
+    return {
+        'required_matches': required,
+        'available_slots': available_slots,
+        'load': (required / available_slots) if available_slots else math.inf,
+        'slots_needed_per_team': slots_needed_per_team,
+        'slots_per_court': slots_per_court,
+        'fits': required <= available_slots and slots_needed_per_team <= slots_per_court
+    }
@@ -0,0 +1,198 @@
+"""Court x time slot occupancy grid"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Cell values that are not match indices
+FREE = -1
+BLOCKED = -2  # court closed or otherwise unavailable
+PLAYING = -3  # taken by a match that started in an earlier slot
+
+class CourtGrid:
+    """Dense courts x time slots grid of match indices, FREE or BLOCKED
+    
+    A multi-venue grid stacks the courts of every venue, in venue order, and
+    its time slots span every day; a venue's cells outside its hours are
+    BLOCKED. When matches last different times, slots are slot_minutes long
+    and a match's cell is followed by PLAYING cells for the rest of it.
+    """
+    def __init__(self, matches, time_slots, courts_available, match_duration, venues=None, durations=None, slot_minutes=None):
+        self.matches = matches
+        self.time_slots = time_slots
+        self.courts_available = courts_available
+        self.match_duration = match_duration  # minutes
+        self.venues = venues  # (name, courts) of each venue in court order, None for a single venue
+        self.durations = durations  # minutes of each match, None when every match takes match_duration
+        self.slot_minutes = slot_minutes or match_duration
+        self.cells = np.full((courts_available, len(time_slots)), FREE, dtype=np.int32)
+        self.categories = sorted(set(match.category for match in matches))
+        category_index = {category: i for i, category in enumerate(self.categories)}
+        self.match_categories = np.array([category_index[match.category] for match in matches], dtype=np.int16)
+    
+    def place(self, match_idx, court, slot_idx):
+        """Put a match on a court (numbered from 1) in a time slot"""
+        self.cells[court - 1, slot_idx] = match_idx
+    
+    def duration(self, match_idx):
+        """Minutes a match takes"""
+        return int(self.durations[match_idx]) if self.durations is not None else self.match_duration
+    
+    def copy(self):
+        """Grid sharing this one's matches and time slots, with its own cells"""
+        grid = CourtGrid.__new__(CourtGrid)
+        grid.__dict__.update(self.__dict__)
+        grid.cells = self.cells.copy()
+        return grid
+    
+    def slot_index(self, time_str):
+        """Index of the first time slot starting at or after an HH:MM time"""
+        time = datetime.strptime(str(time_str).strip(), "%H:%M").time()
+        for slot_idx, slot in enumerate(self.time_slots):
+            if slot.time() >= time:
+                return slot_idx
+        return len(self.time_slots)
+    
+    @property
+    def total_slots(self):
+        return int(np.count_nonzero(self.cells != BLOCKED))
+    
+    @property
+    def used_slots(self):
+        return int(np.count_nonzero(self.cells >= 0))
+    
+    @property
+    def playing_slots(self):
+        """Court time slots taken by a match, whether it starts in them or not"""
+        return self.used_slots + int(np.count_nonzero(self.cells == PLAYING))
+    
+    @property
+    def match_slots(self):
+        """Open court time counted in slots of match_duration, which is total_slots unless matches last different times"""
+        return self.total_slots * self.slot_minutes // self.match_duration
+    
+    def utilization(self):
+        """Percentage of open court time that holds a match"""
+        return (self.playing_slots / self.total_slots * 100) if self.total_slots else 0.0
+    
+    def venue_courts(self):
+        """(venue name, first court, courts) of each venue, with courts numbered from 1 across all venues"""
+        first_court = 1
+        for name, courts in self.venues or ():
+            yield name, first_court, courts
+            first_court += courts
+    
+    def court_name(self, court):
+        """Display name of a court (numbered from 1): "Court 3", or its venue and number there"""
+        for name, first_court, courts in self.venue_courts():
+            if court < first_court + courts:
+                return f"{name} Court {court - first_court + 1}" if name else f"Court {court - first_court + 1}"
+        return f"Court {court}"
+    
+    def venue_utilization(self):
+        """Open and used court time slots of each venue on each day, empty for a single-venue grid"""
+        days = sorted(set(slot.date() for slot in self.time_slots))
+        slot_days = np.array([days.index(slot.date()) for slot in self.time_slots], dtype=np.int32) if days else None
+        rows = []
+        for name, first_court, courts in self.venue_courts():
+            cells = self.cells[first_court - 1:first_court - 1 + courts]
+            for day_idx, day in enumerate(days):
+                day_cells = cells[:, slot_days == day_idx]
+                available = int(np.count_nonzero(day_cells != BLOCKED))
+                if not available:
+                    continue
+                used = int(np.count_nonzero(day_cells >= 0))
+                playing = used + int(np.count_nonzero(day_cells == PLAYING))
+                rows.append({
+                    'venue': name,
+                    'day': day.isoformat(),
+                    'courts': courts,
+                    'available_slots': available * self.slot_minutes // self.match_duration,
+                    'scheduled_matches': used,
+                    'utilization': playing / available * 100
+                })
+        return rows
+    
+    def finish_time(self):
+        """End time of the last scheduled match, or None when nothing is scheduled"""
+        if self.durations is not None:
+            court_idx, slot_idx = np.nonzero(self.cells >= 0)
+            return max((self.time_slots[slot] + timedelta(minutes=self.duration(match_idx))
+                        for slot, match_idx in zip(slot_idx.tolist(), self.cells[court_idx, slot_idx].tolist())), default=None)
+        used = np.flatnonzero((self.cells >= 0).any(axis=0))
+        if not len(used):
+            return None
+        return self.time_slots[used[-1]] + timedelta(minutes=self.match_duration)
+    
+    def idle_court_counts(self):
+        """Number of free courts in each time slot"""
+        return np.count_nonzero(self.cells == FREE, axis=0)
+    
+    def idle_courts(self, slot_idx):
+        """Court numbers that are free in a time slot"""
+        return np.flatnonzero(self.cells[:, slot_idx] == FREE) + 1
+    
+    def category_occupancy(self):
+        """Number of courts each category occupies in every time slot"""
+        occupied = self.cells >= 0
+        categories = np.where(occupied, self.match_categories[np.where(occupied, self.cells, 0)], -1)
+        return {category: np.count_nonzero(categories == i, axis=0) for i, category in enumerate(self.categories)}
+    
+    def scheduled_indices(self):
+        """Indices of scheduled matches ordered by time slot, then court"""
+        by_slot = self.cells.T
+        return by_slot[by_slot >= 0]
+    
+    def scheduled_matches(self):
+        """Scheduled matches ordered by time slot, then court"""
+        return [self.matches[i] for i in self.scheduled_indices()]
+    
+    def apply_placements(self):
+        """Write this grid's courts and start times back onto its Match objects"""
+        for match in self.matches:
+            match.court = None
+            match.start_time = None
+        for court_idx, slot_idx in np.argwhere(self.cells >= 0):
+            match = self.matches[self.cells[court_idx, slot_idx]]
+            match.court = int(court_idx) + 1
+            match.start_time = self.time_slots[slot_idx]
+
+class MatchTable:
+    """Struct-of-arrays copy of a match list: one NumPy column per attribute
+    
+    Teams are stored by id (-1 for a team still to be decided), categories as
+    codes into self.categories, and placements as a court number and time slot
+    index (-1 while unscheduled). Bulk consumers such as serializers read these
+    columns instead of walking thousands of Match objects.
+    """
+    __slots__ = ('categories', 'category', 'group_id', 'round_num', 'team1', 'team2', 'court', 'slot')
+    
+    def __init__(self, matches, grid=None):
+        count = len(matches)
+        self.categories = sorted(set(match.category for match in matches))
+        category_index = {category: i for i, category in enumerate(self.categories)}
+        self.category = np.fromiter((category_index[match.category] for match in matches), dtype=np.int8, count=count)
+        self.group_id = np.fromiter((match.group_id for match in matches), dtype=np.int32, count=count)
+        self.round_num = np.fromiter((match.round_num for match in matches), dtype=np.int32, count=count)
+        self.team1 = np.fromiter((match.team1.id if match.team1 else -1 for match in matches), dtype=np.int32, count=count)
+        self.team2 = np.fromiter((match.team2.id if match.team2 else -1 for match in matches), dtype=np.int32, count=count)
+        self.court = np.full(count, -1, dtype=np.int16)
+        self.slot = np.full(count, -1, dtype=np.int32)
+        
+        if grid is not None:
+            court_idx, slot_idx = np.nonzero(grid.cells >= 0)
+            match_idx = grid.cells[court_idx, slot_idx]
+            self.court[match_idx] = court_idx + 1
+            self.slot[match_idx] = slot_idx
+    
+    def __len__(self):
+        return len(self.group_id)
+    
+    @property
+    def nbytes(self):
+        return sum(getattr(self, column).nbytes for column in self.__slots__ if column != 'categories')
+    
+    def scheduled_order(self):
+        """Indices of scheduled matches ordered by time slot, then court"""
+        scheduled = np.flatnonzero(self.slot >= 0)
+        return scheduled[np.lexsort((self.court[scheduled], self.slot[scheduled]))]
@@ -0,0 +1,223 @@
+"""Structured log events and Prometheus metrics for the scheduling stages"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency histogram bucket bounds in seconds, from one cached lookup to a league-sized schedule
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Level used when configure_logging gets none and LOG_LEVEL is unset
+DEFAULT_LOG_LEVEL = "INFO"
+
+class StructuredFormatter(logging.Formatter):
+    """One JSON object per log record: time, level, logger, event and the event's fields"""
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            'level': record.levelname,
+            'logger': record.name,
+            'event': record.getMessage()
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+def configure_logging(level=None):
+    """Send court_allocation log events to stderr as JSON lines at level (default: $LOG_LEVEL or INFO)"""
+    handler = logging.StreamHandler()
+    handler.setFormatter(StructuredFormatter())
+    logger = logging.getLogger("court_allocation")
+    logger.handlers = [handler]
+    logger.setLevel((level or os.environ.get("LOG_LEVEL") or DEFAULT_LOG_LEVEL).upper())
+    logger.propagate = False
+    return logger
+
+def log_event(logger, level, event, **fields):
+    """Log an event name with its fields kept as structured data"""
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={'fields': fields})
+
+def format_labels(names, values):
+    """Prometheus label set such as {stage="scheduling"}"""
+    if not names:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+class Counter:
+    """Monotonic counter, optionally split by labels"""
+    kind = "counter"
+    
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+    
+    def inc(self, *label_values, amount=1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+    
+    def take(self):
+        """Values recorded since the last take, clearing them"""
+        with self.lock:
+            values, self.values = self.values, {}
+        return values
+    
+    def merge(self, values):
+        """Add values taken from the same metric in another process"""
+        for label_values, amount in values.items():
+            self.inc(*label_values, amount=amount)
+    
+    def samples(self):
+        with self.lock:
+            return [(self.name + format_labels(self.labels, key), value) for key, value in sorted(self.values.items())]
+
+class Gauge(Counter):
+    """Value that can go up and down, optionally split by labels"""
+    kind = "gauge"
+    
+    def set(self, value, *label_values):
+        with self.lock:
+            self.values[label_values] = value
+    
+    def take(self):
+        # A gauge keeps its last value, it only changes when set again
+        with self.lock:
+            return dict(self.values)
+    
+    def merge(self, values):
+        with self.lock:
+            self.values.update(values)
+
+class Histogram:
+    """Cumulative bucket counts, sum and count of observed values per label set"""
+    kind = "histogram"
+    
+    def __init__(self, name, documentation, labels=(), buckets=STAGE_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.values = {}
+        self.lock = threading.Lock()
+    
+    def observe(self, value, *label_values):
+        with self.lock:
+            counts = self.values.get(label_values)
+            if counts is None:
+                counts = self.values[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[0][i] += 1
+                    break
+            counts[1] += value
+            counts[2] += 1
+    
+    def take(self):
+        """Values recorded since the last take, clearing them"""
+        with self.lock:
+            values, self.values = self.values, {}
+        return values
+    
+    def merge(self, values):
+        """Add bucket counts, sums and counts taken from the same metric in another process"""
+        with self.lock:
+            for label_values, (bucket_counts, total, count) in values.items():
+                counts = self.values.get(label_values)
+                if counts is None:
+                    counts = self.values[label_values] = [[0] * len(self.buckets), 0.0, 0]
+                counts[0] = [a + b for a, b in zip(counts[0], bucket_counts)]
+                counts[1] += total
+                counts[2] += count
+    
+    def samples(self):
+        samples = []
+        with self.lock:
+            for key, (bucket_counts, total, count) in sorted(self.values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    cumulative += bucket_count
+                    samples.append((self.name + "_bucket" + format_labels(self.labels + ('le',), key + (repr(bound),)), cumulative))
+                samples.append((self.name + "_bucket" + format_labels(self.labels + ('le',), key + ('+Inf',)), count))
+                samples.append((self.name + "_sum" + format_labels(self.labels, key), total))
+                samples.append((self.name + "_count" + format_labels(self.labels, key), count))
+        return samples
+
+stage_seconds = Histogram(
+    "court_allocation_stage_seconds",
+    "Time spent in each stage: teams, matches, roster, scheduling, rendering and request",
+    ("stage",)
+)
+matches_scheduled = Counter("court_allocation_matches_scheduled_total", "Matches placed on a court by the scheduler", ("category",))
+matches_unscheduled = Counter("court_allocation_matches_unscheduled_total", "Matches the scheduler could not fit into the day", ("category",))
+scheduling_rate = Gauge("court_allocation_scheduling_matches_per_second", "Matches processed per second by the most recent scheduling run")
+request_seconds = Histogram("court_allocation_request_seconds", "HTTP request latency by route", ("route", "method"))
+workers_busy = Gauge("court_allocation_workers_busy", "Schedule worker processes running a request")
+worker_queue_depth = Gauge("court_allocation_worker_queue_depth", "Schedule requests waiting for a free worker")
+worker_requests = Counter("court_allocation_worker_requests_total", "Schedule requests by outcome", ("outcome",))
+live_viewers = Gauge("court_allocation_live_viewers", "Open live board event streams")
+
+METRICS = [stage_seconds, matches_scheduled, matches_unscheduled, scheduling_rate, request_seconds,
+           workers_busy, worker_queue_depth, worker_requests, live_viewers]
+
+# Callables told the name of each stage as it starts, e.g. to report progress from a worker process
+stage_listeners = []
+
+def notify_stage(stage):
+    """Tell the stage listeners that a stage is starting"""
+    for listener in stage_listeners:
+        listener(stage)
+
+def take_metric_values():
+    """Values of every metric recorded since the last take, for merge_metric_values in another process"""
+    return [metric.take() for metric in METRICS]
+
+def merge_metric_values(values):
+    """Fold the result of take_metric_values from a worker process into this process's metrics"""
+    for metric, metric_values in zip(METRICS, values):
+        metric.merge(metric_values)
+
+@contextmanager
+def time_stage(stage):
+    """Record the time spent in the with block under a stage label"""
+    notify_stage(stage)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_seconds.observe(time.perf_counter() - start, stage)
+
+def cache_metric_samples(cache_stats):
+    """Prometheus metric families for a get_cache_stats() result"""
+    families = [
+        ("court_allocation_cache_hits_total", "counter", "Result cache hits", 'hits'),
+        ("court_allocation_cache_misses_total", "counter", "Result cache misses", 'misses'),
+        ("court_allocation_cache_evictions_total", "counter", "Result cache evictions", 'evictions'),
+        ("court_allocation_cache_entries", "gauge", "Entries held by a result cache", 'entries'),
+        ("court_allocation_cache_bytes", "gauge", "Estimated memory held by a result cache", 'bytes')
+    ]
+    return [
+        (name, kind, documentation, [(name + format_labels(('cache',), (cache,)), stats[field])
+                                     for cache, stats in sorted(cache_stats.items())])
+        for name, kind, documentation, field in families
+    ]
+
+def render_metrics(cache_stats=None):
+    """All metrics in the Prometheus text exposition format"""
+    families = [(metric.name, metric.kind, metric.documentation, metric.samples()) for metric in METRICS]
+    if cache_stats:
+        families.extend(cache_metric_samples(cache_stats))
+    
+    lines = []
+    for name, kind, documentation, samples in families:
+        lines.append(f"# HELP {name} {documentation}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(f"{sample} {value}" for sample, value in samples)
+    return "\n".join(lines) + "\n"
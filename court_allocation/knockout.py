@@ -0,0 +1,139 @@
+"""Knockout brackets seeded from the group stage"""
+
+from .models import Match
+
+# Finishing positions with their own name; later ones are written as ordinals
+PLACE_LABELS = {1: "Winner", 2: "Runner-up"}
+
+def place_label(place):
+    """'Winner', 'Runner-up', '3rd', '4th', ... for a finishing position in a group"""
+    if place in PLACE_LABELS:
+        return PLACE_LABELS[place]
+    suffix = "th" if 10 <= place % 100 <= 20 else {1: "st", 2: "nd", 3: "rd"}.get(place % 10, "th")
+    return f"{place}{suffix}"
+
+def knockout_round_name(round_num, num_rounds):
+    """Name of a knockout round: Final, Semifinal, Quarterfinal or Round of N"""
+    remaining = num_rounds - round_num
+    if remaining == 0:
+        return "Final"
+    if remaining == 1:
+        return "Semifinal"
+    if remaining == 2:
+        return "Quarterfinal"
+    return f"Round of {2 ** (remaining + 1)}"
+
+def bracket_order(size):
+    """Seed numbers in bracket order for a power of two size, e.g. 1, 8, 4, 5, 2, 7, 3, 6
+    
+    Adjacent seeds meet in the first round, and the top two seeds can only meet
+    in the final.
+    """
+    order = [1]
+    while len(order) < size:
+        order = [seed for top in order for seed in (top, 2 * len(order) + 1 - top)]
+    return order
+
+def seed_bracket(groups, qualifying_teams):
+    """Qualifiers in first-round bracket order as (label, group id), with None for a bye
+    
+    The group winners are the top seeds, then the runners-up and so on; a group
+    smaller than qualifying_teams sends all of its teams. Where there is room, a
+    qualifier goes in the other half of the bracket from its group's winner, so
+    the two can only meet again in the final.
+    """
+    places = [[group_id for group_id, group in enumerate(groups, start=1) if place <= len(group)]
+              for place in range(1, qualifying_teams + 1)]
+    total = sum(len(group_ids) for group_ids in places)
+    if total < 2:
+        return []
+    
+    size = 1 << (total - 1).bit_length()
+    order = bracket_order(size)
+    top_half = {seed: position < size // 2 for position, seed in enumerate(order)}
+    
+    labels = {}
+    winner_top_half = {}
+    first_seed = 1
+    for place, group_ids in enumerate(places, start=1):
+        seeds = list(range(first_seed, first_seed + len(group_ids)))
+        first_seed += len(group_ids)
+        if place == 1:
+            assignment = list(zip(seeds, group_ids))
+            winner_top_half = {group_id: top_half[seed] for seed, group_id in assignment}
+        else:
+            top_seeds = [seed for seed in seeds if top_half[seed]]
+            bottom_seeds = [seed for seed in seeds if not top_half[seed]]
+            for_top = [group_id for group_id in group_ids if not winner_top_half[group_id]]
+            for_bottom = [group_id for group_id in group_ids if winner_top_half[group_id]]
+            assignment = list(zip(top_seeds, for_top)) + list(zip(bottom_seeds, for_bottom))
+            
+            # Whatever doesn't fit in the preferred half takes the remaining seeds in order
+            spare_seeds = sorted(top_seeds[len(for_top):] + bottom_seeds[len(for_bottom):])
+            assignment += zip(spare_seeds, for_top[len(top_seeds):] + for_bottom[len(bottom_seeds):])
+        for seed, group_id in assignment:
+            labels[seed] = (f"{place_label(place)} G{group_id}", group_id)
+    
+    return [labels.get(seed) for seed in order]
+
+def create_knockout_stage(category, groups, group_matches, qualifying_teams):
+    """Single-elimination bracket for a category's qualifiers, as matches whose teams are still to be decided
+    
+    groups lists the teams of each group, group 1 first, and group_matches are
+    the category's group-stage matches. When the qualifiers don't fill a power
+    of two bracket, the top seeds get a bye into the second round.
+    
+    A first-round match can only start once every match of its source groups
+    has been played, and each later match once both of the matches feeding it
+    have; every match lists the knockout matches waiting on it in dependents.
+    Each group match's critical_path is extended by the knockout rounds its
+    group's qualifiers still have to play, so the scheduler favours the chains
+    that decide when the final can start.
+    
+    Returns the knockout matches, round by round.
+    """
+    bracket = seed_bracket(groups, qualifying_teams)
+    if not bracket:
+        return []
+    
+    num_rounds = (len(bracket) - 1).bit_length()
+    
+    # Each entrant is (label, knockout match it comes from or None, source group or None); None is a bye
+    entrants = [(seed[0], None, seed[1]) if seed else None for seed in bracket]
+    
+    knockout_matches = []
+    group_dependents = {}
+    for round_num in range(1, num_rounds + 1):
+        round_name = knockout_round_name(round_num, num_rounds)
+        critical_path = num_rounds - round_num + 1
+        round_matches = []
+        next_entrants = []
+        for side1, side2 in zip(entrants[::2], entrants[1::2]):
+            # Only the top seeds have byes, so at most one side is missing
+            if side1 is None or side2 is None:
+                next_entrants.append(side1 or side2)
+                continue
+            
+            stage = round_name if round_num == num_rounds else f"{round_name} {len(round_matches) + 1}"
+            match = Match(None, None, 0, round_num, category, stage=stage, seeds=(side1[0], side2[0]), critical_path=critical_path)
+            round_matches.append(match)
+            next_entrants.append((f"Winner {stage}", match, None))
+            
+            for _, feeder, group_id in (side1, side2):
+                if feeder is not None:
+                    feeder.dependents = (match,)
+                elif match not in group_dependents.setdefault(group_id, []):
+                    group_dependents[group_id].append(match)
+        
+        knockout_matches.extend(round_matches)
+        entrants = next_entrants
+    
+    # Every match of a group must finish before the knockout matches its qualifiers enter in, and
+    # is followed by the rest of its group's rounds and then the longest of those knockout paths
+    group_dependents = {group_id: tuple(dependents) for group_id, dependents in group_dependents.items()}
+    entry_paths = {group_id: max(match.critical_path for match in dependents) for group_id, dependents in group_dependents.items()}
+    for match in group_matches:
+        match.dependents = group_dependents[match.group_id]
+        match.critical_path += entry_paths[match.group_id]
+    
+    return knockout_matches
@@ -0,0 +1,100 @@
+"""Live board updates: schedule edits pushed to viewers as Server-Sent Events"""
+
+import asyncio
+import json
+
+from .instrumentation import live_viewers
+from .store import MAX_CHANGES_READ
+
+# How often the change log of a schedule with viewers is checked for new edits
+LIVE_POLL_SECONDS = 0.5
+
+# Longest a viewer's stream stays silent; the comment sent instead keeps proxies from closing it
+LIVE_KEEPALIVE_SECONDS = 15
+
+# Changes a viewer may fall behind by before it is disconnected; its browser reconnects and catches up
+LIVE_QUEUE_SIZE = 256
+
+def format_event(change_id, change):
+    """A change log entry as one Server-Sent Events message"""
+    return f"id: {change_id}\nevent: change\ndata: {json.dumps(change)}\n\n".encode()
+
+class ChangeBroadcaster:
+    """Fans each schedule's change log out to all of its live viewers
+    
+    However many viewers a schedule has, one task polls its change log and
+    each change is encoded once; a viewer only has the encoded message
+    queued. Edits made in any process, such as a schedule worker or another
+    server, reach the viewers because the log lives in the schedule store.
+    """
+    def __init__(self, store, poll_seconds=LIVE_POLL_SECONDS):
+        self.store = store
+        self.poll_seconds = poll_seconds
+        self.viewers = {}  # schedule id -> set of viewer queues
+        self.pollers = {}  # schedule id -> polling task
+    
+    async def poll(self, schedule_id, last_id):
+        """Broadcast the schedule's new changes until it has no viewers left"""
+        try:
+            while self.viewers.get(schedule_id):
+                changes = await asyncio.to_thread(self.store.changes_since, schedule_id, last_id)
+                for change_id, change in changes:
+                    message = format_event(change_id, change)
+                    for queue in list(self.viewers.get(schedule_id, ())):
+                        if queue.qsize() >= LIVE_QUEUE_SIZE:
+                            # The queue has room for exactly this last None, which ends the viewer's stream
+                            self.remove_viewer(schedule_id, queue)
+                            queue.put_nowait(None)
+                        else:
+                            queue.put_nowait((change_id, message))
+                    last_id = change_id
+                # A full batch means more are waiting
+                if len(changes) < MAX_CHANGES_READ:
+                    await asyncio.sleep(self.poll_seconds)
+        finally:
+            self.pollers.pop(schedule_id, None)
+    
+    def remove_viewer(self, schedule_id, queue):
+        viewers = self.viewers.get(schedule_id)
+        if viewers is not None and queue in viewers:
+            viewers.discard(queue)
+            live_viewers.inc(amount=-1)
+            if not viewers:
+                del self.viewers[schedule_id]
+    
+    async def stream(self, schedule_id, since=0):
+        """Yield the schedule's changes after since as encoded events, then each new one as it is made"""
+        queue = asyncio.Queue(LIVE_QUEUE_SIZE + 1)
+        self.viewers.setdefault(schedule_id, set()).add(queue)
+        live_viewers.inc()
+        try:
+            if schedule_id not in self.pollers:
+                last_id = await asyncio.to_thread(self.store.last_change_id, schedule_id)
+                # Another viewer may have started the poller while the log was read
+                if schedule_id not in self.pollers:
+                    self.pollers[schedule_id] = asyncio.create_task(self.poll(schedule_id, last_id))
+            
+            # Catch up from the log itself; the poller only sends changes made after it started
+            sent = since
+            while True:
+                changes = await asyncio.to_thread(self.store.changes_since, schedule_id, sent)
+                for change_id, change in changes:
+                    yield format_event(change_id, change)
+                    sent = change_id
+                if len(changes) < MAX_CHANGES_READ:
+                    break
+            
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), LIVE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                if item is None:
+                    break
+                change_id, message = item
+                if change_id > sent:
+                    yield message
+                    sent = change_id
+        finally:
+            self.remove_viewer(schedule_id, queue)
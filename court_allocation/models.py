@@ -0,0 +1,51 @@
+"""Domain model: players, teams and matches"""
+
+# The model classes use __slots__ so that league-sized events with tens of
+# thousands of matches don't pay for a per-instance __dict__
+
+class Player:
+    __slots__ = ('name', 'gender', 'skill_level', 'age_bracket', 'busy_slots')
+    
+    def __init__(self, name, gender, skill_level, age_bracket=None):
+        self.name = name
+        self.gender = gender  # 'M' or 'F'
+        self.skill_level = skill_level  # 'Amateur' or 'Advanced'
+        self.age_bracket = age_bracket  # 'Junior', 'Adult' or '35+' for rostered players
+        self.busy_slots = 0  # Bitset over the schedule's time slots
+
+class Team:
+    __slots__ = ('id', 'group_id', 'category', 'players', 'group_number', 'busy_slots')
+    
+    def __init__(self, id, category, players):
+        self.id = id
+        self.group_id = None
+        self.category = category
+        self.players = players
+        self.group_number = None
+        self.busy_slots = 0  # Bitset over the schedule's time slots
+    
+    def __str__(self):
+        return f"Team {self.group_number}"
+
+class Match:
+    __slots__ = ('team1', 'team2', 'group_id', 'round_num', 'court', 'start_time', 'category',
+                 'stage', 'seeds', 'dependents', 'critical_path')
+    
+    def __init__(self, team1, team2, group_id, round_num, category, stage=None, seeds=None, critical_path=1):
+        self.team1 = team1  # None until a knockout match's teams are decided
+        self.team2 = team2
+        self.group_id = group_id
+        self.round_num = round_num
+        self.court = None
+        self.start_time = None
+        self.category = category
+        self.stage = stage  # Knockout round such as 'Quarterfinal 2', None in the group stage
+        self.seeds = seeds  # Where a knockout match's teams come from, e.g. ('Winner G1', 'Runner-up G2')
+        self.dependents = ()  # Matches that can only start once this one has finished
+        self.critical_path = critical_path  # Matches on the longest chain from this one to its category's final
+    
+    def __str__(self):
+        time_str = self.start_time.strftime("%H:%M") if self.start_time else "TBD"
+        if self.stage:
+            return f"[{time_str}] Court {self.court}: {self.category} {self.stage} - {' vs '.join(self.seeds)}"
+        return f"[{time_str}] Court {self.court}: {self.category} Group {self.group_id} - {self.team1} vs {self.team2}"
@@ -0,0 +1,327 @@
+"""Anytime local search that improves on the greedy first-fit schedule"""
+
+import logging
+import random
+import time
+from collections import Counter
+
+import numpy as np
+
+from .grid import BLOCKED, FREE
+from .instrumentation import log_event, time_stage
+from .scheduling import match_dependencies, match_participants, slot_window
+
+logger = logging.getLogger(__name__)
+
+# Matches pulled out and re-inserted by one large neighbourhood move
+DESTROY_MATCHES = 8
+DESTROY_WINDOW_SLOTS = 4
+
+# Occupied cells tried when a match can only go in by displacing another one
+EJECTION_SAMPLES = 32
+
+class ScheduleSearch:
+    """Schedule state for local search: a slot and court per match and busy bitsets per team and player
+    
+    Works on its own copy of the grid's cells and never touches the Match, Team
+    or Player objects, so the grid it started from stays valid. A match with
+    prerequisites, such as a knockout match, is only placed after all of them
+    have been played, with the rest gap in between.
+    """
+    def __init__(self, grid, min_rest_slots=0):
+        self.num_slots = len(grid.time_slots)
+        self.num_courts = grid.courts_available
+        self.windows = [slot_window(slot_idx, min_rest_slots) for slot_idx in range(self.num_slots)]
+        self.gap = min_rest_slots + 1
+        self.prerequisites, self.successors = match_dependencies(grid.matches)
+        self.critical_path = [match.critical_path for match in grid.matches]
+        
+        # Teams and players by index, so each match knows whose bitsets to check
+        participant_index = {}
+        self.participants = []
+        for match in grid.matches:
+            self.participants.append(tuple(participant_index.setdefault(id(participant), len(participant_index))
+                                           for participant in match_participants(match)))
+        self.busy = [0] * len(participant_index)
+        
+        # Cells by slot, then court, as plain lists for fast scalar access
+        self.cells = grid.cells.T.tolist()
+        self.free = [row.count(FREE) for row in self.cells]
+        self.used = [self.num_courts - self.free[slot_idx] - row.count(BLOCKED) for slot_idx, row in enumerate(self.cells)]
+        self.slot = [-1] * len(grid.matches)
+        self.court = [-1] * len(grid.matches)
+        self.slot_sum = 0
+        self.unscheduled = set(range(len(grid.matches)))
+        for slot_idx, row in enumerate(self.cells):
+            for court_idx, match_idx in enumerate(row):
+                if match_idx >= 0:
+                    self.mark(match_idx, slot_idx, court_idx)
+        
+        # Fewest slots any schedule of every match could finish in
+        usable = np.cumsum([self.free[slot_idx] + self.used[slot_idx] for slot_idx in range(self.num_slots)])
+        match_counts = np.bincount([participant for parts in self.participants for participant in parts], minlength=len(self.busy))
+        busiest = int(match_counts.max()) if len(match_counts) else 0
+        self.lower_bound = max(
+            int(np.searchsorted(usable, len(grid.matches))) + 1,
+            (busiest - 1) * (min_rest_slots + 1) + 1 if busiest else 0,
+            self.precedence_bound()
+        )
+    
+    def precedence_bound(self):
+        """Fewest slots the longest chain of prerequisites needs, ignoring court capacity
+        
+        A match can start no earlier than a gap after each prerequisite, and after
+        a team has played all of its matches among the prerequisites.
+        """
+        earliest = {}
+        # Prerequisites have a longer critical path than their successors, so they come first
+        for match_idx in sorted(self.prerequisites, key=lambda match_idx: -self.critical_path[match_idx]):
+            team_matches = Counter(participant for prerequisite in self.prerequisites[match_idx]
+                                   for participant in self.participants[prerequisite])
+            earliest[match_idx] = max(
+                max(earliest.get(prerequisite, 0) + self.gap for prerequisite in self.prerequisites[match_idx]),
+                max(team_matches.values(), default=0) * self.gap
+            )
+        return max(earliest.values(), default=-1) + 1
+    
+    def mark(self, match_idx, slot_idx, court_idx):
+        """Record a match as playing in a cell"""
+        self.slot[match_idx] = slot_idx
+        self.court[match_idx] = court_idx
+        self.slot_sum += slot_idx
+        self.unscheduled.discard(match_idx)
+        bit = 1 << slot_idx
+        for participant in self.participants[match_idx]:
+            self.busy[participant] |= bit
+    
+    def place(self, match_idx, slot_idx, court_idx):
+        """Put a match in a free cell"""
+        self.cells[slot_idx][court_idx] = match_idx
+        self.free[slot_idx] -= 1
+        self.used[slot_idx] += 1
+        self.mark(match_idx, slot_idx, court_idx)
+    
+    def remove(self, match_idx):
+        """Take a match off its cell, returning the (slot, court) it had"""
+        slot_idx = self.slot[match_idx]
+        court_idx = self.court[match_idx]
+        self.cells[slot_idx][court_idx] = FREE
+        self.free[slot_idx] += 1
+        self.used[slot_idx] -= 1
+        self.slot[match_idx] = -1
+        self.court[match_idx] = -1
+        self.slot_sum -= slot_idx
+        self.unscheduled.add(match_idx)
+        bit = ~(1 << slot_idx)
+        for participant in self.participants[match_idx]:
+            self.busy[participant] &= bit
+        return slot_idx, court_idx
+    
+    def release_slot(self, match_idx):
+        """First slot the match may start in after its prerequisites, num_slots while one is unplaced"""
+        release = 0
+        for prerequisite in self.prerequisites.get(match_idx, ()):
+            if self.slot[prerequisite] < 0:
+                return self.num_slots
+            release = max(release, self.slot[prerequisite] + self.gap)
+        return release
+    
+    def conflicts(self, match_idx, slot_idx):
+        """Whether a team or player of the match is busy within the rest window of a slot, or the slot breaks its precedence"""
+        window = self.windows[slot_idx]
+        if any(self.busy[participant] & window for participant in self.participants[match_idx]):
+            return True
+        if slot_idx < self.release_slot(match_idx):
+            return True
+        return any(0 <= self.slot[successor] < slot_idx + self.gap for successor in self.successors.get(match_idx, ()))
+    
+    def earliest_slot(self, match_idx, limit):
+        """First slot before limit with a free court and no conflict for the match, or -1"""
+        for slot_idx in range(self.release_slot(match_idx), limit):
+            if self.free[slot_idx] and not self.conflicts(match_idx, slot_idx):
+                return slot_idx
+        return -1
+    
+    def insert(self, match_idx, limit):
+        """Place an unplaced match in the earliest feasible free cell before limit"""
+        slot_idx = self.earliest_slot(match_idx, limit)
+        if slot_idx < 0:
+            return False
+        self.place(match_idx, slot_idx, self.cells[slot_idx].index(FREE))
+        return True
+    
+    def eject_insert(self, match_idx, limit, rng):
+        """Place an unplaced match before limit by moving a sampled occupant to another free cell before limit"""
+        for _ in range(EJECTION_SAMPLES):
+            slot_idx = rng.randrange(limit)
+            court_idx = rng.randrange(self.num_courts)
+            occupant = self.cells[slot_idx][court_idx]
+            if occupant < 0:
+                continue
+            
+            self.remove(occupant)
+            if not self.conflicts(match_idx, slot_idx):
+                self.place(match_idx, slot_idx, court_idx)
+                if self.insert(occupant, limit):
+                    return True
+                self.remove(match_idx)
+            self.place(occupant, slot_idx, court_idx)
+        return False
+    
+    def drop_successors(self, match_idx):
+        """Unplace every match that follows an unplaced match, directly or through others"""
+        stack = [match_idx]
+        while stack:
+            for successor in self.successors.get(stack.pop(), ()):
+                if self.slot[successor] >= 0:
+                    self.remove(successor)
+                    stack.append(successor)
+    
+    def insertion_order(self, match_indices, rng):
+        """Matches in random order, except that prerequisites come before their successors"""
+        match_indices = list(match_indices)
+        rng.shuffle(match_indices)
+        if self.prerequisites:
+            match_indices.sort(key=lambda match_idx: -self.critical_path[match_idx])
+        return match_indices
+    
+    def finish_slot(self):
+        """Index of the last slot with a match, or -1"""
+        for slot_idx in range(self.num_slots - 1, -1, -1):
+            if self.used[slot_idx]:
+                return slot_idx
+        return -1
+    
+    def objective(self):
+        """(unscheduled matches, finish slot, sum of slots), lower is better"""
+        return (len(self.unscheduled), self.finish_slot(), self.slot_sum)
+    
+    def improve(self, rng, deadline):
+        """One local search pass, returning whether anything improved
+        
+        Unscheduled matches are inserted, directly or by ejecting another match;
+        then matches move to earlier free cells, latest first; then matches in the
+        last slot try to displace an earlier match that has somewhere else to go.
+        """
+        improved = False
+        pending = self.insertion_order(sorted(self.unscheduled), rng)
+        for match_idx in pending:
+            if self.insert(match_idx, self.num_slots) or self.eject_insert(match_idx, self.num_slots, rng):
+                improved = True
+            if time.perf_counter() > deadline:
+                return improved
+        
+        for match_idx in sorted(range(len(self.slot)), key=self.slot.__getitem__, reverse=True):
+            slot_idx = self.slot[match_idx]
+            if slot_idx <= 0:
+                continue
+            court_idx = self.court[match_idx]
+            self.remove(match_idx)
+            if self.insert(match_idx, slot_idx):
+                improved = True
+            else:
+                self.place(match_idx, slot_idx, court_idx)
+            if time.perf_counter() > deadline:
+                return improved
+        
+        last_slot = self.finish_slot()
+        for match_idx in [match_idx for match_idx in self.cells[last_slot] if match_idx >= 0] if last_slot > 0 else []:
+            court_idx = self.court[match_idx]
+            self.remove(match_idx)
+            if self.eject_insert(match_idx, last_slot, rng):
+                improved = True
+            else:
+                self.place(match_idx, last_slot, court_idx)
+        return improved
+    
+    def perturb(self, rng):
+        """Large neighbourhood move: pull a few matches out of a random window and re-insert them in random order"""
+        start = rng.randrange(max(1, self.finish_slot() + 1))
+        window = [match_idx for row in self.cells[start:start + DESTROY_WINDOW_SLOTS] for match_idx in row if match_idx >= 0]
+        removed = rng.sample(window, min(DESTROY_MATCHES, len(window)))
+        for match_idx in removed:
+            self.remove(match_idx)
+        for match_idx in self.insertion_order(removed, rng):
+            self.insert(match_idx, self.num_slots)
+        
+        # A match that found no place takes the matches waiting on it out as well
+        for match_idx in removed:
+            if self.slot[match_idx] < 0:
+                self.drop_successors(match_idx)
+    
+    def snapshot(self):
+        return ([row[:] for row in self.cells], self.free[:], self.used[:], self.slot[:], self.court[:],
+                self.busy[:], set(self.unscheduled), self.slot_sum)
+    
+    def restore(self, state):
+        cells, free, used, slot, court, busy, unscheduled, slot_sum = state
+        self.cells = [row[:] for row in cells]
+        self.free = free[:]
+        self.used = used[:]
+        self.slot = slot[:]
+        self.court = court[:]
+        self.busy = busy[:]
+        self.unscheduled = set(unscheduled)
+        self.slot_sum = slot_sum
+
+def optimize_schedule(grid, time_budget, min_rest_slots=0, seed=0, max_iterations=None):
+    """Improve a schedule's unscheduled matches and finish time within time_budget seconds
+    
+    Starts from the grid (normally the greedy schedule) and alternates local
+    search passes with large neighbourhood moves, never letting a team or player
+    play twice within the rest window. Stops early when the schedule reaches a
+    lower bound on the finish time, nothing can move or max_iterations passes
+    have run; a run stopped by max_iterations rather than the clock gives the
+    same schedule for the same seed.
+    
+    Returns the best grid found, a copy sharing the original's matches, and a
+    dict with the unscheduled counts and finish times before and after.
+    """
+    with time_stage('optimization'):
+        start = time.perf_counter()
+        deadline = start + max(0.0, float(time_budget))
+        rng = random.Random(seed)
+        search = ScheduleSearch(grid, min_rest_slots)
+        
+        initial = best = search.objective()
+        best_state = search.snapshot()
+        iterations = 0
+        while time.perf_counter() < deadline and (max_iterations is None or iterations < max_iterations):
+            # Optimal: everything is placed and no schedule could finish earlier
+            if best[0] == 0 and best[1] + 1 <= search.lower_bound:
+                break
+            iterations += 1
+            improved = search.improve(rng, deadline)
+            objective = search.objective()
+            if objective < best:
+                best, best_state = objective, search.snapshot()
+            if not improved:
+                # A full grid with no free cell left has no move to make
+                if not any(search.free):
+                    break
+                search.restore(best_state)
+                search.perturb(rng)
+        search.restore(best_state)
+        
+        optimized = grid.copy()
+        optimized.cells = np.array(search.cells, dtype=np.int32).T.copy()
+    
+    result = {
+        'initial_unscheduled': initial[0],
+        'initial_finish_time': grid.finish_time(),
+        'unscheduled': best[0],
+        'finish_time': optimized.finish_time(),
+        'lower_bound_slots': search.lower_bound,
+        'iterations': iterations,
+        'seconds': time.perf_counter() - start
+    }
+    log_event(
+        logger, logging.INFO, "schedule_optimized",
+        unscheduled_before=initial[0],
+        unscheduled=best[0],
+        finish_slot_before=initial[1],
+        finish_slot=best[1],
+        iterations=iterations,
+        seconds=round(result['seconds'], 3)
+    )
+    return optimized, result
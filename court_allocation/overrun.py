@@ -0,0 +1,196 @@
+"""Monte Carlo simulation of match overruns and the finish time risk they carry"""
+
+import logging
+import math
+import time
+from datetime import timedelta
+
+import numpy as np
+
+from .instrumentation import log_event, time_stage
+from .scheduling import match_dependencies, match_participants
+
+logger = logging.getLogger(__name__)
+
+# Scenarios sampled by default, and the most a single request may ask for
+OVERRUN_RUNS = 10000
+MAX_OVERRUN_RUNS = 100000
+
+# Spread of match lengths around their mean, as a coefficient of variation
+OVERRUN_VARIABILITY = 0.25
+
+# A match starting more than this many minutes after its scheduled time counts as late
+LATE_MINUTES = 10
+
+# Matches reported as the most likely to start late
+LATE_MATCHES = 10
+
+def plan_overrun_steps(grid):
+    """Scheduled matches of a grid grouped into simulation steps, one per time slot
+    
+    Matches starting in the same slot use different courts, teams and players,
+    so a step simulates all of them in every run at once. Participants are the
+    teams plus the players in more than one team, since anyone else waits
+    exactly as long as their team. Knockout matches get a ready row holding
+    the time their prerequisites are over; the last participant and ready rows
+    are padding that is never read.
+    
+    Returns (steps, participant rows, ready rows). A step is the match and
+    court indices, planned start minutes and lengths, participant rows, ready
+    rows, and (step positions, ready rows of their successors) for each set
+    of successors its matches hold up.
+    """
+    if not grid.used_slots:
+        return [], 1, 1
+    base = grid.time_slots[0]
+    slot_minutes = [(slot - base).total_seconds() / 60 for slot in grid.time_slots]
+    court_idx, slot_idx = np.nonzero(grid.cells.T >= 0)[::-1]
+    match_idx = grid.cells[court_idx, slot_idx]
+    
+    # Players in one team only wait exactly as long as their team does
+    teams_of = {}
+    for index in match_idx.tolist():
+        for team in (grid.matches[index].team1, grid.matches[index].team2):
+            if team is not None:
+                for player in team.players:
+                    teams_of.setdefault(id(player), set()).add(id(team))
+    participant_index = {}
+    match_participant_rows = {}
+    for index in match_idx.tolist():
+        rows = []
+        for participant in match_participants(grid.matches[index]):
+            if len(teams_of.get(id(participant), ())) == 1:
+                continue
+            rows.append(participant_index.setdefault(id(participant), len(participant_index)))
+        match_participant_rows[index] = rows
+    padding = len(participant_index)
+    
+    _, successors = match_dependencies(grid.matches)
+    ready_rows = {}
+    for dependent_seqs in successors.values():
+        for dependent in dependent_seqs:
+            ready_rows.setdefault(dependent, len(ready_rows))
+    
+    steps = []
+    bounds = np.flatnonzero(np.diff(slot_idx)) + 1
+    for matches, courts, slots in zip(np.split(match_idx, bounds), np.split(court_idx, bounds), np.split(slot_idx, bounds)):
+        matches = matches.tolist()
+        width = max(1, max(len(match_participant_rows[index]) for index in matches))
+        participants = np.full((len(matches), width), padding, dtype=np.int32)
+        for position, index in enumerate(matches):
+            rows = match_participant_rows[index]
+            participants[position, :len(rows)] = rows
+        # The matches of a group share their successors, so each distinct set is updated once
+        releases = {}
+        for position, index in enumerate(matches):
+            if index in successors:
+                releases.setdefault(tuple(successors[index]), []).append(position)
+        steps.append((
+            np.array(matches, dtype=np.int32),
+            courts.astype(np.int32),
+            np.full(len(matches), slot_minutes[int(slots[0])], dtype=np.float32),
+            np.array([grid.duration(index) for index in matches], dtype=np.float32),
+            participants,
+            np.array([ready_rows.get(index, len(ready_rows)) for index in matches], dtype=np.int32),
+            [(positions, [ready_rows[dependent] for dependent in dependents]) for dependents, positions in releases.items()]
+        ))
+    return steps, padding + 1, len(ready_rows) + 1
+
+def simulate_overruns(grid, runs=OVERRUN_RUNS, mean_overrun=2.0, variability=OVERRUN_VARIABILITY, rest_minutes=0, changeover_minutes=0, late_minutes=LATE_MINUTES, seed=None):
+    """Sample random match lengths and report when the schedule really finishes
+    
+    Each run draws every scheduled match's length from a lognormal
+    distribution averaging its planned length plus mean_overrun minutes, with
+    the given coefficient of variation. A match starts at its scheduled time or,
+    if later, once its court is free after changeover_minutes, its teams and
+    players have had rest_minutes since their previous match and, for a
+    knockout match, the matches it depends on are over, so delays carry along
+    each court and each team's day. All runs advance together one time slot
+    at a time as NumPy arrays.
+    
+    Returns a dict with the planned finish time, the P50 and P90 finish times
+    and delays, and the matches most likely to start more than late_minutes
+    late, with how likely that is and their average delay.
+    """
+    with time_stage('simulation'):
+        start = time.perf_counter()
+        runs = int(runs)
+        rng = np.random.default_rng(seed)
+        steps, participant_count, ready_count = plan_overrun_steps(grid)
+        
+        # Lognormal length with mean planned + mean_overrun and standard deviation variability times that
+        sigma = math.sqrt(math.log1p(float(variability) ** 2))
+        court_free = np.zeros((grid.courts_available, runs), dtype=np.float32)
+        participant_free = np.zeros((participant_count, runs), dtype=np.float32)
+        ready = np.zeros((ready_count, runs), dtype=np.float32)
+        finish = np.zeros(runs, dtype=np.float32)
+        scheduled_court = np.zeros(len(grid.matches), dtype=np.int32)
+        scheduled_start = np.zeros(len(grid.matches), dtype=np.float32)
+        mean_delay = np.zeros(len(grid.matches))
+        late_share = np.zeros(len(grid.matches))
+        planned_finish = 0.0
+        
+        for matches, courts, planned, lengths, participants, rows, releases in steps:
+            begin = np.maximum(court_free[courts], participant_free[participants].max(axis=1))
+            np.maximum(begin, ready[rows], out=begin)
+            np.maximum(begin, planned[:, None], out=begin)
+            mu = np.log(np.maximum(lengths + mean_overrun, 1)) - sigma ** 2 / 2
+            end = rng.standard_normal((len(matches), runs), dtype=np.float32)
+            end *= sigma
+            end += mu[:, None]
+            np.exp(end, out=end)
+            end += begin
+            
+            court_free[courts] = end + changeover_minutes
+            released = end + rest_minutes
+            participant_free[participants] = released[:, None, :]
+            participant_free[-1] = 0
+            for positions, dependents in releases:
+                ready[dependents] = np.maximum(ready[dependents], released[positions].max(axis=0))
+            np.maximum(finish, end.max(axis=0), out=finish)
+            
+            scheduled_court[matches] = courts
+            scheduled_start[matches] = planned
+            begin -= planned[:, None]
+            mean_delay[matches] = begin.mean(axis=1)
+            late_share[matches] = np.count_nonzero(begin > late_minutes, axis=1) / runs
+            planned_finish = max(planned_finish, float((planned + lengths).max()))
+        
+        finish_p50, finish_p90 = np.percentile(finish, [50, 90]).tolist() if steps else (0.0, 0.0)
+        late = np.flatnonzero(late_share > 0)
+        late = late[np.lexsort((-mean_delay[late], -late_share[late]))][:LATE_MATCHES]
+    
+    base = grid.time_slots[0] if grid.time_slots else None
+    result = {
+        'runs': runs,
+        'planned_finish': base + timedelta(minutes=round(planned_finish)) if steps else None,
+        'finish_p50': base + timedelta(minutes=round(finish_p50)) if steps else None,
+        'finish_p90': base + timedelta(minutes=round(finish_p90)) if steps else None,
+        'delay_p50_minutes': round(max(0.0, finish_p50 - planned_finish), 1),
+        'delay_p90_minutes': round(max(0.0, finish_p90 - planned_finish), 1),
+        'late_matches': [
+            {
+                'match_id': index,
+                'category': grid.matches[index].category,
+                'group_id': grid.matches[index].group_id,
+                'round_num': grid.matches[index].round_num,
+                'stage': grid.matches[index].stage,
+                'court': int(scheduled_court[index]) + 1,
+                'court_name': grid.court_name(int(scheduled_court[index]) + 1),
+                'start_time': base + timedelta(minutes=float(scheduled_start[index])),
+                'late_probability': round(float(late_share[index]), 4),
+                'mean_delay_minutes': round(float(mean_delay[index]), 1)
+            }
+            for index in late.tolist()
+        ],
+        'seconds': time.perf_counter() - start
+    }
+    log_event(
+        logger, logging.INFO, "overruns_simulated",
+        runs=runs,
+        matches=grid.used_slots,
+        delay_p50=result['delay_p50_minutes'],
+        delay_p90=result['delay_p90_minutes'],
+        seconds=round(result['seconds'], 3)
+    )
+    return result
@@ -0,0 +1,301 @@
+"""HTML rendering of tournament summaries and schedules"""
+
+import html
+import json
+import math
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+
+from .instrumentation import time_stage
+from .scheduling import normalize_time
+
+# Schedule table pagination and streaming chunk size
+SCHEDULE_PAGE_SIZE = 200
+SCHEDULE_CHUNK_ROWS = 100
+
+# Shared styles for the schedule table, so rows don't repeat inline styles
+SCHEDULE_CSS = """
+<style>
+.schedule-table { width:100%; border-collapse:collapse; margin-top:10px }
+.schedule-table th, .schedule-table td { padding:10px; border:1px solid var(--border-color-primary); color:var(--body-text-color) }
+.schedule-table th { background-color:var(--background-fill-primary) }
+.schedule-table tr.schedule-slot td { padding:5px; text-align:center; font-weight:bold; background-color:var(--background-fill-secondary) }
+.schedule-pages { color:var(--body-text-color); margin-top:10px }
+</style>
+"""
+
+def create_tournament_summary(all_teams, group_info, enabled_categories):
+    """Create the tournament summary box with player and group distribution"""
+    summary = """
+<div style='border:1px solid var(--border-color-primary); padding:15px; border-radius:8px; margin-bottom:20px; background-color:var(--background-fill-primary); box-shadow: 0 1px 3px rgba(0,0,0,0.1)'>
+<h2 style='color:var(--body-text-color); margin-top:0'>🏆 Tournament Summary</h2>
+<div style='display:grid; grid-template-columns:1fr 1fr; gap:20px'>
+<div>
+<h3 style='color:var(--body-text-color)'>📊 Player Distribution</h3>
+<ul style='list-style-type:none; padding-left:0; color:var(--body-text-color)'>
+<li>🏸 Total Participants: <b>{total}</b></li>
+<li>👥 Amateur Players: <b>{amateur}</b></li>
+<li>👨 Advanced Men: <b>{adv_men}</b></li>
+<li>👩 Advanced Women: <b>{adv_women}</b></li>
+<li>🎯 35+ Players: <b>{plus_35}</b></li>
+<li>👨‍👦 Parent-Child Teams: <b>{parent_child}</b></li>
+</ul>
+</div>
+<div>
+<h3 style='color:var(--body-text-color)'>🏟️ Group Distribution</h3>
+<ul style='list-style-type:none; padding-left:0; color:var(--body-text-color)'>
+""".format(
+        total=group_info['Player Distribution']['Total'],
+        amateur=group_info['Player Distribution']['Amateur'],
+        adv_men=group_info['Player Distribution']['Advanced Men'],
+        adv_women=group_info['Player Distribution']['Advanced Women'],
+        plus_35=group_info['Player Distribution']['35+ Players'],
+        parent_child=group_info['Player Distribution']['Parent-Child Teams']
+    )
+    
+    # Add group distribution for each category
+    for category in enabled_categories:
+        if category in all_teams:
+            teams_per_group = Counter(team.group_id for team in all_teams[category])
+            summary += f"<li>🎯 {category}: <b>{len(teams_per_group)}</b> groups ("
+            summary += ", ".join(f"G{g}: {n} teams" for g, n in sorted(teams_per_group.items()))
+            summary += ")</li>\n"
+    
+    summary += """
+</ul>
+</div>
+</div>
+</div>
+"""
+    return summary
+
+def parse_court_filter(courts):
+    """Parse a court filter such as "1, 3-5" into a set of court numbers"""
+    selected = set()
+    for part in str(courts or "").split(","):
+        part = part.strip()
+        if "-" in part:
+            first, last = part.split("-", 1)
+            if first.strip().isdigit() and last.strip().isdigit():
+                selected.update(range(int(first), int(last) + 1))
+        elif part.isdigit():
+            selected.add(int(part))
+    return selected
+
+def window_mask(time_slots, bound, after):
+    """Slots at or after (or strictly before) a window bound.
+    
+    A bound with a date ("YYYY-MM-DD HH:MM") is compared against the full slot
+    start; a bare "HH:MM" applies to the time of day on every day of the schedule.
+    """
+    bound = str(bound).strip()
+    if " " in bound:
+        date, time = bound.split(None, 1)
+        moment = datetime.strptime(f"{date} {normalize_time(time)}", "%Y-%m-%d %H:%M")
+        keys = np.array([slot.timestamp() for slot in time_slots], dtype=np.float64)
+        limit = moment.timestamp()
+    else:
+        moment = datetime.strptime(normalize_time(bound), "%H:%M")
+        keys = np.array([slot.hour * 60 + slot.minute for slot in time_slots], dtype=np.int32)
+        limit = moment.hour * 60 + moment.minute
+    return keys >= limit if after else keys < limit
+
+def select_schedule_cells(grid, window_start=None, window_end=None, courts=None, categories=None):
+    """(slot, court) index pairs of scheduled matches that pass the filters, in time then court order"""
+    by_slot = grid.cells.T
+    selected = by_slot >= 0
+    
+    # Time window filter on slot start times, end exclusive
+    if window_start:
+        selected &= window_mask(grid.time_slots, window_start, after=True)[:, None]
+    if window_end:
+        selected &= window_mask(grid.time_slots, window_end, after=False)[:, None]
+    
+    if courts:
+        selected &= np.isin(np.arange(1, grid.courts_available + 1), list(courts))[None, :]
+    
+    if categories:
+        codes = [i for i, category in enumerate(grid.categories) if category in categories]
+        selected &= np.isin(grid.match_categories[np.where(selected, by_slot, 0)], codes)
+    
+    return np.argwhere(selected)
+
+def iter_schedule_table(grid, cells, chunk_rows=SCHEDULE_CHUNK_ROWS):
+    """Yield the match table for the given (slot, court) cells as HTML chunks"""
+    yield SCHEDULE_CSS
+    yield "<div style='overflow-x:auto'><table class='schedule-table'>"
+    yield "<tr><th>Time</th><th>Court</th><th>Category</th><th>Stage</th><th>Match</th></tr>"
+    
+    # A schedule over several days names the day of each slot, and one over several venues the venue of each court
+    multi_day = bool(grid.time_slots) and grid.time_slots[0].date() != grid.time_slots[-1].date()
+    slot_labels = [slot.strftime("%a %d %b %H:%M" if multi_day else "%H:%M") for slot in grid.time_slots]
+    # Venue names are free text
+    court_names = [html.escape(grid.court_name(court)) for court in range(1, grid.courts_available + 1)]
+    
+    current_time = None
+    rows = []
+    for slot_idx, court_idx in cells:
+        match = grid.matches[grid.cells[court_idx, slot_idx]]
+        time_str = slot_labels[slot_idx]
+        
+        # Add time separator
+        if current_time != time_str:
+            rows.append(f"<tr class='schedule-slot'><td colspan='5'>{time_str}</td></tr>")
+            current_time = time_str
+        
+        # Format team names; knockout teams are named by where they qualify from
+        seeds = match.seeds or ("TBD", "TBD")
+        team1_name = f"Team {match.team1.id}" if match.team1 else seeds[0]
+        team2_name = f"Team {match.team2.id}" if match.team2 else seeds[1]
+        
+        rows.append(
+            f"<tr><td>{time_str}</td><td>{court_names[court_idx]}</td><td>{match.category}</td>"
+            f"<td>{match.stage or f'Group {match.group_id}'}</td><td>{team1_name} vs {team2_name}</td></tr>"
+        )
+        
+        if len(rows) >= chunk_rows:
+            yield "".join(rows)
+            rows = []
+    
+    if rows:
+        yield "".join(rows)
+    
+    yield "</table></div>"
+
+def iter_schedule_page(grid, page=1, page_size=SCHEDULE_PAGE_SIZE, window_start=None, window_end=None, courts=None, categories=None):
+    """Yield one page of the filtered match schedule as HTML chunks"""
+    cells = select_schedule_cells(grid, window_start, window_end, courts, categories)
+    total_rows = len(cells)
+    page_size = max(1, int(page_size))
+    total_pages = max(1, math.ceil(total_rows / page_size))
+    page = min(max(1, int(page)), total_pages)
+    first = (page - 1) * page_size
+    page_cells = cells[first:first + page_size]
+    
+    yield "<div style='margin-top:20px'><h2 style='color:var(--body-text-color)'>📅 Match Schedule</h2>"
+    if total_rows:
+        yield (f"<div class='schedule-pages'>Showing matches <b>{first + 1}</b>-<b>{first + len(page_cells)}</b> "
+               f"of <b>{total_rows}</b> (page <b>{page}</b> of <b>{total_pages}</b>)</div>")
+        yield from iter_schedule_table(grid, page_cells)
+    else:
+        yield "<div class='schedule-pages'>No scheduled matches match the current filters.</div>"
+    yield "</div>"
+
+def create_schedule_display(grid, all_teams, group_info, enabled_categories, page=1, page_size=SCHEDULE_PAGE_SIZE, window_start=None, window_end=None, courts=None, categories=None):
+    if not grid.used_slots:
+        return "No matches could be scheduled within the given time constraints."
+    
+    with time_stage('rendering'):
+        summary = create_tournament_summary(all_teams, group_info, enabled_categories)
+        return summary + "".join(iter_schedule_page(grid, page, page_size, window_start, window_end, courts, categories))
+
+# Live board page: loads a board snapshot, then applies each pushed change to its row
+LIVE_BOARD_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>Live Court Board</title>
+<style>
+body { font-family: system-ui, sans-serif; margin: 20px; background: #fafafa; color: #222 }
+table { width: 100%; border-collapse: collapse }
+th, td { padding: 8px; border: 1px solid #ddd; text-align: left }
+th { background: #eee }
+tr.in_progress td { background: #fff6d5 }
+tr.finished td, tr.cancelled td { color: #999 }
+tr.cancelled td { text-decoration: line-through }
+tr.changed td { animation: changed 2s }
+@keyframes changed { from { background: #c8f0c8 } }
+#status { margin: 10px 0; color: #666 }
+</style>
+</head>
+<body>
+<h1>🏸 Live Court Board</h1>
+<div id="status">Loading...</div>
+<table>
+<thead><tr><th>Time</th><th>Court</th><th>Category</th><th>Stage</th><th>Match</th><th>Score</th><th>Status</th></tr></thead>
+<tbody id="board"></tbody>
+</table>
+<script>
+const scheduleRef = __SCHEDULE_ID__;
+const statusLabels = {scheduled: "Scheduled", in_progress: "In progress", finished: "Finished", cancelled: "Cancelled"};
+const board = document.getElementById("board");
+const statusLine = document.getElementById("status");
+const rows = new Map();
+let source = null;
+
+function sortKey(match) {
+    return match.start_time + String(match.court).padStart(4, "0") + String(match.match_id).padStart(8, "0");
+}
+
+function createRow(match) {
+    const team1 = match.team1 !== null ? `Team ${match.team1}` : (match.seed1 || "TBD");
+    const team2 = match.team2 !== null ? `Team ${match.team2}` : (match.seed2 || "TBD");
+    const row = document.createElement("tr");
+    row.dataset.key = sortKey(match);
+    row.className = match.status;
+    for (const text of [match.start_time.slice(-5), match.court_name || `Court ${match.court}`, match.category,
+                        match.stage || `Group ${match.group_id}`, `${team1} vs ${team2}`,
+                        match.score || "", statusLabels[match.status] || match.status]) {
+        const cell = document.createElement("td");
+        cell.textContent = text;
+        row.appendChild(cell);
+    }
+    rows.set(match.match_id, row);
+    return row;
+}
+
+function applyChange(match) {
+    const old = rows.get(match.match_id);
+    if (old) {
+        old.remove();
+        rows.delete(match.match_id);
+    }
+    if (!match.start_time) {
+        return;
+    }
+    const row = createRow(match);
+    const next = Array.from(board.children).find(other => other.dataset.key > row.dataset.key);
+    board.insertBefore(row, next || null);
+    row.classList.add("changed");
+}
+
+async function load() {
+    if (source) {
+        source.close();
+    }
+    const params = new URLSearchParams(window.location.search);
+    const after = params.get("after") ? `?after=${encodeURIComponent(params.get("after"))}` : "";
+    const response = await fetch(`/api/schedules/${scheduleRef}/board${after}`);
+    if (!response.ok) {
+        statusLine.textContent = "No schedule to show yet.";
+        return;
+    }
+    const snapshot = await response.json();
+    rows.clear();
+    board.replaceChildren(...snapshot.matches.map(createRow));
+    statusLine.textContent = `Schedule ${snapshot.schedule.id}, generated ${snapshot.schedule.saved_at.replace("T", " ")}. Updates appear as they are made.`;
+
+    source = new EventSource(`/api/schedules/${snapshot.schedule.id}/events?since=${snapshot.last_change_id}`);
+    source.addEventListener("change", event => {
+        const change = JSON.parse(event.data);
+        if (change.reset) {
+            load();
+        } else {
+            applyChange(change);
+        }
+    });
+}
+
+load();
+</script>
+</body>
+</html>
+"""
+
+def render_live_board(schedule_id):
+    """Live board page for a stored schedule, given its id or 'latest'"""
+    # The id comes from the URL, so it is embedded as a JSON string that can't close the script
+    return LIVE_BOARD_PAGE.replace("__SCHEDULE_ID__", json.dumps(str(schedule_id)).replace("<", "\\u003c"))
@@ -0,0 +1,127 @@
+"""Incremental repair of a schedule after overruns and court closures"""
+
+import heapq
+
+import numpy as np
+
+from .grid import BLOCKED, FREE
+from .scheduling import match_dependencies, match_participants, queue_entry, slot_window
+
+def repair_schedule(grid, freeze_time, closed_courts=(), closed_slots=(), blocked_cells=(), category_priority=None, min_rest_slots=0):
+    """Re-place only the matches displaced by unavailable courts or time slots
+    
+    Matches starting before freeze_time (HH:MM) stay where they are, as does every
+    later match whose cell is still available. closed_courts are unavailable from
+    freeze_time on, closed_slots (HH:MM) are unavailable on every court, and
+    blocked_cells lists (court, HH:MM) pairs such as the slot after an overrunning
+    match. Displaced matches move, in priority order, to the earliest free cell at
+    or after freeze_time where none of their teams or players is busy and every
+    match they depend on has been played. A later knockout match that would now
+    start too soon after a displaced one is displaced as well.
+    
+    Returns a repaired copy of the grid and the list of moves, each a dict with the
+    match and its old and new court and start time (None when it no longer fits).
+    The original grid, the Match placements and the shared Team and Player
+    objects are left untouched. Raises ValueError for a court that doesn't exist
+    and for a schedule whose matches last different times.
+    """
+    if grid.durations is not None:
+        raise ValueError("Only schedules where every match takes the same time in fixed slots can be repaired.")
+    for court in list(closed_courts) + [court for court, _ in blocked_cells]:
+        if not 1 <= int(court) <= grid.courts_available:
+            raise ValueError(f"There is no court {court}: courts are numbered 1 to {grid.courts_available}.")
+    repaired = grid.copy()
+    cells = repaired.cells
+    num_slots = len(grid.time_slots)
+    freeze_slot = grid.slot_index(freeze_time)
+    
+    # Mark the newly unavailable cells, never touching the frozen past
+    closed = np.zeros(cells.shape, dtype=bool)
+    for court in closed_courts:
+        closed[int(court) - 1, freeze_slot:] = True
+    for time_str in closed_slots:
+        slot_idx = grid.slot_index(time_str)
+        if slot_idx < num_slots:
+            closed[:, slot_idx] = True
+    for court, time_str in blocked_cells:
+        slot_idx = grid.slot_index(time_str)
+        if slot_idx < num_slots:
+            closed[int(court) - 1, slot_idx] = True
+    closed[:, :freeze_slot] = False
+    
+    displaced_courts, displaced_slots = np.nonzero(closed & (cells >= 0))
+    displaced = cells[displaced_courts, displaced_slots]
+    cells[closed] = BLOCKED
+    
+    # Time slot of every placed match, to check knockout matches against the matches they depend on
+    prerequisites, successors = match_dependencies(grid.matches)
+    match_slots = np.full(len(grid.matches), -1, dtype=np.int64)
+    placed_courts, placed_slots = np.nonzero(cells >= 0)
+    match_slots[cells[placed_courts, placed_slots]] = placed_slots
+    origins = {int(match_idx): (int(court_idx), int(slot_idx))
+               for match_idx, court_idx, slot_idx in zip(displaced, displaced_courts, displaced_slots)}
+    
+    # Busy slots of every team and player from the matches that keep their place,
+    # keyed by id in bitsets of the repair's own: the Team and Player objects are
+    # shared with the cached schedule and other requests
+    busy = {}
+    for match_idx, slot_idx in zip(cells[placed_courts, placed_slots].tolist(), placed_slots.tolist()):
+        for participant in match_participants(grid.matches[match_idx]):
+            busy[id(participant)] = busy.get(id(participant), 0) | 1 << slot_idx
+    
+    # Keyed by match index; prerequisites come out before the matches that depend on them
+    category_priority = category_priority or {}
+    queue = [queue_entry(grid.matches[match_idx], match_idx, category_priority) for match_idx in origins]
+    heapq.heapify(queue)
+    
+    free = cells == FREE
+    gap = min_rest_slots + 1
+    moves = []
+    while queue:
+        entry = heapq.heappop(queue)
+        match = entry[-1]
+        match_idx = entry[-2]
+        
+        # Earliest slot after the freeze and the matches it depends on, with a free court and no team conflict
+        target = None
+        prerequisite_slots = [match_slots[prerequisite] for prerequisite in prerequisites.get(match_idx, ())]
+        if min(prerequisite_slots, default=0) >= 0:
+            earliest = max([freeze_slot] + [prerequisite_slot + gap for prerequisite_slot in prerequisite_slots])
+            open_slots = np.flatnonzero(free[:, earliest:].any(axis=0)) + earliest
+            for slot_idx in open_slots:
+                window = slot_window(slot_idx, min_rest_slots)
+                if not any(busy.get(id(participant), 0) & window for participant in match_participants(match)):
+                    target = (int(np.flatnonzero(free[:, slot_idx])[0]), int(slot_idx))
+                    break
+        
+        if target is not None:
+            court_idx, slot_idx = target
+            cells[court_idx, slot_idx] = match_idx
+            free[court_idx, slot_idx] = False
+            match_slots[match_idx] = slot_idx
+            for participant in match_participants(match):
+                busy[id(participant)] = busy.get(id(participant), 0) | 1 << slot_idx
+        
+        # Knockout matches that now start too soon give up their cell and are placed again
+        for successor in successors.get(match_idx, ()):
+            successor_slot = match_slots[successor]
+            if successor_slot >= 0 and (target is None or successor_slot < target[1] + gap):
+                successor_court = int(np.flatnonzero(cells[:, successor_slot] == successor)[0])
+                for participant in match_participants(grid.matches[successor]):
+                    busy[id(participant)] &= ~(1 << int(successor_slot))
+                cells[successor_court, successor_slot] = FREE
+                free[successor_court, successor_slot] = True
+                match_slots[successor] = -1
+                origins[successor] = (successor_court, int(successor_slot))
+                heapq.heappush(queue, queue_entry(grid.matches[successor], successor, category_priority))
+        
+        origin_court, origin_slot = origins[match_idx]
+        moves.append({
+            'match': match,
+            'from_court': origin_court + 1,
+            'from_time': grid.time_slots[origin_slot],
+            'to_court': target[0] + 1 if target else None,
+            'to_time': grid.time_slots[target[1]] if target else None
+        })
+    
+    return repaired, moves
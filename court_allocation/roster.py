@@ -0,0 +1,261 @@
+"""Roster import: teams built from registered players and their declared partners"""
+
+import os
+import time
+
+import numpy as np
+
+from .generation import assign_groups, iter_category_matches
+from .instrumentation import notify_stage, stage_seconds, time_stage
+from .knockout import create_knockout_stage
+from .models import Player, Team
+
+# Rows read, validated and paired per batch while a roster streams in
+ROSTER_CHUNK_ROWS = 10000
+
+# Problems listed in a roster error message
+MAX_ROSTER_ERRORS = 20
+
+# One row per player registration; rows sharing a category and team form a team
+ROSTER_COLUMNS = ['category', 'team', 'name', 'gender', 'skill_level', 'age_bracket']
+
+GENDERS = {'M': 'M', 'MALE': 'M', 'MAN': 'M', 'F': 'F', 'FEMALE': 'F', 'W': 'F', 'WOMAN': 'F'}
+SKILL_LEVELS = ['Amateur', 'Advanced']
+AGE_BRACKETS = ['Junior', 'Adult', '35+']
+
+# Skill levels, age brackets and genders a category accepts, None for any
+CATEGORY_RULES = {
+    "Men's Doubles": (['Advanced'], ['Adult', '35+'], ['M']),
+    "Mixed Doubles": (['Advanced'], ['Adult', '35+'], None),
+    "Amateur": (['Amateur'], ['Adult', '35+'], None),
+    "35+": (['Advanced'], ['35+'], None),
+    "Open": (['Advanced'], ['Adult', '35+'], None),
+    "Parent-Child": (None, None, None)
+}
+CATEGORY_NAMES = {category.lower(): category for category in CATEGORY_RULES}
+
+def roster_fingerprint(path):
+    """Cache key for a roster file that changes whenever the file does"""
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+def read_excel_chunks(source, chunk_rows):
+    """Yield the first sheet of an XLSX workbook as DataFrames, streaming its rows"""
+    import pandas as pd
+    from openpyxl import load_workbook
+    
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = ['' if value is None else str(value) for value in next(rows, ())]
+        width = len(header)
+        batch = []
+        for row in rows:
+            row = ['' if value is None else str(value) for value in row[:width]]
+            batch.append(row + [''] * (width - len(row)))
+            if len(batch) == chunk_rows:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        workbook.close()
+
+def read_roster_chunks(source, chunk_rows=ROSTER_CHUNK_ROWS):
+    """Yield a CSV or XLSX roster as DataFrames of at most chunk_rows string rows"""
+    import pandas as pd
+    
+    if str(getattr(source, 'name', source)).lower().endswith(('.xlsx', '.xlsm')):
+        yield from read_excel_chunks(source, chunk_rows)
+        return
+    with pd.read_csv(source, dtype=str, keep_default_na=False, chunksize=chunk_rows) as reader:
+        yield from reader
+
+def validate_roster_chunk(chunk, first_row):
+    """Normalize one chunk of roster rows and find the invalid ones in bulk
+    
+    Returns the normalized columns of the valid rows, their row numbers, up to
+    MAX_ROSTER_ERRORS (row number, problem) pairs per check and the number of
+    invalid rows.
+    """
+    chunk.columns = [str(column).strip().lower().replace(' ', '_') for column in chunk.columns]
+    missing = [column for column in ROSTER_COLUMNS if column not in chunk.columns]
+    if missing:
+        raise ValueError(f"Roster is missing the column(s): {', '.join(missing)}")
+    
+    values = {column: chunk[column].astype(str).str.strip() for column in ROSTER_COLUMNS}
+    category = values['category'].str.lower().map(CATEGORY_NAMES)
+    gender = values['gender'].str.upper().map(GENDERS)
+    skill = values['skill_level'].str.title()
+    age = values['age_bracket'].str.title()
+    
+    valid_skill = skill.isin(SKILL_LEVELS)
+    valid_age = age.isin(AGE_BRACKETS)
+    problems = [
+        (values['name'] == '', "missing name"),
+        (values['team'] == '', "missing team"),
+        (category.isna(), "unknown category"),
+        (gender.isna(), "unknown gender"),
+        (~valid_skill, "unknown skill level"),
+        (~valid_age, "unknown age bracket")
+    ]
+    for name, (skills, ages, genders) in CATEGORY_RULES.items():
+        in_category = category == name
+        if skills:
+            problems.append((in_category & valid_skill & ~skill.isin(skills), f"{name} is for {' or '.join(skills)} players"))
+        if ages:
+            problems.append((in_category & valid_age & ~age.isin(ages), f"{name} is for age bracket {' or '.join(ages)}"))
+        if genders:
+            problems.append((in_category & gender.notna() & ~gender.isin(genders), f"{name} is for {' or '.join(genders)} players"))
+    
+    invalid = np.zeros(len(chunk), dtype=bool)
+    errors = []
+    for mask, problem in problems:
+        mask = mask.to_numpy()
+        invalid |= mask
+        errors.extend((first_row + int(idx), problem) for idx in np.flatnonzero(mask)[:MAX_ROSTER_ERRORS])
+    
+    valid = ~invalid
+    columns = {
+        'category': category[valid].tolist(),
+        'team': values['team'][valid].tolist(),
+        'name': values['name'][valid].tolist(),
+        'gender': gender[valid].tolist(),
+        'skill_level': skill[valid].tolist(),
+        'age_bracket': age[valid].tolist()
+    }
+    return columns, (np.flatnonzero(valid) + first_row).tolist(), errors, int(invalid.sum())
+
+def check_pair(category, players):
+    """Problem with a complete two-player team, or None when it may enter the category"""
+    if category == "Mixed Doubles" and sorted(player.gender for player in players) != ['F', 'M']:
+        return "Mixed Doubles teams need one man and one woman"
+    if category == "Parent-Child" and sorted(player.age_bracket == 'Junior' for player in players) != [False, True]:
+        return "Parent-Child teams need one Junior and one adult"
+    return None
+
+def load_roster(source, categories=None):
+    """Stream a roster file into teams, validating every row
+    
+    Each row registers one player (identified by name) for one category and
+    team; the two rows sharing a category and team name become a Team. A player
+    may enter several categories and is the same Player object in all of them,
+    so the scheduler keeps them off two courts at once. Rows are read
+    ROSTER_CHUNK_ROWS at a time and only incomplete teams are held between
+    chunks. Only categories in categories are kept when it is given.
+    
+    Returns (teams by category, player distribution) and raises ValueError
+    listing the first MAX_ROSTER_ERRORS problems when any row is invalid.
+    """
+    players = {}
+    pending = {}
+    completed = set()
+    all_teams = {}
+    errors = []
+    error_count = 0
+    distribution = {'Total': 0, 'Amateur': 0, 'Advanced Men': 0, 'Advanced Women': 0, '35+ Players': 0}
+    
+    def add_error(row_number, problem):
+        # Every problem is counted, only the first MAX_ROSTER_ERRORS are kept
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < MAX_ROSTER_ERRORS:
+            errors.append((row_number, problem))
+    
+    first_row = 2  # Row numbers as shown in a spreadsheet, below the header
+    for chunk in read_roster_chunks(source):
+        columns, row_numbers, chunk_errors, invalid_rows = validate_roster_chunk(chunk, first_row)
+        first_row += len(chunk)
+        error_count += invalid_rows
+        errors.extend(sorted(chunk_errors)[:MAX_ROSTER_ERRORS - len(errors)])
+        
+        for row_number, category, team_name, name, gender, skill_level, age_bracket in zip(
+            row_numbers, columns['category'], columns['team'], columns['name'],
+            columns['gender'], columns['skill_level'], columns['age_bracket']
+        ):
+            if categories is not None and category not in categories:
+                continue
+            
+            player = players.get(name)
+            if player is None:
+                player = players[name] = Player(name, gender, skill_level, age_bracket)
+                distribution['Total'] += 1
+                if skill_level == 'Amateur':
+                    distribution['Amateur'] += 1
+                else:
+                    distribution['Advanced Men' if gender == 'M' else 'Advanced Women'] += 1
+                    if age_bracket == '35+':
+                        distribution['35+ Players'] += 1
+            elif (player.gender, player.skill_level, player.age_bracket) != (gender, skill_level, age_bracket):
+                add_error(row_number, f"{name} is registered with different gender, skill level or age bracket")
+                continue
+            
+            key = (category, team_name)
+            if key in completed:
+                add_error(row_number, f"{category} team {team_name} already has two players")
+                continue
+            
+            members = pending.pop(key, None)
+            if members is None:
+                pending[key] = (row_number, player)
+                continue
+            
+            team_players = [members[1], player]
+            problem = check_pair(category, team_players)
+            if problem:
+                add_error(row_number, problem)
+                continue
+            
+            completed.add(key)
+            teams = all_teams.setdefault(category, [])
+            teams.append(Team(len(teams) + 1, category, team_players))
+    
+    # A missing partner is only worth reporting once every row is valid
+    if not error_count:
+        for (category, team_name), (row_number, _) in pending.items():
+            add_error(row_number, f"{category} team {team_name} has no partner")
+    
+    if error_count:
+        errors.sort(key=lambda error: error[0])
+        lines = [f"Row {row_number}: {problem}" for row_number, problem in errors[:MAX_ROSTER_ERRORS]]
+        if error_count > len(lines):
+            lines.append(f"... and {error_count - len(lines)} more")
+        raise ValueError(f"Roster has {error_count} invalid row(s):\n" + "\n".join(lines))
+    
+    distribution['Parent-Child Teams'] = len(all_teams.get("Parent-Child", ()))
+    return all_teams, distribution
+
+def count_roster_teams(source):
+    """Number of teams per category in a roster file"""
+    all_teams, _ = load_roster(source)
+    return {category: len(teams) for category, teams in all_teams.items()}
+
+def calculate_roster_groups_and_matches(source, enabled_categories, teams_per_group_settings, qualifying_teams):
+    """calculate_groups_and_matches for the teams declared in a roster file"""
+    with time_stage('roster'):
+        all_teams, distribution = load_roster(source, set(enabled_categories))
+    all_matches = []
+    group_info = {'Player Distribution': distribution, 'Total Matches': 0, 'Knockout Matches': 0}
+    
+    notify_stage('matches')
+    start = time.perf_counter()
+    for category in enabled_categories:
+        teams = all_teams.get(category)
+        group_info[f'{category} Groups'] = 0
+        if not teams:
+            all_teams.pop(category, None)
+            continue
+        
+        groups = assign_groups(teams, teams_per_group_settings[category])
+        group_info[f'{category} Groups'] = len(groups)
+        # Kept as a list for the bracket, which walks the group matches again to set their dependents
+        category_matches = list(iter_category_matches(groups))
+        knockout_matches = create_knockout_stage(category, groups, category_matches, qualifying_teams)
+        all_matches.extend(category_matches)
+        all_matches.extend(knockout_matches)
+        group_info['Knockout Matches'] += len(knockout_matches)
+    
+    stage_seconds.observe(time.perf_counter() - start, 'matches')
+    group_info['Total Matches'] = len(all_matches)
+    
+    return all_matches, all_teams, group_info
@@ -0,0 +1,264 @@
+"""Assignment of matches to courts and time slots"""
+
+import heapq
+import logging
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from .grid import CourtGrid
+from .instrumentation import log_event, matches_scheduled, notify_stage, matches_unscheduled, scheduling_rate, stage_seconds
+
+logger = logging.getLogger(__name__)
+
+def queue_entry(match, seq, category_priority, keep_categories_separate=False):
+    """Heap entry ordering a match by (category priority, longest remaining chain, round, group)
+    
+    Matches with the longest chain of matches still to follow them, up to their
+    category's final, go first. Within a group that is the earliest round, so a
+    slot takes the current round of every group before any team's next round,
+    which spreads each team's matches out.
+    """
+    # The sequence number keeps ties in their original order and avoids comparing Match objects
+    entry = (-match.critical_path, match.round_num, match.group_id, seq, match)
+    if keep_categories_separate:
+        return entry
+    return (category_priority.get(match.category, 999),) + entry
+
+def build_match_queues(matches, categories, category_priority=None, keep_categories_separate=False, waiting=()):
+    """Build heap-ordered queues of matches, one per category or a single mixed one
+    
+    Matches whose index is in waiting are left out, to be pushed once their
+    prerequisites have been played.
+    """
+    category_priority = category_priority or {}
+    
+    if keep_categories_separate:
+        queues = {category: [] for category in categories}
+        for seq, match in enumerate(matches):
+            if seq not in waiting:
+                queues[match.category].append(queue_entry(match, seq, category_priority, True))
+        queues = [queues[category] for category in categories]
+    else:
+        queues = [[queue_entry(match, seq, category_priority) for seq, match in enumerate(matches) if seq not in waiting]]
+    
+    for queue in queues:
+        heapq.heapify(queue)
+    
+    return queues
+
+def prerequisite_counts(matches):
+    """Number of prerequisites of every match that has any, by index in matches, and those indices by match id
+    
+    A match's prerequisites are the matches listing it in their dependents; ones
+    that are not in matches are treated as already played. All matches of a
+    group share one dependents tuple, so they are counted per distinct tuple.
+    """
+    edges = Counter(match.dependents for match in matches)
+    dependent_ids = {id(dependent) for dependents in edges for dependent in dependents}
+    if not dependent_ids:
+        return {}, {}
+    
+    position = {id(match): seq for seq, match in enumerate(matches) if id(match) in dependent_ids}
+    waiting = {}
+    for dependents, count in edges.items():
+        for dependent in dependents:
+            seq = position.get(id(dependent))
+            if seq is not None:
+                waiting[seq] = waiting.get(seq, 0) + count
+    return waiting, position
+
+def match_dependencies(matches):
+    """Prerequisite and successor indices of the matches that have any, keyed by index in matches"""
+    prerequisites = {}
+    successors = {}
+    _, position = prerequisite_counts(matches)
+    if not position:
+        return prerequisites, successors
+    
+    shared = {}
+    for seq, match in enumerate(matches):
+        if match.dependents:
+            dependent_seqs = shared.get(id(match.dependents))
+            if dependent_seqs is None:
+                dependent_seqs = shared[id(match.dependents)] = [position[id(dependent)] for dependent in match.dependents
+                                                                 if id(dependent) in position]
+            if dependent_seqs:
+                successors[seq] = dependent_seqs
+                for dependent_seq in dependent_seqs:
+                    prerequisites.setdefault(dependent_seq, []).append(seq)
+    return prerequisites, successors
+
+def slot_window(slot_idx, min_rest_slots=0):
+    """Bitmask of the slots a team must be free in to play at slot_idx"""
+    low = max(0, slot_idx - min_rest_slots)
+    high = slot_idx + min_rest_slots
+    return ((1 << (high - low + 1)) - 1) << low
+
+def match_participants(match):
+    """Teams and players taking part in a match"""
+    for team in (match.team1, match.team2):
+        if team is not None:
+            yield team
+            yield from team.players
+
+def has_slot_conflict(match, window):
+    """Check whether a team or player of the match is already busy within the window"""
+    return any(participant.busy_slots & window for participant in match_participants(match))
+
+def mark_slot_busy(match, slot_idx):
+    """Record the match's slot in the bitsets of its teams and players"""
+    slot_bit = 1 << slot_idx
+    for participant in match_participants(match):
+        participant.busy_slots |= slot_bit
+
+def normalize_time(time_str):
+    """Canonical HH:MM form of a time string"""
+    return datetime.strptime(str(time_str).strip(), "%H:%M").strftime("%H:%M")
+
+def create_time_slots(start_time, end_time, match_duration, event_date=None):
+    """Start times of every match slot between start_time and end_time (HH:MM) on event_date (default: today)"""
+    if match_duration <= 0:
+        raise ValueError("Match duration must be a positive number of minutes.")
+    current_date = event_date or datetime.now().date()
+    current = datetime.combine(current_date, datetime.strptime(start_time, "%H:%M").time())
+    end_time = datetime.combine(current_date, datetime.strptime(end_time, "%H:%M").time())
+    match_duration_delta = timedelta(minutes=match_duration)
+    
+    time_slots = []
+    while current + match_duration_delta <= end_time:
+        time_slots.append(current)
+        current += match_duration_delta
+    
+    return time_slots
+
+def schedule_matches(matches, start_time, end_time, match_duration, courts_available, keep_categories_separate=False, category_priority=None, min_rest_slots=0):
+    """Schedule matches across available courts and time slots"""
+    if not matches:
+        return []
+    
+    grid = build_schedule_grid(matches, start_time, end_time, match_duration, courts_available,
+                               keep_categories_separate, category_priority, min_rest_slots)
+    return grid.scheduled_matches()
+
+def build_schedule_grid(matches, start_time, end_time, match_duration, courts_available, keep_categories_separate=False, category_priority=None, min_rest_slots=0, event_date=None):
+    """Schedule matches into a court x time slot grid for one day (default: today)"""
+    notify_stage('scheduling')
+    start = time.perf_counter()
+    
+    # Reset placements and availability from any previous scheduling run
+    for match in matches:
+        match.court = None
+        match.start_time = None
+        for participant in match_participants(match):
+            participant.busy_slots = 0
+    
+    # Create time slots for the day and the court occupancy grid
+    time_slots = create_time_slots(start_time, end_time, match_duration, event_date)
+    grid = CourtGrid(matches, time_slots, courts_available, match_duration)
+    
+    # Get unique categories and sort by priority (lower number = higher priority)
+    categories = sorted(set(match.category for match in matches))
+    if category_priority:
+        priority_map = {cat: priority for cat, priority in category_priority.items()}
+        categories.sort(key=lambda x: priority_map.get(x, 999))  # Lower numbers first
+    
+    # Knockout matches wait until every match they depend on has been placed, and
+    # are then released into their queue at the first slot after those finish
+    waiting, position = prerequisite_counts(matches)
+    ready_slots = dict.fromkeys(waiting, 0)
+    released = {}
+    
+    # One queue per category when categories are kept separate, otherwise a single
+    # queue ordered by (priority, critical path, round, group). Each placement is a heap pop,
+    # so the whole pass is O(M log M) instead of re-sorting the unscheduled matches every slot.
+    queues = build_match_queues(matches, categories, category_priority, keep_categories_separate, waiting)
+    queue_index = {category: i for i, category in enumerate(categories)} if keep_categories_separate else {}
+    
+    for slot_idx, time_slot in enumerate(time_slots):
+        for seq in released.pop(slot_idx, ()):
+            match = matches[seq]
+            heapq.heappush(queues[queue_index.get(match.category, 0)],
+                           queue_entry(match, seq, category_priority or {}, keep_categories_separate))
+        
+        active = [queue for queue in queues if queue]
+        if not active:
+            if released:
+                continue
+            break
+        
+        # A team (or player) already playing within the rest window is skipped
+        # for this slot with a single AND against its bitset
+        window = slot_window(slot_idx, min_rest_slots)
+        
+        court = 1
+        for queue in active:
+            deferred = []
+            
+            # Fill the remaining courts from the highest priority queue first
+            while queue and court <= courts_available:
+                entry = heapq.heappop(queue)
+                match = entry[-1]
+                if has_slot_conflict(match, window):
+                    deferred.append(entry)
+                    continue
+                
+                match.start_time = time_slot
+                match.court = court
+                grid.place(entry[-2], court, slot_idx)
+                mark_slot_busy(match, slot_idx)
+                court += 1
+                
+                # The winners need the same rest before their next match as any team
+                for dependent in match.dependents:
+                    successor = position.get(id(dependent))
+                    if successor is None:
+                        continue
+                    waiting[successor] -= 1
+                    ready_slots[successor] = max(ready_slots[successor], slot_idx + 1 + min_rest_slots)
+                    if not waiting[successor]:
+                        released.setdefault(ready_slots[successor], []).append(successor)
+            
+            # Skipped matches go back in the queue for the next slot
+            for entry in deferred:
+                heapq.heappush(queue, entry)
+            
+            if court > courts_available:
+                break
+    
+    record_schedule(grid, time.perf_counter() - start)
+    return grid
+
+def record_schedule(grid, elapsed):
+    """Record a newly built schedule's metrics and log events"""
+    # Whatever is still queued or waiting did not fit, reported in original order
+    unscheduled_matches = [match for match in grid.matches if match.start_time is None]
+    
+    stage_seconds.observe(elapsed, 'scheduling')
+    if elapsed > 0:
+        scheduling_rate.set(len(grid.matches) / elapsed)
+    
+    scheduled_counts = np.bincount(grid.match_categories[grid.scheduled_indices()], minlength=len(grid.categories))
+    for category, count in zip(grid.categories, scheduled_counts.tolist()):
+        matches_scheduled.inc(category, amount=count)
+    unscheduled_counts = Counter(match.category for match in unscheduled_matches)
+    for category, count in unscheduled_counts.items():
+        matches_unscheduled.inc(category, amount=count)
+    
+    log_event(
+        logger, logging.INFO, "schedule_built",
+        matches=len(grid.matches),
+        scheduled=grid.used_slots,
+        unscheduled=len(unscheduled_matches),
+        courts=grid.courts_available,
+        time_slots=len(grid.time_slots),
+        utilization=round(grid.utilization(), 1),
+        seconds=round(elapsed, 4)
+    )
+    if unscheduled_matches:
+        # One summary event; the individual matches only at debug level
+        log_event(logger, logging.WARNING, "matches_unscheduled", count=len(unscheduled_matches), categories=dict(unscheduled_counts))
+        for match in unscheduled_matches:
+            log_event(logger, logging.DEBUG, "match_unscheduled", category=match.category, group_id=match.group_id, round_num=match.round_num)
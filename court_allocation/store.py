@@ -0,0 +1,430 @@
+"""SQLite store of generated schedules for match lookups and edits on the day"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import weakref
+from datetime import datetime, timedelta
+
+from .grid import MatchTable
+from .scheduling import normalize_time
+
+# Database file used when none is given; mount its directory as a volume to keep schedules across restarts
+DEFAULT_STORE_PATH = os.environ.get("SCHEDULE_STORE", os.path.join("data", "schedules.sqlite3"))
+
+# Schedules kept in the store; older ones are deleted as new ones are saved
+MAX_STORED_SCHEDULES = 50
+
+# Most matches a single lookup returns
+MAX_LOOKUP_MATCHES = 500
+
+# Most change log entries read at once
+MAX_CHANGES_READ = 1000
+
+# Progress of a match on the day; a finished or cancelled match frees its court
+MATCH_STATUSES = ('scheduled', 'in_progress', 'finished', 'cancelled')
+
+# Stored times sort as text, so range queries on the indexes compare strings
+TIME_FORMAT = "%Y-%m-%d %H:%M"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS schedules (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    settings TEXT NOT NULL,
+    saved_at TEXT NOT NULL,
+    event_date TEXT NOT NULL,
+    match_duration INTEGER NOT NULL,
+    courts INTEGER NOT NULL,
+    court_names TEXT NOT NULL DEFAULT '[]',
+    scheduled_matches INTEGER NOT NULL,
+    unscheduled_matches INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS matches (
+    schedule_id INTEGER NOT NULL,
+    match_id INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    group_id INTEGER NOT NULL,
+    round_num INTEGER NOT NULL,
+    stage TEXT,
+    team1 INTEGER,
+    team2 INTEGER,
+    seed1 TEXT,
+    seed2 TEXT,
+    court INTEGER,
+    court_name TEXT,
+    start_time TEXT,
+    end_time TEXT,
+    score TEXT,
+    status TEXT NOT NULL DEFAULT 'scheduled',
+    PRIMARY KEY (schedule_id, match_id)
+);
+CREATE TABLE IF NOT EXISTS team_matches (
+    schedule_id INTEGER NOT NULL,
+    team_id INTEGER NOT NULL,
+    start_time TEXT NOT NULL,
+    match_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS match_changes (
+    id INTEGER PRIMARY KEY,
+    schedule_id INTEGER NOT NULL,
+    match_id INTEGER,
+    changed_at TEXT NOT NULL,
+    change TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS matches_by_court ON matches (schedule_id, court, start_time);
+CREATE INDEX IF NOT EXISTS matches_by_time ON matches (schedule_id, start_time, court);
+CREATE INDEX IF NOT EXISTS matches_by_group ON matches (schedule_id, category, group_id);
+CREATE INDEX IF NOT EXISTS team_matches_by_time ON team_matches (schedule_id, team_id, start_time);
+CREATE INDEX IF NOT EXISTS match_changes_by_schedule ON match_changes (schedule_id, id);
+"""
+
+# Columns added since a table was first created, added to older databases when they are opened
+MIGRATIONS = [
+    ('matches', 'score', "TEXT"),
+    ('matches', 'status', "TEXT NOT NULL DEFAULT 'scheduled'"),
+    ('matches', 'court_name', "TEXT"),
+    ('schedules', 'court_names', "TEXT NOT NULL DEFAULT '[]'")
+]
+
+# Match columns written when a schedule is saved
+MATCH_COLUMNS = ('category', 'group_id', 'round_num', 'stage', 'team1', 'team2', 'seed1', 'seed2', 'court', 'court_name', 'start_time', 'end_time')
+
+# Columns of a looked-up match, in result order
+RESULT_COLUMNS = ('match_id',) + MATCH_COLUMNS + ('score', 'status')
+
+def schedule_key(settings):
+    """Stable key for a dict of generate_tournament arguments; a roster counts by its contents, not its upload path"""
+    settings = dict(settings)
+    if settings.get('roster'):
+        with open(settings['roster'], 'rb') as roster_file:
+            settings['roster'] = hashlib.sha1(roster_file.read()).hexdigest()
+    return hashlib.sha1(json.dumps(settings, sort_keys=True, default=str).encode()).hexdigest()
+
+class ScheduleStore:
+    """Generated schedules in a SQLite database, indexed for court, team, group and time lookups
+    
+    Saving the same settings again replaces that schedule, so a schedule id
+    stays valid for as long as its settings are in use. Each thread, and each
+    worker process, opens its own connection; WAL mode lets lookups read while
+    another process saves.
+    """
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self.local = threading.local()
+        self.pid = None
+        # Grids already saved by this process, so serving a cached schedule again doesn't rewrite it
+        self.saved = weakref.WeakKeyDictionary()
+    
+    def connect(self):
+        """This thread's connection, opened and initialized on first use"""
+        if self.pid != os.getpid():
+            # A forked process must not share its parent's connections
+            self.local = threading.local()
+            self.saved = weakref.WeakKeyDictionary()
+            self.pid = os.getpid()
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            # ANALYZE samples this many index rows, keeping it cheap however many schedules are stored
+            connection.execute("PRAGMA analysis_limit=1000")
+            connection.executescript(SCHEMA)
+            for table, column, definition in MIGRATIONS:
+                if column not in [row['name'] for row in connection.execute(f"PRAGMA table_info({table})")]:
+                    connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            self.local.connection = connection
+        return connection
+    
+    def save_schedule(self, grid, settings):
+        """Store a schedule generated from a dict of generate_tournament arguments, returning its id"""
+        connection = self.connect()
+        saved_at = datetime.now().isoformat(timespec='seconds')
+        schedule_id = self.saved.get(grid)
+        if schedule_id is not None:
+            # Mark it as the latest again; the contents are unchanged
+            with connection:
+                updated = connection.execute("UPDATE schedules SET saved_at = ? WHERE id = ?", (saved_at, schedule_id)).rowcount
+            if updated:
+                return schedule_id
+        
+        table = MatchTable(grid.matches, grid)
+        match_duration = timedelta(minutes=grid.match_duration)
+        start_times = [slot.strftime(TIME_FORMAT) for slot in grid.time_slots]
+        end_times = [(slot + match_duration).strftime(TIME_FORMAT) for slot in grid.time_slots]
+        court_names = [grid.court_name(court) for court in range(1, grid.courts_available + 1)]
+        scheduled = int((table.slot >= 0).sum())
+        
+        match_rows = []
+        team_rows = []
+        columns = (table.category, table.group_id, table.round_num, table.team1, table.team2, table.court, table.slot)
+        for match_id, (category, group_id, round_num, team1, team2, court, slot) in enumerate(zip(*(column.tolist() for column in columns))):
+            match = grid.matches[match_id]
+            category = table.categories[category]
+            seeds = match.seeds or (None, None)
+            start_time = start_times[slot] if slot >= 0 else None
+            end_time = end_times[slot] if slot >= 0 else None
+            if end_time is not None and grid.durations is not None:
+                end_time = (grid.time_slots[slot] + timedelta(minutes=grid.duration(match_id))).strftime(TIME_FORMAT)
+            match_rows.append((
+                match_id, category, group_id, round_num, match.stage,
+                team1 if team1 >= 0 else None, team2 if team2 >= 0 else None, seeds[0], seeds[1],
+                court if court > 0 else None, court_names[court - 1] if court > 0 else None, start_time, end_time
+            ))
+            # Only scheduled matches between known teams can be looked up by team
+            if start_time is not None:
+                for team_id in (team1, team2):
+                    if team_id >= 0:
+                        team_rows.append((team_id, start_time, match_id))
+        
+        stored_settings = dict(settings)
+        if stored_settings.get('roster'):
+            stored_settings['roster'] = os.path.basename(str(stored_settings['roster']))
+        
+        with connection:
+            key = schedule_key(settings)
+            row = connection.execute("SELECT id FROM schedules WHERE key = ?", (key,)).fetchone()
+            replaced = row is not None
+            if replaced:
+                schedule_id = row['id']
+                # A schedule already edited on the day is never overwritten, its edits would be lost
+                if connection.execute("SELECT 1 FROM match_changes WHERE schedule_id = ? AND match_id IS NOT NULL LIMIT 1",
+                                      (schedule_id,)).fetchone():
+                    connection.execute("UPDATE schedules SET saved_at = ? WHERE id = ?", (saved_at, schedule_id))
+                    self.saved[grid] = schedule_id
+                    return schedule_id
+                delete_schedule(connection, schedule_id)
+            schedule_id = connection.execute(
+                "INSERT INTO schedules (id, key, settings, saved_at, event_date, match_duration, courts, court_names, scheduled_matches, unscheduled_matches) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (schedule_id, key, json.dumps(stored_settings, default=str), saved_at,
+                 grid.time_slots[0].strftime("%Y-%m-%d") if grid.time_slots else saved_at[:10],
+                 grid.match_duration, grid.courts_available, json.dumps(court_names), scheduled, len(grid.matches) - scheduled)
+            ).lastrowid
+            connection.executemany(
+                f"INSERT INTO matches (schedule_id, match_id, {', '.join(MATCH_COLUMNS)}) VALUES ({schedule_id}, ?{', ?' * len(MATCH_COLUMNS)})",
+                match_rows
+            )
+            connection.executemany(
+                f"INSERT INTO team_matches (schedule_id, team_id, start_time, match_id) VALUES ({schedule_id}, ?, ?, ?)",
+                team_rows
+            )
+            if replaced:
+                # Live viewers of the old version reload the whole board
+                append_change(connection, schedule_id, None, {'reset': True})
+            self.prune(connection)
+            # Fresh statistics let the planner pick the group index over the time index for group lookups
+            connection.execute("ANALYZE")
+        
+        self.saved[grid] = schedule_id
+        return schedule_id
+    
+    def prune(self, connection):
+        """Delete all but the MAX_STORED_SCHEDULES most recently saved schedules"""
+        stale = [row['id'] for row in connection.execute(
+            "SELECT id FROM schedules ORDER BY saved_at DESC, id DESC LIMIT -1 OFFSET ?", (MAX_STORED_SCHEDULES,)
+        )]
+        for schedule_id in stale:
+            delete_schedule(connection, schedule_id)
+            connection.execute("DELETE FROM match_changes WHERE schedule_id = ?", (schedule_id,))
+    
+    def list_schedules(self, limit=MAX_STORED_SCHEDULES):
+        """Stored schedules, most recently saved first"""
+        rows = self.connect().execute(
+            "SELECT id, settings, saved_at, event_date, match_duration, courts, scheduled_matches, unscheduled_matches "
+            "FROM schedules ORDER BY saved_at DESC, id DESC LIMIT ?", (limit,)
+        )
+        return [dict(row, settings=json.loads(row['settings'])) for row in rows]
+    
+    def get_schedule(self, schedule_id=None):
+        """A stored schedule's summary by id, or the most recently saved one; None when there is none"""
+        query = "SELECT id, saved_at, event_date, match_duration, courts, scheduled_matches, unscheduled_matches FROM schedules "
+        if schedule_id is None:
+            row = self.connect().execute(query + "ORDER BY saved_at DESC, id DESC LIMIT 1").fetchone()
+        else:
+            row = self.connect().execute(query + "WHERE id = ?", (schedule_id,)).fetchone()
+        return dict(row) if row else None
+    
+    def find_matches(self, schedule_id, court=None, team_id=None, category=None, group_id=None, after=None, before=None, limit=MAX_LOOKUP_MATCHES):
+        """Scheduled matches of a stored schedule that pass every given filter, in start time then court order
+        
+        after and before bound the start time, before exclusive, as HH:MM on the
+        schedule's day or as "YYYY-MM-DD HH:MM". A team is identified by its id
+        within a category, so team_id is usually combined with category.
+        Each filter combination is answered from one of the store's indexes.
+        """
+        schedule = self.get_schedule(schedule_id)
+        if schedule is None:
+            return []
+        
+        query, params = build_lookup(schedule, court, team_id, category, group_id, after, before)
+        rows = self.connect().execute(query + " LIMIT ?", params + [min(int(limit), MAX_LOOKUP_MATCHES)])
+        return [dict(row) for row in rows]
+    
+    def iter_matches(self, schedule_id, category=None, team_id=None):
+        """Every scheduled match of a stored schedule, or of one team, in start time then court order
+        
+        Rows are streamed from a cursor rather than fetched at once. The cursor
+        has a connection of its own, because a streaming response may resume
+        the generator from a different thread each time.
+        """
+        schedule = self.get_schedule(schedule_id)
+        if schedule is None:
+            return
+        query, params = build_lookup(schedule, team_id=team_id, category=category)
+        connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        try:
+            for row in connection.execute(query, params):
+                yield dict(row)
+        finally:
+            connection.close()
+    
+    def get_match(self, schedule_id, match_id):
+        """One stored match as a lookup result, or None"""
+        row = self.connect().execute(
+            f"SELECT {', '.join(RESULT_COLUMNS)} FROM matches WHERE schedule_id = ? AND match_id = ?", (schedule_id, match_id)
+        ).fetchone()
+        return dict(row) if row else None
+    
+    def update_match(self, schedule_id, match_id, score=None, status=None, court=None, start_time=None):
+        """Record a score, a status or a move to another court or start time, returning the updated match
+        
+        Only the given fields change. start_time is HH:MM on the schedule's day
+        or "YYYY-MM-DD HH:MM"; a move is refused with ValueError when it would
+        overlap another match on the court that is still to be played. Every
+        update is appended to the schedule's change log as the match's new row.
+        Raises KeyError for an unknown schedule or match.
+        """
+        connection = self.connect()
+        with connection:
+            schedule = connection.execute("SELECT event_date, match_duration, courts, court_names FROM schedules WHERE id = ?", (schedule_id,)).fetchone()
+            if schedule is None:
+                raise KeyError(f"Unknown schedule {schedule_id}")
+            match = self.get_match(schedule_id, match_id)
+            if match is None:
+                raise KeyError(f"Unknown match {match_id}")
+            
+            updates = {}
+            if score is not None:
+                updates['score'] = str(score).strip() or None
+            if status is not None:
+                if status not in MATCH_STATUSES:
+                    raise ValueError(f"Status must be one of {', '.join(MATCH_STATUSES)}")
+                updates['status'] = status
+            if court is not None or start_time is not None:
+                court = int(court) if court is not None else match['court']
+                if court is None or start_time is None and match['start_time'] is None:
+                    raise ValueError("An unscheduled match needs both a court and a start time")
+                if not 1 <= court <= schedule['courts']:
+                    raise ValueError(f"Court must be between 1 and {schedule['courts']}")
+                start = resolve_time(start_time, schedule['event_date']) if start_time is not None else match['start_time']
+                # A moved match keeps its length, which depends on its category when categories differ
+                minutes = schedule['match_duration']
+                if match['start_time'] is not None:
+                    minutes = (datetime.strptime(match['end_time'], TIME_FORMAT) - datetime.strptime(match['start_time'], TIME_FORMAT)).seconds // 60
+                end = (datetime.strptime(start, TIME_FORMAT) + timedelta(minutes=minutes)).strftime(TIME_FORMAT)
+                clash = connection.execute(
+                    "SELECT match_id FROM matches WHERE schedule_id = ? AND court = ? AND start_time < ? AND end_time > ? "
+                    "AND match_id != ? AND status NOT IN ('finished', 'cancelled') LIMIT 1",
+                    (schedule_id, court, end, start, match_id)
+                ).fetchone()
+                if clash:
+                    raise ValueError(f"Court {court} already has match {clash['match_id']} at that time")
+                court_names = json.loads(schedule['court_names'])
+                court_name = court_names[court - 1] if court <= len(court_names) else None
+                updates.update(court=court, court_name=court_name, start_time=start, end_time=end)
+                
+                # Keep the team lookup index in step with the match
+                teams = [team_id for team_id in (match['team1'], match['team2']) if team_id is not None]
+                connection.executemany("DELETE FROM team_matches WHERE schedule_id = ? AND team_id = ? AND match_id = ?",
+                                       [(schedule_id, team_id, match_id) for team_id in teams])
+                connection.executemany("INSERT INTO team_matches (schedule_id, team_id, start_time, match_id) VALUES (?, ?, ?, ?)",
+                                       [(schedule_id, team_id, start, match_id) for team_id in teams])
+            if not updates:
+                return match
+            
+            connection.execute(
+                f"UPDATE matches SET {', '.join(f'{column} = ?' for column in updates)} WHERE schedule_id = ? AND match_id = ?",
+                list(updates.values()) + [schedule_id, match_id]
+            )
+            match.update(updates)
+            append_change(connection, schedule_id, match_id, match)
+        return match
+    
+    def changes_since(self, schedule_id, since=0, limit=MAX_CHANGES_READ):
+        """(change id, change) pairs of a schedule's change log after since, oldest first
+        
+        A change is the edited match's new row, or {'reset': True} when the
+        whole schedule was replaced.
+        """
+        rows = self.connect().execute(
+            "SELECT id, change FROM match_changes WHERE schedule_id = ? AND id > ? ORDER BY id LIMIT ?",
+            (schedule_id, int(since or 0), limit)
+        )
+        return [(row['id'], json.loads(row['change'])) for row in rows]
+    
+    def last_change_id(self, schedule_id):
+        """Id of the newest entry in a schedule's change log, 0 when there is none"""
+        row = self.connect().execute("SELECT MAX(id) AS id FROM match_changes WHERE schedule_id = ?", (schedule_id,)).fetchone()
+        return row['id'] or 0
+
+def build_lookup(schedule, court=None, team_id=None, category=None, group_id=None, after=None, before=None):
+    """SQL and parameters selecting a stored schedule's scheduled matches that pass the filters, in time then court order"""
+    conditions = ["m.schedule_id = ?"]
+    params = [schedule['id']]
+    if team_id is not None:
+        source = "team_matches t JOIN matches m ON m.schedule_id = t.schedule_id AND m.match_id = t.match_id"
+        conditions = ["t.schedule_id = ?", "t.team_id = ?"]
+        params.append(int(team_id))
+        time_column = "t.start_time"
+    else:
+        source = "matches m"
+        conditions.append("m.start_time IS NOT NULL")
+        time_column = "m.start_time"
+    if court is not None:
+        conditions.append("m.court = ?")
+        params.append(int(court))
+    if category:
+        conditions.append("m.category = ?")
+        params.append(category)
+    if group_id is not None:
+        conditions.append("m.group_id = ?")
+        params.append(int(group_id))
+    if after:
+        conditions.append(f"{time_column} >= ?")
+        params.append(resolve_time(after, schedule['event_date']))
+    if before:
+        conditions.append(f"{time_column} < ?")
+        params.append(resolve_time(before, schedule['event_date']))
+    
+    query = (f"SELECT {', '.join('m.' + column for column in RESULT_COLUMNS)} FROM {source} "
+             f"WHERE {' AND '.join(conditions)} ORDER BY {time_column}, m.court")
+    return query, params
+
+def delete_schedule(connection, schedule_id):
+    """Delete a schedule and its matches, leaving its change log"""
+    connection.execute("DELETE FROM matches WHERE schedule_id = ?", (schedule_id,))
+    connection.execute("DELETE FROM team_matches WHERE schedule_id = ?", (schedule_id,))
+    connection.execute("DELETE FROM schedules WHERE id = ?", (schedule_id,))
+
+def append_change(connection, schedule_id, match_id, change):
+    """Add an entry to a schedule's change log"""
+    connection.execute(
+        "INSERT INTO match_changes (schedule_id, match_id, changed_at, change) VALUES (?, ?, ?, ?)",
+        (schedule_id, match_id, datetime.now().isoformat(timespec='seconds'), json.dumps(change))
+    )
+
+def resolve_time(value, event_date):
+    """Stored form of an HH:MM time on the event's day, or of a full "YYYY-MM-DD HH:MM" time"""
+    value = str(value).strip()
+    if " " in value:
+        return datetime.strptime(value, TIME_FORMAT).strftime(TIME_FORMAT)
+    return f"{event_date} {normalize_time(value)}"
@@ -0,0 +1,167 @@
+"""Parallel what-if sweeps over courts, match duration and group sizes"""
+
+import itertools
+import logging
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from .tournament import calculate_schedule_statistics, estimate_tournament, generate_tournament
+from .workers import available_cpus, get_process_executor
+
+# Teams per Group settings that can be swept, in UI order
+TEAMS_PER_GROUP_FIELDS = [
+    'mens_doubles_teams',
+    'mixed_doubles_teams',
+    'amateur_teams',
+    'plus_35_teams',
+    'open_teams',
+    'parent_child_teams'
+]
+
+# Per-schedule log events are noise across thousands of sweep configurations
+SWEEP_WORKER_LOG_LEVEL = logging.ERROR
+
+# Upper bound on configurations evaluated by one sweep
+MAX_SWEEP_CONFIGURATIONS = 5000
+
+# Smallest value of each swept setting the UI accepts; a match duration or group size of 0 never finishes scheduling
+SWEEP_MINIMUMS = dict({'courts_available': 1, 'match_duration': 15}, **{field: 3 for field in TEAMS_PER_GROUP_FIELDS})
+
+def parse_int_range(spec, default=None, minimum=None):
+    """Parse "4", "4,6,8", "3-6" or "15-45/15" into a sorted list of integers
+    
+    Raises ValueError for a malformed range, a range longer than
+    MAX_SWEEP_CONFIGURATIONS or a value below minimum.
+    """
+    values = set()
+    for part in str(spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        step = 1
+        if "/" in part:
+            part, step = part.split("/", 1)
+            step = int(step)
+        if "-" in part:
+            first, last = part.split("-", 1)
+            part_values = range(int(first), int(last) + 1, max(1, step))
+            if len(part_values) > MAX_SWEEP_CONFIGURATIONS:
+                raise ValueError(f'Range "{part}" has more than {MAX_SWEEP_CONFIGURATIONS} values.')
+            values.update(part_values)
+        else:
+            values.add(int(part))
+    
+    if minimum is not None and values and min(values) < minimum:
+        raise ValueError(f'Range "{spec}" goes below the minimum of {minimum}.')
+    if not values:
+        return [default] if default is not None else []
+    return sorted(values)
+
+def evaluate_group_settings(base_params, teams_per_group, court_durations):
+    """Schedule every (courts, duration) pair for one set of group sizes
+    
+    Runs in a worker process. Teams and matches only depend on the group sizes,
+    so they are generated once and reused from the cache for each pair.
+    """
+    # Per-schedule log events are only noise here; the worker may serve other requests afterwards
+    package_logger = logging.getLogger("court_allocation")
+    level = package_logger.level
+    package_logger.setLevel(SWEEP_WORKER_LOG_LEVEL)
+    try:
+        return [evaluate_configuration(base_params, teams_per_group, courts_available, match_duration)
+                for courts_available, match_duration in court_durations]
+    finally:
+        package_logger.setLevel(level)
+
+def evaluate_configuration(base_params, teams_per_group, courts_available, match_duration):
+    """Schedule statistics of one sweep configuration as a result row"""
+    params = dict(base_params, **teams_per_group, courts_available=courts_available, match_duration=match_duration)
+    enabled_categories, all_teams, group_info, grid = generate_tournament(**params)
+    
+    row = dict(teams_per_group, courts_available=courts_available, match_duration=match_duration)
+    if grid is None:
+        row.update(required_matches=0, scheduled_matches=0, scheduling_success_rate=0.0,
+                   court_utilization_rate=0.0, finish_time=None)
+    else:
+        statistics = calculate_schedule_statistics(grid, group_info)
+        row.update(
+            required_matches=statistics['required_matches'],
+            scheduled_matches=statistics['scheduled_matches'],
+            scheduling_success_rate=statistics['scheduling_success_rate'],
+            court_utilization_rate=statistics['court_utilization_rate'],
+            finish_time=statistics['finish_time'].strftime("%H:%M") if statistics['finish_time'] else None
+        )
+    return row
+
+def run_sweep(base_params, courts_values, duration_values, teams_per_group_values, max_workers=None, prune_infeasible=False):
+    """Evaluate the full parameter grid in the shared process pool, returning an iterator of result rows
+    
+    base_params holds the generate_tournament arguments that stay fixed, except
+    that no time is spent optimizing any one configuration.
+    teams_per_group_values maps a TEAMS_PER_GROUP_FIELDS name to the values to try;
+    fields left out keep their base value. With prune_infeasible, configurations the
+    closed-form estimate shows cannot fit are skipped without being scheduled.
+    Rows are yielded as workers finish, and ValueError is raised up front when the
+    grid is larger than MAX_SWEEP_CONFIGURATIONS or a value is below SWEEP_MINIMUMS.
+    """
+    # A local search per configuration would multiply the sweep's run time by its budget
+    base_params = dict(base_params, optimize_seconds=0)
+    courts_values = courts_values or [base_params['courts_available']]
+    duration_values = duration_values or [base_params['match_duration']]
+    fields = [field for field in TEAMS_PER_GROUP_FIELDS if teams_per_group_values.get(field)]
+    
+    # A worker stuck on an impossible configuration would be lost to every later request
+    unknown = set(teams_per_group_values) - set(TEAMS_PER_GROUP_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown Teams per Group settings: {', '.join(sorted(unknown))}")
+    swept = dict({field: teams_per_group_values[field] for field in fields},
+                 courts_available=courts_values, match_duration=duration_values)
+    for field, values in swept.items():
+        if min(values) < SWEEP_MINIMUMS[field]:
+            raise ValueError(f"{field} values must be at least {SWEEP_MINIMUMS[field]}")
+    group_combinations = [dict(zip(fields, values))
+                          for values in itertools.product(*(teams_per_group_values[field] for field in fields))]
+    
+    total = len(group_combinations) * len(courts_values) * len(duration_values)
+    if total > MAX_SWEEP_CONFIGURATIONS:
+        raise ValueError(f"Sweep has {total} configurations, the limit is {MAX_SWEEP_CONFIGURATIONS}")
+    
+    tasks = []
+    for teams_per_group in group_combinations:
+        court_durations = list(itertools.product(courts_values, duration_values))
+        if prune_infeasible:
+            court_durations = [
+                (courts_available, match_duration) for courts_available, match_duration in court_durations
+                if estimate_tournament(dict(base_params, **teams_per_group, courts_available=courts_available,
+                                            match_duration=match_duration))['fits']
+            ]
+        if court_durations:
+            tasks.append((teams_per_group, court_durations))
+    
+    return iter_sweep_results(base_params, tasks, max_workers)
+
+def iter_sweep_results(base_params, tasks, max_workers=None):
+    """Run one task per group size combination and yield rows as tasks complete
+    
+    Tasks go to the shared process pool, at most max_workers (default: the
+    CPUs available) at a time so other requests still get a turn. Closing the
+    iterator early cancels the tasks not yet started.
+    """
+    if not tasks:
+        return
+    
+    executor = get_process_executor()
+    limit = max_workers or available_cpus()
+    remaining = iter(tasks)
+    running = set()
+    try:
+        while True:
+            for teams_per_group, court_durations in itertools.islice(remaining, limit - len(running)):
+                running.add(executor.submit(evaluate_group_settings, base_params, teams_per_group, court_durations))
+            if not running:
+                break
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+    finally:
+        for future in running:
+            future.cancel()
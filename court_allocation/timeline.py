@@ -0,0 +1,152 @@
+"""Event-driven scheduling on a minute timeline, for matches of different lengths"""
+
+import heapq
+import math
+import re
+import time
+from datetime import datetime
+
+import numpy as np
+
+from .grid import PLAYING, CourtGrid
+from .instrumentation import notify_stage
+from .scheduling import build_match_queues, create_time_slots, match_participants, prerequisite_counts, queue_entry, record_schedule
+
+def parse_category_durations(spec, categories=None):
+    """Parse match lengths such as "Parent-Child: 8, Open: 20" into sorted (category, minutes) pairs
+    
+    Raises ValueError for an entry that isn't a category and a positive
+    number of minutes, or for a category not in categories when given.
+    """
+    durations = {}
+    for entry in re.split(r"[,;\n]", str(spec or "")):
+        entry = entry.strip()
+        if not entry:
+            continue
+        category, _, minutes = entry.rpartition(":")
+        category = category.strip()
+        if not category or not minutes.strip().isdigit() or int(minutes) < 1:
+            raise ValueError(f'Match length "{entry}" should look like "Parent-Child: 8".')
+        if categories is not None and category not in categories:
+            raise ValueError(f'Unknown category "{category}" in match lengths; use one of {", ".join(categories)}.')
+        durations[category] = int(minutes)
+    return tuple(sorted(durations.items()))
+
+def timeline_slot_minutes(match_duration, category_durations=(), changeover_minutes=0):
+    """Length of the grid slots a timeline schedule is recorded in: every start and end time falls on one"""
+    return math.gcd(int(match_duration), int(changeover_minutes), *(minutes for _, minutes in category_durations))
+
+def minutes_of_day(time_str):
+    """Minutes since midnight of an HH:MM time"""
+    clock = datetime.strptime(time_str, "%H:%M")
+    return clock.hour * 60 + clock.minute
+
+def build_timeline_grid(matches, start_time, end_time, match_duration, courts_available, keep_categories_separate=False, category_priority=None, min_rest_slots=0, event_date=None, category_durations=(), changeover_minutes=0):
+    """Schedule matches of different lengths, with a changeover between matches on a court
+    
+    A heap holds the minute each court next comes free. The court that frees
+    first takes the highest priority match whose teams and players are free
+    by then, in the same order as build_schedule_grid. A court with nothing
+    to play waits for the next team to come free or knockout match to become
+    ready. Categories missing from category_durations take match_duration,
+    and the rest between a team's matches is min_rest_slots times
+    match_duration. Times are whole minutes from start_time until the grid is
+    built, whose slots are timeline_slot_minutes long.
+    """
+    notify_stage('scheduling')
+    start = time.perf_counter()
+    
+    for match in matches:
+        match.court = None
+        match.start_time = None
+    
+    lengths = dict(category_durations)
+    durations = [lengths.get(match.category, match_duration) for match in matches]
+    slot_minutes = timeline_slot_minutes(match_duration, category_durations, changeover_minutes)
+    day_minutes = minutes_of_day(end_time) - minutes_of_day(start_time)
+    rest_minutes = min_rest_slots * match_duration
+    
+    categories = sorted(set(match.category for match in matches))
+    if category_priority:
+        categories.sort(key=lambda category: category_priority.get(category, 999))
+    
+    waiting, position = prerequisite_counts(matches)
+    ready_at = dict.fromkeys(waiting, 0)
+    pending = []  # (minute, index) of knockout matches whose prerequisites are placed
+    queues = build_match_queues(matches, categories, category_priority, keep_categories_separate, waiting)
+    queue_index = {category: i for i, category in enumerate(categories)} if keep_categories_separate else {}
+    
+    courts = [(0, court) for court in range(1, courts_available + 1)]
+    parked = []  # courts with nothing to play until a knockout match becomes ready
+    free_at = {}  # id of a team or player -> minute it may play again
+    placements = []  # (index, court, minute)
+    
+    while courts:
+        now, court = heapq.heappop(courts)
+        while pending and pending[0][0] <= now:
+            _, seq = heapq.heappop(pending)
+            heapq.heappush(queues[queue_index.get(matches[seq].category, 0)],
+                           queue_entry(matches[seq], seq, category_priority or {}, keep_categories_separate))
+        
+        placed = False
+        retry = math.inf
+        for queue in queues:
+            deferred = []
+            while queue:
+                entry = heapq.heappop(queue)
+                seq, match = entry[-2], entry[-1]
+                if now + durations[seq] > day_minutes:
+                    deferred.append(entry)
+                    continue
+                busy_until = max((free_at.get(id(participant), 0) for participant in match_participants(match)), default=0)
+                if busy_until > now:
+                    deferred.append(entry)
+                    retry = min(retry, busy_until)
+                    continue
+                
+                end = now + durations[seq]
+                placements.append((seq, court, now))
+                for participant in match_participants(match):
+                    free_at[id(participant)] = end + rest_minutes
+                heapq.heappush(courts, (end + changeover_minutes, court))
+                placed = True
+                
+                for dependent in match.dependents:
+                    successor = position.get(id(dependent))
+                    if successor is None:
+                        continue
+                    waiting[successor] -= 1
+                    ready_at[successor] = max(ready_at[successor], end + rest_minutes)
+                    if not waiting[successor]:
+                        heapq.heappush(pending, (ready_at[successor], successor))
+                        # Courts that ran out of matches may have this one to play
+                        for parked_court in parked:
+                            heapq.heappush(courts, (max(parked_court[0], ready_at[successor]), parked_court[1]))
+                        parked = []
+                break
+            
+            for entry in deferred:
+                heapq.heappush(queue, entry)
+            if placed:
+                break
+        
+        if not placed:
+            if pending:
+                retry = min(retry, pending[0][0])
+            if retry < day_minutes:
+                heapq.heappush(courts, (retry, court))
+            elif any(waiting.values()):
+                parked.append((now, court))
+    
+    # Minutes become datetimes only here, one per slot
+    time_slots = create_time_slots(start_time, end_time, slot_minutes, event_date)
+    grid = CourtGrid(matches, time_slots, courts_available, match_duration,
+                     durations=np.array(durations, dtype=np.int16), slot_minutes=slot_minutes)
+    for seq, court, minute in placements:
+        slot_idx = minute // slot_minutes
+        grid.cells[court - 1, slot_idx + 1:slot_idx + durations[seq] // slot_minutes] = PLAYING
+        grid.place(seq, court, slot_idx)
+    grid.apply_placements()
+    
+    record_schedule(grid, time.perf_counter() - start)
+    return grid
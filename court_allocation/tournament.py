@@ -0,0 +1,354 @@
+"""End-to-end tournament generation with cached stages"""
+
+import inspect
+import threading
+
+from .cache import LRUCache
+from .coloring import SLOT_ASSIGNMENTS, build_coloring_grid
+from .generation import calculate_groups_and_matches, estimate_feasibility, estimate_groups_and_matches, estimate_matches_for_teams
+from .optimize import optimize_schedule
+from .roster import calculate_roster_groups_and_matches, count_roster_teams, roster_fingerprint
+from .scheduling import build_schedule_grid, normalize_time
+from .timeline import build_timeline_grid, parse_category_durations
+from .venues import build_venue_grid, parse_days, parse_venues
+
+# Result cache bounds for generate_tournament
+SCHEDULE_CACHE_ENTRIES = 64
+SCHEDULE_CACHE_BYTES = 256 * 1024 * 1024
+
+# Rosters whose team counts are kept for the feasibility estimate
+ROSTER_CACHE_ENTRIES = 8
+ROSTER_CACHE_BYTES = 64 * 1024
+
+# Approximate resident size of generated objects, used to cap cache memory
+MATCH_BYTES = 140
+TEAM_BYTES = 420
+
+def normalize_ratio(ratio):
+    """Round slider ratios so floating point noise maps to the same cache key"""
+    return round(float(ratio), 4)
+
+def normalize_priorities(category_priorities):
+    """Replace priority numbers with dense ranks, since only their order matters"""
+    ranks = {priority: rank for rank, priority in enumerate(sorted(set(category_priorities.values())), start=1)}
+    return {category: ranks[priority] for category, priority in category_priorities.items()}
+
+def generation_size(generation):
+    """Estimated memory held by a cached (matches, teams, group info) result"""
+    all_matches, all_teams, _ = generation
+    return len(all_matches) * MATCH_BYTES + sum(len(teams) for teams in all_teams.values()) * TEAM_BYTES
+
+def roster_counts_size(team_counts):
+    """Estimated memory held by the cached team counts of a roster"""
+    return 240 + len(team_counts) * 100
+
+def schedule_size(grid):
+    """Estimated memory held by a cached schedule grid"""
+    return grid.cells.nbytes + grid.match_categories.nbytes + len(grid.time_slots) * 48
+
+# Teams and matches depend only on participant and group settings, so they are
+# cached separately from the schedule, which also depends on time and courts
+generation_cache = LRUCache(SCHEDULE_CACHE_ENTRIES, SCHEDULE_CACHE_BYTES // 2, generation_size)
+schedule_cache = LRUCache(SCHEDULE_CACHE_ENTRIES, SCHEDULE_CACHE_BYTES // 2, schedule_size)
+roster_cache = LRUCache(ROSTER_CACHE_ENTRIES, ROSTER_CACHE_BYTES, roster_counts_size)
+
+# Cached schedules share Match objects, so placing matches is done one request at a time
+schedule_lock = threading.Lock()
+
+def reset_caches():
+    """Replace the result caches and their lock with empty ones
+    
+    Forked worker processes call this so they never inherit a lock held by
+    one of the parent's threads.
+    """
+    global generation_cache, schedule_cache, roster_cache, schedule_lock
+    generation_cache = LRUCache(SCHEDULE_CACHE_ENTRIES, SCHEDULE_CACHE_BYTES // 2, generation_size)
+    schedule_cache = LRUCache(SCHEDULE_CACHE_ENTRIES, SCHEDULE_CACHE_BYTES // 2, schedule_size)
+    roster_cache = LRUCache(ROSTER_CACHE_ENTRIES, ROSTER_CACHE_BYTES, roster_counts_size)
+    schedule_lock = threading.Lock()
+
+def get_cache_stats():
+    """Hit/miss counters of the schedule result caches"""
+    return {
+        'generation': generation_cache.stats(),
+        'schedule': schedule_cache.stats(),
+        'roster': roster_cache.stats()
+    }
+
+def generate_tournament(
+    total_participants,
+    amateur_ratio,
+    women_advanced_ratio,
+    plus_35_ratio,
+    parent_child_ratio,
+    include_mens_doubles,
+    include_mixed_doubles,
+    include_amateur,
+    include_35plus,
+    include_open,
+    include_parent_child,
+    match_duration,
+    mens_doubles_teams,
+    mixed_doubles_teams,
+    amateur_teams,
+    plus_35_teams,
+    open_teams,
+    parent_child_teams,
+    qualifying_teams,
+    start_time,
+    end_time,
+    courts_available,
+    keep_categories_separate,
+    mens_doubles_priority,
+    mixed_doubles_priority,
+    amateur_priority,
+    plus_35_priority,
+    open_priority,
+    parent_child_priority,
+    min_rest_slots=0,
+    roster=None,
+    optimize_seconds=0,
+    venues="",
+    days="",
+    partition_by="category",
+    category_durations="",
+    changeover_minutes=0,
+    slot_assignment="greedy"
+):
+    """Generate teams and matches and schedule them, reusing cached stages
+    
+    Teams come from the roster file (CSV or XLSX) when one is given, in which
+    case the participant count and ratios are ignored. With optimize_seconds
+    the greedy schedule is improved by local search for up to that long.
+    With venues ("Main Hall: 6, 09:00-18:00; Annex: 4, 10:00-17:00") or days
+    ("2026-10-24, 2026-10-25"), categories or groups are split across the
+    venue-days by partition_by and each venue-day is scheduled in parallel;
+    the venues replace courts_available, start_time and end_time. With
+    category_durations ("Parent-Child: 8, Open: 20") or changeover_minutes
+    between matches on a court, matches are placed on a minute timeline
+    instead of fixed slots, and the optimizer is skipped. Fixed slots are
+    filled by slot_assignment: "greedy" fills them one at a time in priority
+    order, "coloring" colors the graph of matches sharing a player. Invalid
+    venues, days, durations or slot assignments raise ValueError.
+    
+    Returns (enabled_categories, all_teams, group_info, grid). The teams,
+    group info and grid are None when no category is enabled, and the grid
+    is None when the settings produce no matches.
+    """
+    # Create list of enabled categories and their priorities
+    enabled_categories = []
+    category_priorities = {}
+    
+    if include_mens_doubles:
+        enabled_categories.append("Men's Doubles")
+        category_priorities["Men's Doubles"] = int(mens_doubles_priority)
+    if include_mixed_doubles:
+        enabled_categories.append("Mixed Doubles")
+        category_priorities["Mixed Doubles"] = int(mixed_doubles_priority)
+    if include_amateur:
+        enabled_categories.append("Amateur")
+        category_priorities["Amateur"] = int(amateur_priority)
+    if include_35plus:
+        enabled_categories.append("35+")
+        category_priorities["35+"] = int(plus_35_priority)
+    if include_open:
+        enabled_categories.append("Open")
+        category_priorities["Open"] = int(open_priority)
+    if include_parent_child:
+        enabled_categories.append("Parent-Child")
+        category_priorities["Parent-Child"] = int(parent_child_priority)
+    
+    if not enabled_categories:
+        return enabled_categories, None, None, None
+    
+    # Generate matches and teams
+    teams_per_group_settings = {
+        "Men's Doubles": int(mens_doubles_teams),
+        "Mixed Doubles": int(mixed_doubles_teams),
+        "Amateur": int(amateur_teams),
+        "35+": int(plus_35_teams),
+        "Open": int(open_teams),
+        "Parent-Child": int(parent_child_teams)
+    }
+    group_settings = (
+        tuple(enabled_categories),
+        tuple(teams_per_group_settings[category] for category in enabled_categories),
+        int(qualifying_teams)
+    )
+    ratios = tuple(normalize_ratio(ratio) for ratio in (amateur_ratio, women_advanced_ratio, plus_35_ratio, parent_child_ratio))
+    if roster:
+        generation_key = (roster_fingerprint(roster),) + group_settings
+    else:
+        generation_key = (int(total_participants), ratios) + group_settings
+    
+    def generate():
+        if roster:
+            return calculate_roster_groups_and_matches(roster, enabled_categories, teams_per_group_settings, int(qualifying_teams))
+        return calculate_groups_and_matches(
+            int(total_participants), *ratios,
+            enabled_categories, teams_per_group_settings, int(qualifying_teams)
+        )
+    
+    all_matches, all_teams, group_info = generation_cache.get_or_create(generation_key, generate)
+    
+    if not all_matches:
+        return enabled_categories, all_teams, group_info, None
+    if slot_assignment not in SLOT_ASSIGNMENTS:
+        raise ValueError(f"Slot assignment should be {' or '.join(SLOT_ASSIGNMENTS)}.")
+    
+    # Schedule matches with priorities
+    category_priorities = normalize_priorities(category_priorities)
+    venue_settings = resolve_venues(venues, days, start_time, end_time, courts_available)
+    timeline_settings = (parse_category_durations(category_durations, enabled_categories), max(0, int(changeover_minutes or 0)))
+    schedule_settings = (
+        normalize_time(start_time),
+        normalize_time(end_time),
+        int(match_duration),
+        int(courts_available),
+        bool(keep_categories_separate),
+        tuple(sorted(category_priorities.items())),
+        int(min_rest_slots),
+        float(optimize_seconds or 0)
+    ) + venue_settings + ((str(partition_by),) if venue_settings[0] else ()) + (timeline_settings if any(timeline_settings) else ())
+    if slot_assignment != "greedy":
+        schedule_settings += (slot_assignment,)
+    
+    def build_schedule():
+        if venue_settings[0]:
+            grid = build_venue_grid(
+                all_matches,
+                venue_settings[0],
+                venue_settings[1],
+                schedule_settings[2],
+                schedule_settings[4],
+                category_priorities,
+                schedule_settings[6],
+                partition_by,
+                category_durations=timeline_settings[0],
+                changeover_minutes=timeline_settings[1],
+                slot_assignment=slot_assignment
+            )
+        elif any(timeline_settings):
+            grid = build_timeline_grid(
+                all_matches,
+                schedule_settings[0],
+                schedule_settings[1],
+                schedule_settings[2],
+                schedule_settings[3],
+                schedule_settings[4],
+                category_priorities,
+                schedule_settings[6],
+                category_durations=timeline_settings[0],
+                changeover_minutes=timeline_settings[1]
+            )
+        else:
+            build_slot_grid = build_coloring_grid if slot_assignment == "coloring" else build_schedule_grid
+            grid = build_slot_grid(
+                all_matches,
+                schedule_settings[0],
+                schedule_settings[1],
+                schedule_settings[2],
+                schedule_settings[3],
+                schedule_settings[4],
+                category_priorities,
+                schedule_settings[6]
+            )
+        # The local search moves matches between equal slots, so it only improves fixed-slot schedules
+        if schedule_settings[7] > 0 and grid.durations is None:
+            grid, _ = optimize_schedule(grid, schedule_settings[7], schedule_settings[6])
+        return grid
+    
+    with schedule_lock:
+        grid = schedule_cache.get_or_create(generation_key + schedule_settings, build_schedule)
+        grid.apply_placements()
+    
+    return enabled_categories, all_teams, group_info, grid
+
+# Argument names of generate_tournament, in the order the UI passes them
+TOURNAMENT_PARAMETERS = list(inspect.signature(generate_tournament).parameters)
+
+def resolve_venues(venues, days, start_time, end_time, courts_available):
+    """Parsed (venues, days) of a multi-venue or multi-day schedule, or ((), ()) for a single venue on one day
+    
+    Days without venues are days at one venue with the given courts and times.
+    """
+    venues = parse_venues(venues)
+    days = parse_days(days)
+    if days and not venues:
+        venues = (("", int(courts_available), normalize_time(start_time), normalize_time(end_time)),)
+    return venues, days
+
+# Category name with its include flag, Teams per Group and priority settings
+CATEGORY_SETTINGS = [
+    ("Men's Doubles", 'include_mens_doubles', 'mens_doubles_teams', 'mens_doubles_priority'),
+    ("Mixed Doubles", 'include_mixed_doubles', 'mixed_doubles_teams', 'mixed_doubles_priority'),
+    ("Amateur", 'include_amateur', 'amateur_teams', 'amateur_priority'),
+    ("35+", 'include_35plus', 'plus_35_teams', 'plus_35_priority'),
+    ("Open", 'include_open', 'open_teams', 'open_priority'),
+    ("Parent-Child", 'include_parent_child', 'parent_child_teams', 'parent_child_priority')
+]
+
+def resolve_categories(settings):
+    """Enabled categories, Teams per Group and normalized priorities from a dict of generate_tournament arguments"""
+    enabled_categories = [category for category, include, _, _ in CATEGORY_SETTINGS if settings[include]]
+    teams_per_group_settings = {category: int(settings[teams]) for category, _, teams, _ in CATEGORY_SETTINGS}
+    category_priorities = normalize_priorities({category: int(settings[priority])
+                                                for category, include, _, priority in CATEGORY_SETTINGS if settings[include]})
+    return enabled_categories, teams_per_group_settings, category_priorities
+
+def estimate_tournament(settings):
+    """Closed-form match counts and feasibility for a dict of generate_tournament arguments
+    
+    Takes microseconds, so it can run on every slider change or prune sweep
+    configurations before any teams or matches are built.
+    """
+    enabled_categories, teams_per_group_settings, _ = resolve_categories(settings)
+    roster = settings.get('roster')
+    if roster:
+        # Reading a roster is the expensive part, so its team counts are cached
+        team_counts = roster_cache.get_or_create(roster_fingerprint(roster), lambda: count_roster_teams(roster))
+        estimate = estimate_matches_for_teams(
+            {category: team_counts.get(category, 0) for category in enabled_categories},
+            teams_per_group_settings,
+            int(settings['qualifying_teams'])
+        )
+    else:
+        estimate = estimate_groups_and_matches(
+            int(settings['total_participants']),
+            normalize_ratio(settings['amateur_ratio']),
+            normalize_ratio(settings['women_advanced_ratio']),
+            normalize_ratio(settings['plus_35_ratio']),
+            normalize_ratio(settings['parent_child_ratio']),
+            enabled_categories,
+            teams_per_group_settings,
+            int(settings['qualifying_teams'])
+        )
+    venues, days = resolve_venues(settings.get('venues'), settings.get('days'), settings['start_time'],
+                                  settings['end_time'], settings['courts_available'])
+    estimate.update(estimate_feasibility(
+        estimate,
+        normalize_time(settings['start_time']),
+        normalize_time(settings['end_time']),
+        int(settings['match_duration']),
+        int(settings['courts_available']),
+        int(settings.get('min_rest_slots') or 0),
+        venue_days=[(start, end, courts) for _, courts, start, end in venues] * max(1, len(days))
+    ))
+    return estimate
+
+def calculate_schedule_statistics(grid, group_info):
+    """Scheduling statistics read from the occupancy grid"""
+    total_scheduled = grid.used_slots
+    total_matches = group_info["Total Matches"]
+    return {
+        'required_matches': total_matches,
+        'scheduled_matches': total_scheduled,
+        'unscheduled_matches': total_matches - total_scheduled,
+        'scheduling_success_rate': (total_scheduled / total_matches * 100) if total_matches > 0 else 0,
+        'available_slots': grid.match_slots,
+        'court_utilization_rate': grid.utilization(),
+        'peak_idle_courts': int(grid.idle_court_counts().max()) if grid.total_slots else 0,
+        'knockout_matches': group_info.get('Knockout Matches', 0),
+        'finish_time': grid.finish_time(),
+        'venue_utilization': grid.venue_utilization()
+    }
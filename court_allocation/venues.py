@@ -0,0 +1,312 @@
+"""Multi-venue, multi-day schedules: matches partitioned across venue-days, solved in parallel and merged"""
+
+import logging
+import multiprocessing
+import re
+import time
+from datetime import date
+
+import numpy as np
+
+from .grid import BLOCKED, FREE, CourtGrid
+from .instrumentation import log_event, merge_metric_values, stage_seconds, take_metric_values
+from .scheduling import build_schedule_grid, create_time_slots, match_dependencies, match_participants, normalize_time
+from .coloring import build_coloring_grid
+from .timeline import build_timeline_grid, timeline_slot_minutes
+
+logger = logging.getLogger(__name__)
+
+# How matches are split across venue-days: whole categories, or each group's matches on their own
+PARTITION_MODES = ('category', 'group')
+
+# "Main Hall: 6, 09:00-18:00", "Annex: 4 courts 10:00-17:00"
+VENUE_PATTERN = re.compile(r"^(?P<name>[^:]+):\s*(?P<courts>\d+)(?:\s*courts?)?\s*,?\s*(?P<start>\d{1,2}:\d{2})\s*-\s*(?P<end>\d{1,2}:\d{2})$",
+                           re.IGNORECASE)
+
+def parse_venues(spec):
+    """Parse venues such as "Main Hall: 6, 09:00-18:00; Annex: 4, 10:00-17:00" into (name, courts, start, end) tuples
+    
+    Venues are separated by semicolons or new lines. Raises ValueError for
+    an entry that isn't a name, a court count and opening hours.
+    """
+    venues = []
+    for entry in re.split(r"[;\n]", str(spec or "")):
+        entry = entry.strip()
+        if not entry:
+            continue
+        match = VENUE_PATTERN.match(entry)
+        if not match:
+            raise ValueError(f'Venue "{entry}" should look like "Main Hall: 6, 09:00-18:00".')
+        name = match['name'].strip()
+        courts = int(match['courts'])
+        start, end = normalize_time(match['start']), normalize_time(match['end'])
+        if courts < 1 or start >= end:
+            raise ValueError(f'Venue "{name}" needs at least one court and an end time after its start time.')
+        if any(venue[0] == name for venue in venues):
+            raise ValueError(f'Venue "{name}" is listed twice.')
+        venues.append((name, courts, start, end))
+    return tuple(venues)
+
+def parse_days(spec):
+    """Parse days such as "2026-10-24, 2026-10-25" into sorted, distinct ISO dates"""
+    days = set()
+    for part in re.split(r"[,\s]+", str(spec or "")):
+        if part:
+            try:
+                days.add(date.fromisoformat(part).isoformat())
+            except ValueError:
+                raise ValueError(f'Day "{part}" should be a date such as 2026-10-24.') from None
+    return tuple(sorted(days))
+
+def partition_units(matches, partition_by='category'):
+    """(match indices, knockout or not, component, category) of each set of matches scheduled at the same venue-day
+    
+    By category, a category's groups and knockout bracket stay together. By
+    group, each group's matches form a unit and each category's knockout
+    bracket another. Units whose teams share a player, directly or through
+    other units, have the same component, whose units assign_units keeps at
+    one venue on any day, because venue-days solved independently could
+    otherwise book that player at two venues at once.
+    """
+    units = {}
+    for seq, match in enumerate(matches):
+        if partition_by == 'group':
+            key = (match.category, None if match.stage else match.group_id)
+        else:
+            key = (match.category,)
+        units.setdefault(key, []).append(seq)
+    units = list(units.values())
+    
+    # Union-find over units, joined through the players of their matches
+    parent = list(range(len(units)))
+    
+    def find(unit):
+        while parent[unit] != unit:
+            parent[unit] = parent[parent[unit]]
+            unit = parent[unit]
+        return unit
+    
+    owner = {}
+    for unit, indices in enumerate(units):
+        for seq in indices:
+            for participant in match_participants(matches[seq]):
+                other = owner.setdefault(id(participant), unit)
+                if find(other) != find(unit):
+                    parent[find(other)] = find(unit)
+    
+    return [(indices, matches[indices[0]].stage is not None, find(unit), matches[indices[0]].category)
+            for unit, indices in enumerate(units)]
+
+def assign_units(units, venue_days, partition_by='category'):
+    """Venue-day index of each unit, filling the venue-days evenly by their share of court time
+    
+    The largest units are placed first, each on the venue-day that would be
+    least loaded relative to its capacity. By group, knockout brackets are
+    placed on the last day first. Group matches then fill the days before it
+    while they have room, and the rest join their category's bracket on the
+    last day, where the venue-day's own solve plays them before the bracket.
+    On each day, the units of a component all go to the venue its first unit
+    there went to.
+    """
+    capacity = [max(1, len(time_slots) * courts) for day, venue, courts, time_slots in venue_days]
+    load = [0] * len(venue_days)
+    last_day = max(day for day, _, _, _ in venue_days)
+    split_days = partition_by == 'group' and any(knockout for _, knockout, _, _ in units)
+    component_venues = {}  # (component, day) -> venue index
+    bracket_targets = {}  # category -> venue-day index of its knockout bracket
+    
+    assignment = [None] * len(units)
+    for unit in sorted(range(len(units)), key=lambda unit: (not (split_days and units[unit][1]), -len(units[unit][0]))):
+        indices, knockout, component, category = units[unit]
+        candidates = [idx for idx, (day, venue, _, _) in enumerate(venue_days)
+                      if component_venues.get((component, day), venue) == venue]
+        if split_days:
+            last = [idx for idx in candidates if venue_days[idx][0] == last_day]
+            earlier = [idx for idx in candidates if venue_days[idx][0] != last_day]
+            if knockout:
+                candidates = last
+            elif any(load[idx] + len(indices) <= capacity[idx] for idx in earlier):
+                candidates = [idx for idx in earlier if load[idx] + len(indices) <= capacity[idx]]
+            elif bracket_targets.get(category) in last:
+                candidates = [bracket_targets[category]]
+            elif category not in bracket_targets:
+                candidates = last or earlier
+            else:
+                candidates = earlier or last
+        target = min(candidates, key=lambda idx: ((load[idx] + len(indices)) / capacity[idx], idx))
+        assignment[unit] = target
+        load[target] += len(indices)
+        component_venues[(component, venue_days[target][0])] = venue_days[target][1]
+        if knockout:
+            bracket_targets[category] = target
+    return assignment
+
+def blocked_successors(matches, unscheduled):
+    """Indices of the matches that can't be played because one of the unscheduled ones comes before them"""
+    _, successors = match_dependencies(matches)
+    blocked = set()
+    pending = list(unscheduled)
+    while pending:
+        for successor in successors.get(pending.pop(), ()):
+            if successor not in blocked:
+                blocked.add(successor)
+                pending.append(successor)
+    return blocked
+
+def solve_partition(matches, start_time, end_time, match_duration, courts, keep_categories_separate, category_priority, min_rest_slots, event_date, category_durations=(), changeover_minutes=0, slot_assignment='greedy'):
+    """Schedule one venue-day's matches, returning the grid's cells of indices into matches"""
+    if category_durations or changeover_minutes:
+        grid = build_timeline_grid(matches, start_time, end_time, match_duration, courts, keep_categories_separate,
+                                   category_priority, min_rest_slots, event_date, category_durations, changeover_minutes)
+    elif slot_assignment == 'coloring':
+        grid = build_coloring_grid(matches, start_time, end_time, match_duration, courts,
+                                   keep_categories_separate, category_priority, min_rest_slots, event_date)
+    else:
+        grid = build_schedule_grid(matches, start_time, end_time, match_duration, courts,
+                                   keep_categories_separate, category_priority, min_rest_slots, event_date)
+    return grid.cells
+
+def solve_partition_in_worker(task):
+    """solve_partition in a worker of the shared process pool, also returning the metric values it recorded"""
+    # The worker is shared, so drop whatever an earlier task left behind
+    take_metric_values()
+    return solve_partition(*task), take_metric_values()
+
+def solve_partitions(tasks, max_workers=None):
+    """Cells of every solve_partition argument tuple, solved in parallel on the shared process pool
+    
+    Partitions are solved one after another when there is only one, when
+    only one CPU is available, or in a worker process such as a schedule or
+    sweep worker, which should not wait on the pool it may be part of.
+    """
+    # Imported here because workers imports tournament, which imports this module
+    from .workers import available_cpus, get_process_executor
+    
+    workers = min(len(tasks), max_workers or available_cpus())
+    if workers < 2 or multiprocessing.parent_process() is not None:
+        return [solve_partition(*task) for task in tasks]
+    
+    executor = get_process_executor()
+    futures = [executor.submit(solve_partition_in_worker, task) for task in tasks]
+    results = []
+    for future in futures:
+        cells, metric_values = future.result()
+        merge_metric_values(metric_values)
+        results.append(cells)
+    return results
+
+def build_venue_grid(matches, venues, days, match_duration, keep_categories_separate=False, category_priority=None, min_rest_slots=0, partition_by='category', max_workers=None, category_durations=(), changeover_minutes=0, slot_assignment='greedy'):
+    """Schedule matches across venues and days into one grid with the courts of every venue
+    
+    venues are (name, courts, start, end) tuples and days ISO dates; without
+    days the schedule is for today. Each venue-day is solved on its own, in
+    parallel, then merged, so a match never moves between venue-days after
+    its partition has been assigned. With category_durations or
+    changeover_minutes each venue-day is scheduled on a minute timeline, and
+    otherwise by slot_assignment.
+    """
+    if partition_by not in PARTITION_MODES:
+        raise ValueError(f"Matches can be split across venue-days by {' or '.join(PARTITION_MODES)}.")
+    event_dates = [date.fromisoformat(day) for day in days] or [None]
+    
+    start = time.perf_counter()
+    timeline = bool(category_durations or changeover_minutes)
+    slot_minutes = timeline_slot_minutes(match_duration, category_durations, changeover_minutes) if timeline else match_duration
+    venue_days = [(event_date or date.today(), venue_idx, courts, create_time_slots(start_time, end_time, slot_minutes, event_date))
+                  for event_date in event_dates
+                  for venue_idx, (_, courts, start_time, end_time) in enumerate(venues)]
+    units = partition_units(matches, partition_by)
+    assignment = assign_units(units, venue_days, partition_by)
+    
+    partitions = [[] for _ in venue_days]
+    target_of = np.empty(len(matches), dtype=np.int32)
+    component_of = np.empty(len(matches), dtype=np.int32)
+    for (indices, _, component, _), target in zip(units, assignment):
+        partitions[target].extend(indices)
+        target_of[indices] = target
+        component_of[indices] = component
+    
+    # Courts of every venue stacked in venue order, time slots of every day in order
+    first_court = np.cumsum([0] + [courts for _, courts, _, _ in venues])
+    time_slots = sorted(set(slot for _, _, _, slots in venue_days for slot in slots))
+    column = {slot: slot_idx for slot_idx, slot in enumerate(time_slots)}
+    lengths = dict(category_durations)
+    grid = CourtGrid(matches, time_slots, int(first_court[-1]), match_duration,
+                     venues=[(name, courts) for name, courts, _, _ in venues],
+                     durations=np.array([lengths.get(match.category, match_duration) for match in matches], dtype=np.int16) if timeline else None,
+                     slot_minutes=slot_minutes)
+    grid.cells[:] = BLOCKED
+    for _, venue_idx, _, slots in venue_days:
+        grid.cells[first_court[venue_idx]:first_court[venue_idx + 1], [column[slot] for slot in slots]] = FREE
+    
+    # Brackets split from their groups are solved once the groups are. Group
+    # matches that didn't fit join their bracket's venue-day, and the knockout
+    # matches of any that still can't be played are left out.
+    last_day = venue_days[-1][0]
+    if partition_by == 'group' and any(knockout for _, knockout, _, _ in units):
+        waves = [[target for target in range(len(venue_days)) if venue_days[target][0] != last_day],
+                 [target for target in range(len(venue_days)) if venue_days[target][0] == last_day]]
+    else:
+        waves = [list(range(len(venue_days)))]
+    
+    # A knockout match can only follow a match from an earlier day or from its own venue-day,
+    # which is never the case when a shared player kept some groups away from their bracket
+    prerequisites, successors = match_dependencies(matches)
+    cut = [seq for seq, before in prerequisites.items()
+           if any(target_of[prerequisite] != target_of[seq] and venue_days[target_of[prerequisite]][0] >= venue_days[target_of[seq]][0]
+                  for prerequisite in before)]
+    blocked = set(cut) | blocked_successors(matches, cut)
+    
+    solved = 0
+    for wave in waves:
+        tasks = []
+        targets = []
+        for target in wave:
+            partitions[target] = sorted(seq for seq in partitions[target] if seq not in blocked)
+            if partitions[target]:
+                _, courts, start_time, end_time = venues[venue_days[target][1]]
+                tasks.append(([matches[seq] for seq in partitions[target]], start_time, end_time, match_duration, courts,
+                              keep_categories_separate, category_priority, min_rest_slots, event_dates[target // len(venues)],
+                              category_durations, changeover_minutes, slot_assignment))
+                targets.append(target)
+        
+        for target, cells in zip(targets, solve_partitions(tasks, max_workers)):
+            _, venue_idx, _, slots = venue_days[target]
+            indices = np.array(partitions[target], dtype=np.int32)
+            grid.cells[first_court[venue_idx]:first_court[venue_idx + 1], [column[slot] for slot in slots]] = \
+                np.where(cells >= 0, indices[np.maximum(cells, 0)], cells)
+        solved += len(tasks)
+        
+        if wave is not waves[-1]:
+            scheduled = set(grid.scheduled_indices().tolist())
+            last_day_venues = {}
+            for target in waves[-1]:
+                for component in set(component_of[partitions[target]].tolist()):
+                    last_day_venues.setdefault(component, set()).add(venue_days[target][1])
+            
+            leftovers = []
+            for seq in (seq for target in wave for seq in partitions[target] if seq not in scheduled):
+                # Only when none of its players is at another venue on the last day
+                destination = target_of[successors[seq][0]] if seq in successors else None
+                if destination is not None and destination in waves[-1] and \
+                        last_day_venues.get(int(component_of[seq]), set()) <= {venue_days[destination][1]}:
+                    partitions[destination].append(seq)
+                    target_of[seq] = destination
+                    last_day_venues.setdefault(int(component_of[seq]), set()).add(venue_days[destination][1])
+                else:
+                    leftovers.append(seq)
+            blocked |= blocked_successors(matches, leftovers)
+    
+    elapsed = time.perf_counter() - start
+    stage_seconds.observe(elapsed, 'venues')
+    log_event(
+        logger, logging.INFO, "venue_schedule_built",
+        matches=len(matches),
+        scheduled=grid.used_slots,
+        venues=len(venues),
+        days=len(event_dates),
+        partitions=solved,
+        utilization={f"{row['venue']} {row['day']}": round(row['utilization'], 1) for row in grid.venue_utilization()},
+        seconds=round(elapsed, 4)
+    )
+    return grid
@@ -0,0 +1,249 @@
+"""Bounded pool of worker processes for schedule requests from the web interface"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .instrumentation import (log_event, merge_metric_values, stage_listeners, take_metric_values, worker_queue_depth,
+                              worker_requests, workers_busy)
+
+logger = logging.getLogger(__name__)
+
+# Requests allowed to wait for a free worker before new ones are turned away
+DEFAULT_QUEUE_SIZE = 16
+
+# Longest a request may hold a worker before the worker is stopped
+DEFAULT_TIMEOUT_SECONDS = 120
+
+# Longest a caller goes without an event while its request waits or runs, so it can be cancelled promptly
+HEARTBEAT_SECONDS = 0.5
+
+# Process pool shared by what-if sweeps and multi-venue solves, started on first use
+process_executor = None
+process_executor_lock = threading.Lock()
+
+class PoolBusyError(RuntimeError):
+    """Every worker is busy and the wait queue is full"""
+
+def available_cpus():
+    """CPUs this process may use: its affinity mask, further limited by a cgroup v2 CPU quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    
+    # A container's quota is "max 100000" when unlimited, "200000 100000" for two CPUs
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as quota_file:
+            quota, period = quota_file.read().split()[:2]
+        if quota != "max":
+            cpus = min(cpus, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+def get_process_executor():
+    """The process pool shared by what-if sweeps and multi-venue solves, one worker per available CPU
+    
+    Workers are spawned rather than forked, since forking a web server process
+    copies locks its other threads may be holding. Every request submits to
+    this one pool instead of starting processes of its own.
+    """
+    global process_executor
+    with process_executor_lock:
+        if process_executor is None:
+            process_executor = ProcessPoolExecutor(max_workers=available_cpus(), mp_context=multiprocessing.get_context("spawn"))
+        return process_executor
+
+def worker_main(function, connection):
+    """Run function for each argument tuple received until the pool sends None or goes away
+    
+    Stage names are sent as they start, then ('result', value, metrics) or
+    ('error', exception, metrics), where metrics are the values recorded while
+    the request ran.
+    """
+    stage_listeners[:] = [lambda stage: connection.send(('stage', stage))]
+    
+    while True:
+        try:
+            args = connection.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if args is None:
+            break
+        
+        take_metric_values()
+        try:
+            result = function(*args)
+        except Exception as error:
+            try:
+                connection.send(('error', error, take_metric_values()))
+            except Exception:
+                # The exception itself couldn't be pickled
+                connection.send(('error', RuntimeError(f"{type(error).__name__}: {error}"), take_metric_values()))
+        else:
+            connection.send(('result', result, take_metric_values()))
+
+class WorkerPool:
+    """Persistent worker processes running one function, with a bounded wait queue
+    
+    Workers are spawned on first use, up to max_workers (default: the CPUs
+    available to the container), so function must be importable by name.
+    Each worker keeps its own result caches, and the most recently used idle
+    worker is picked first so repeated requests for the same settings tend
+    to find a warm cache. A worker that times out, is cancelled
+    or crashes is stopped and replaced on demand.
+    """
+    def __init__(self, function, max_workers=None, queue_size=DEFAULT_QUEUE_SIZE, timeout=DEFAULT_TIMEOUT_SECONDS):
+        self.function = function
+        self.max_workers = max_workers or available_cpus()
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.idle = []
+        self.started = 0
+        self.waiting = deque()
+        self.condition = threading.Condition()
+    
+    def start_worker(self):
+        # Spawned like the shared executor's workers: forking copies locks held by the server's other threads
+        context = multiprocessing.get_context("spawn")
+        parent_connection, child_connection = context.Pipe()
+        process = context.Process(target=worker_main, args=(self.function, child_connection), daemon=True)
+        process.start()
+        child_connection.close()
+        return process, parent_connection
+    
+    def stop_worker(self, worker):
+        process, connection = worker
+        process.kill()
+        process.join()
+        connection.close()
+    
+    def acquire(self):
+        """Wait for a worker in arrival order, yielding ('queued', position) while waiting
+        
+        Raises PoolBusyError when every worker is busy and the queue is full.
+        The worker is returned through StopIteration, so callers use yield from.
+        """
+        ticket = object()
+        with self.condition:
+            if not self.idle and self.started >= self.max_workers and len(self.waiting) >= self.queue_size:
+                worker_requests.inc('rejected')
+                log_event(logger, logging.WARNING, "worker_queue_full", queue_size=self.queue_size)
+                raise PoolBusyError(f"All {self.max_workers} workers are busy and {len(self.waiting)} requests are waiting")
+            self.waiting.append(ticket)
+            worker_queue_depth.set(len(self.waiting))
+        
+        try:
+            while True:
+                with self.condition:
+                    if self.waiting[0] is ticket and (self.idle or self.started < self.max_workers):
+                        self.waiting.popleft()
+                        worker_queue_depth.set(len(self.waiting))
+                        if self.idle:
+                            worker = self.idle.pop()
+                        else:
+                            worker = None
+                            self.started += 1
+                        workers_busy.set(self.started - len(self.idle))
+                        # The next request in line may be able to take another worker
+                        self.condition.notify_all()
+                        break
+                    position = self.waiting.index(ticket) + 1
+                yield 'queued', position
+                with self.condition:
+                    self.condition.wait(HEARTBEAT_SECONDS)
+        except BaseException:
+            with self.condition:
+                if ticket in self.waiting:
+                    self.waiting.remove(ticket)
+                    worker_queue_depth.set(len(self.waiting))
+                    self.condition.notify_all()
+            raise
+        
+        if worker is None:
+            try:
+                worker = self.start_worker()
+            except BaseException:
+                self.release(None)
+                raise
+        return worker
+    
+    def release(self, worker, healthy=False):
+        """Return a worker to the idle list, or stop it when its state is unknown"""
+        if worker is not None and not healthy:
+            self.stop_worker(worker)
+        with self.condition:
+            if worker is not None and healthy:
+                self.idle.append(worker)
+            else:
+                self.started -= 1
+            workers_busy.set(self.started - len(self.idle))
+            self.condition.notify_all()
+    
+    def iter_run(self, *args):
+        """Run the pool's function on args in a worker, yielding progress events
+        
+        Yields ('queued', position) while waiting for a worker, ('stage', name)
+        as each stage starts and ('heartbeat', None) at least every
+        HEARTBEAT_SECONDS otherwise, then ('result', value) last. Exceptions
+        raised by the function are raised again here; TimeoutError is raised
+        when the request runs longer than the pool's timeout. Closing the
+        generator early cancels the request and stops its worker.
+        """
+        worker = yield from self.acquire()
+        
+        process, connection = worker
+        healthy = False
+        start = time.monotonic()
+        try:
+            connection.send(args)
+            while True:
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    worker_requests.inc('timeout')
+                    log_event(logger, logging.WARNING, "worker_timeout", timeout_seconds=self.timeout, pid=process.pid)
+                    raise TimeoutError(f"Request took longer than {self.timeout} seconds")
+                if not connection.poll(min(HEARTBEAT_SECONDS, remaining)):
+                    yield 'heartbeat', None
+                    continue
+                
+                message = connection.recv()
+                if message[0] == 'stage':
+                    yield message
+                    continue
+                
+                kind, value, metric_values = message
+                merge_metric_values(metric_values)
+                healthy = True
+                break
+        except TimeoutError:
+            raise
+        except (EOFError, OSError):
+            # The pipe closed under us: the worker was killed or crashed
+            worker_requests.inc('crashed')
+            log_event(logger, logging.ERROR, "worker_crashed", pid=process.pid, exitcode=process.exitcode)
+            raise RuntimeError("Schedule worker exited unexpectedly") from None
+        except GeneratorExit:
+            worker_requests.inc('cancelled')
+            log_event(logger, logging.INFO, "worker_cancelled", pid=process.pid)
+            raise
+        finally:
+            self.release(worker, healthy)
+        
+        worker_requests.inc(kind)
+        if kind == 'error':
+            raise value
+        yield 'result', value
+    
+    def close(self):
+        """Stop the idle workers; busy ones are stopped when their requests finish"""
+        with self.condition:
+            idle, self.idle = self.idle, []
+            self.started -= len(idle)
+        for worker in idle:
+            self.stop_worker(worker)
@@ -0,0 +1,45 @@
+"""Shared fixtures: generated tournaments and a check that a schedule breaks no scheduling rule"""
+
+import pytest
+
+from court_allocation.generation import calculate_groups_and_matches
+from court_allocation.scheduling import match_dependencies
+
+CATEGORIES = ["Men's Doubles", "Mixed Doubles", "Amateur", "35+", "Open", "Parent-Child"]
+CATEGORY_PRIORITY = {category: priority for priority, category in enumerate(CATEGORIES, start=1)}
+
+def generate_matches(participants=120, categories=CATEGORIES, teams_per_group=4, qualifying_teams=2):
+    """Matches and teams of a generated tournament with the UI's default ratios"""
+    matches, teams, _ = calculate_groups_and_matches(participants, 0.33, 0.33, 0.3, 0.3, list(categories),
+                                                     {category: teams_per_group for category in categories}, qualifying_teams)
+    return matches, teams
+
+def schedule_violations(grid, min_rest_slots=0):
+    """Broken rules of a slot grid: a player or team playing within min_rest_slots of another match, or a knockout match placed too soon after one it depends on"""
+    slot_of = {}
+    for court_idx, slot_idx in zip(*(grid.cells >= 0).nonzero()):
+        slot_of[int(grid.cells[court_idx, slot_idx])] = int(slot_idx)
+    
+    violations = []
+    busy = {}
+    for index, slot_idx in slot_of.items():
+        match = grid.matches[index]
+        for team in (match.team1, match.team2):
+            if team is not None:
+                for participant in [team] + list(team.players):
+                    busy.setdefault(id(participant), []).append((slot_idx, index))
+    for slots in busy.values():
+        slots.sort()
+        violations.extend(("rest", first, second) for (first_slot, first), (second_slot, second) in zip(slots, slots[1:])
+                          if second_slot - first_slot <= min_rest_slots)
+    
+    prerequisites, _ = match_dependencies(grid.matches)
+    for index, before in prerequisites.items():
+        if index in slot_of:
+            violations.extend(("order", prerequisite, index) for prerequisite in before
+                              if slot_of.get(prerequisite, len(grid.time_slots)) + min_rest_slots >= slot_of[index])
+    return violations
+
+@pytest.fixture
+def matches():
+    return generate_matches()[0]
@@ -0,0 +1,28 @@
+"""Request validation of the JSON scheduling API"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from court_allocation import api
+from court_allocation.store import ScheduleStore
+
+@pytest.fixture
+def client(tmp_path):
+    return TestClient(api.create_api(ScheduleStore(str(tmp_path / "schedules.sqlite3"))))
+
+@pytest.mark.parametrize("settings", [
+    {"match_duration": 0},
+    {"mens_doubles_teams": 0},
+    {"courts_available": 0},
+    {"qualifying_teams": 0},
+    {"total_participants": 2},
+    {"amateur_ratio": 1.5},
+    {"min_rest_slots": -1},
+])
+def test_settings_outside_the_ui_limits_are_a_422(client, settings):
+    assert client.post("/api/schedule", json=settings).status_code == 422
+
+def test_default_settings_generate_a_schedule(client):
+    response = client.post("/api/schedule", json={})
+    assert response.status_code == 200
+    assert response.json()['matches']
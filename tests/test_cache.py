@@ -0,0 +1,93 @@
+"""Result caches: LRU bounds, cache keys of generate_tournament and cached grids shared between requests"""
+
+import pytest
+
+from conftest import schedule_violations
+
+from court_allocation import tournament
+from court_allocation.api import ScheduleRequest
+from court_allocation.cache import LRUCache
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    tournament.reset_caches()
+    yield
+    tournament.reset_caches()
+
+def settings(**changes):
+    return dict(ScheduleRequest().model_dump(), **changes)
+
+def test_lru_counts_hits_and_misses():
+    cache = LRUCache(4, 1000, lambda value: 10)
+    assert cache.get_or_create("a", lambda: 1) == 1
+    assert cache.get_or_create("a", lambda: 2) == 1
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'evictions': 0, 'entries': 1, 'bytes': 10}
+
+def test_lru_evicts_the_least_recently_used_at_capacity():
+    cache = LRUCache(2, 1000, lambda value: 10)
+    cache.get_or_create("a", lambda: 1)
+    cache.get_or_create("b", lambda: 2)
+    cache.get_or_create("a", lambda: 1)
+    cache.get_or_create("c", lambda: 3)
+    
+    assert list(cache.entries) == ["a", "c"]
+    assert cache.stats()['evictions'] == 1
+    assert cache.get_or_create("b", lambda: 4) == 4
+
+def test_lru_is_bounded_by_memory():
+    cache = LRUCache(10, 25, lambda value: value)
+    cache.get_or_create("a", lambda: 10)
+    cache.get_or_create("b", lambda: 10)
+    cache.get_or_create("c", lambda: 10)
+    cache.get_or_create("huge", lambda: 30)
+    
+    assert list(cache.entries) == ["b", "c"]
+    assert cache.stats()['bytes'] == 20
+    cache.clear()
+    assert cache.stats()['entries'] == cache.stats()['bytes'] == 0
+
+def test_same_settings_hit_both_caches():
+    first = tournament.generate_tournament(**settings())
+    second = tournament.generate_tournament(**settings())
+    
+    assert second[3] is first[3]
+    stats = tournament.get_cache_stats()
+    assert (stats['generation']['hits'], stats['generation']['misses']) == (1, 1)
+    assert (stats['schedule']['hits'], stats['schedule']['misses']) == (1, 1)
+
+def test_equivalent_settings_share_cache_keys():
+    tournament.generate_tournament(**settings())
+    # Slider noise in a ratio and priorities in the same order map to the same keys
+    priorities = {f"{name}_priority": 10 * rank for rank, name in
+                  enumerate(["mens_doubles", "mixed_doubles", "amateur", "plus_35", "open", "parent_child"], start=1)}
+    tournament.generate_tournament(**settings(amateur_ratio=0.330001, start_time="9:00", **priorities))
+    
+    stats = tournament.get_cache_stats()
+    assert stats['generation']['hits'] == stats['schedule']['hits'] == 1
+
+def test_schedule_settings_only_miss_the_schedule_cache():
+    tournament.generate_tournament(**settings())
+    tournament.generate_tournament(**settings(courts_available=2))
+    
+    stats = tournament.get_cache_stats()
+    assert (stats['generation']['hits'], stats['schedule']['misses']) == (1, 2)
+
+def test_reset_caches_empties_them():
+    tournament.generate_tournament(**settings())
+    tournament.reset_caches()
+    assert all(stats['entries'] == 0 for stats in tournament.get_cache_stats().values())
+
+def test_cached_grid_survives_a_schedule_reusing_its_teams():
+    _, _, _, grid = tournament.generate_tournament(**settings(courts_available=4))
+    cells = grid.cells.copy()
+    
+    # Same teams, players and Match objects, placed differently
+    tournament.generate_tournament(**settings(courts_available=2, min_rest_slots=1))
+    _, _, _, cached = tournament.generate_tournament(**settings(courts_available=4))
+    
+    assert cached is grid
+    assert (grid.cells == cells).all()
+    assert schedule_violations(grid) == []
+    for court_idx, slot_idx in zip(*(grid.cells >= 0).nonzero()):
+        match = grid.matches[grid.cells[court_idx, slot_idx]]
+        assert (match.court, match.start_time) == (court_idx + 1, grid.time_slots[slot_idx])
@@ -0,0 +1,39 @@
+"""Slot assignment by coloring the conflict graph of matches that share a player"""
+
+from itertools import combinations
+
+import numpy as np
+
+from conftest import CATEGORY_PRIORITY, generate_matches, schedule_violations
+
+from court_allocation.coloring import build_coloring_grid, build_conflict_graph
+from court_allocation.scheduling import match_participants
+
+def test_conflict_graph_joins_exactly_the_matches_sharing_a_participant(matches):
+    indptr, indices = build_conflict_graph(matches)
+    edges = {(seq, int(neighbour)) for seq in range(len(matches)) for neighbour in indices[indptr[seq]:indptr[seq + 1]]}
+    
+    participants = [{id(participant) for participant in match_participants(match)} for match in matches]
+    expected = {(first, second) for first, second in combinations(range(len(matches)), 2) if participants[first] & participants[second]}
+    assert edges == expected | {(second, first) for first, second in expected}
+
+def test_schedules_every_match_without_breaking_a_rule(matches):
+    grid = build_coloring_grid(matches, "08:00", "22:00", 15, 8, False, CATEGORY_PRIORITY, min_rest_slots=1)
+    assert grid.used_slots == len(matches)
+    assert schedule_violations(grid, 1) == []
+    
+    # Match placements follow the grid
+    for court_idx, slot_idx in zip(*np.nonzero(grid.cells >= 0)):
+        match = matches[grid.cells[court_idx, slot_idx]]
+        assert (match.court, match.start_time) == (court_idx + 1, grid.time_slots[slot_idx])
+
+def test_highest_priority_category_starts_first():
+    matches, _ = generate_matches(categories=["Amateur", "Open"])
+    grid = build_coloring_grid(matches, "08:00", "22:00", 15, 1, False, {"Open": 1, "Amateur": 2})
+    assert matches[grid.cells[0, 0]].category == "Open"
+
+def test_matches_that_do_not_fit_stay_unscheduled(matches):
+    grid = build_coloring_grid(matches, "09:00", "10:00", 15, 2, False, CATEGORY_PRIORITY)
+    assert grid.used_slots == 8
+    assert sum(match.start_time is None for match in matches) == len(matches) - 8
+    assert schedule_violations(grid) == []
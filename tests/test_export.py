@@ -0,0 +1,69 @@
+"""Schedule exports: CSV and JSON Lines columns, per-team iCalendar feeds"""
+
+import csv
+import io
+import json
+
+import pytest
+
+from conftest import CATEGORY_PRIORITY
+
+from court_allocation.export import EXPORT_COLUMNS, escape_ics_text, iter_csv, iter_grid_records, iter_ics, iter_jsonl
+from court_allocation.scheduling import build_schedule_grid
+from court_allocation.store import ScheduleStore
+from court_allocation.venues import build_venue_grid, parse_venues
+
+@pytest.fixture
+def grid(matches):
+    return build_venue_grid(matches, parse_venues("Hall: 3, 09:00-18:00; Annex: 2, 10:00-16:00"), ("2026-10-24",),
+                            15, False, CATEGORY_PRIORITY)
+
+def test_csv_has_a_header_and_one_row_per_scheduled_match(grid):
+    rows = list(csv.reader(io.StringIO("".join(iter_csv(iter_grid_records(grid))))))
+    
+    assert rows[0] == list(EXPORT_COLUMNS)
+    assert len(rows) - 1 == grid.used_slots
+    records = [dict(zip(rows[0], row)) for row in rows[1:]]
+    assert [record['start_time'] for record in records] == sorted(record['start_time'] for record in records)
+    for record in records:
+        assert record['court_name'] == grid.court_name(int(record['court']))
+    assert {record['court_name'] for record in records} >= {"Hall Court 1", "Annex Court 2"}
+
+def test_jsonl_has_one_match_per_line(grid):
+    lines = "".join(iter_jsonl(iter_grid_records(grid))).splitlines()
+    
+    assert len(lines) == grid.used_slots
+    first = json.loads(lines[0])
+    assert list(first) == list(EXPORT_COLUMNS)
+    match = grid.matches[first['match_id']]
+    assert (first['category'], first['court'], first['court_name']) == (match.category, match.court, grid.court_name(match.court))
+
+def test_stored_schedules_export_like_the_grid(matches, tmp_path):
+    grid = build_schedule_grid(matches, "09:00", "18:00", 15, 4, False, CATEGORY_PRIORITY)
+    store = ScheduleStore(str(tmp_path / "schedules.sqlite3"))
+    schedule_id = store.save_schedule(grid, {'courts_available': 4})
+    assert "".join(iter_csv(store.iter_matches(schedule_id))) == "".join(iter_csv(iter_grid_records(grid)))
+
+def test_team_feed_has_only_that_teams_matches(grid):
+    match = grid.scheduled_matches()[0]
+    records = list(iter_grid_records(grid, match.category, match.team1.id))
+    feed = "".join(iter_ics(records, f"{match.category} Team {match.team1.id}", "team"))
+    
+    assert records
+    assert all(match.team1.id in (record['team1'], record['team2']) and record['category'] == match.category for record in records)
+    assert feed.count("BEGIN:VEVENT") == len(records)
+    assert f"LOCATION:{grid.court_name(match.court)}\r\n" in feed
+    assert feed.startswith("BEGIN:VCALENDAR\r\n") and feed.endswith("END:VCALENDAR\r\n")
+
+def test_ics_text_is_escaped():
+    assert escape_ics_text("a\\b;c,d\ne") == "a\\\\b\\;c\\,d\\ne"
+    
+    record = dict.fromkeys(EXPORT_COLUMNS)
+    record.update(match_id=7, category="Open", group_id=1, court=1, court_name="Hall; North, Court 1",
+                  start_time="2026-10-24 09:00", end_time="2026-10-24 09:15", status="cancelled")
+    feed = "".join(iter_ics([record], "Open, Team 1", "team"))
+    
+    assert "X-WR-CALNAME:Open\\, Team 1\r\n" in feed
+    assert "LOCATION:Hall\\; North\\, Court 1\r\n" in feed
+    assert "SUMMARY:Open Group 1: TBD vs TBD (cancelled)\r\n" in feed
+    assert "DTSTART:20261024T090000\r\nDTEND:20261024T091500\r\n" in feed
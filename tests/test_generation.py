@@ -0,0 +1,21 @@
+"""Generated teams: players shared between categories and the closed-form team counts"""
+
+from conftest import CATEGORIES
+
+from court_allocation.generation import calculate_groups_and_matches, count_teams_for_category
+
+def category_players(all_teams, category):
+    return {id(player) for team in all_teams[category] for player in team.players}
+
+def test_advanced_players_are_shared_objects_across_categories():
+    _, all_teams, _ = calculate_groups_and_matches(120, 0.33, 0.33, 0.3, 0.3, CATEGORIES, {category: 4 for category in CATEGORIES}, 2)
+    
+    assert category_players(all_teams, "Men's Doubles") & category_players(all_teams, "Open")
+    assert category_players(all_teams, "Mixed Doubles") & category_players(all_teams, "35+")
+    # Open is for the advanced players who are not in 35+
+    assert not category_players(all_teams, "35+") & category_players(all_teams, "Open")
+
+def test_team_counts_match_the_closed_form():
+    _, all_teams, _ = calculate_groups_and_matches(301, 0.27, 0.41, 0.35, 0.25, CATEGORIES, {category: 5 for category in CATEGORIES}, 2)
+    for category in CATEGORIES:
+        assert len(all_teams[category]) == count_teams_for_category(category, 301, 0.27, 0.41, 0.35, 0.25)
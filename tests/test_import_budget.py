@@ -0,0 +1,73 @@
+"""Importing the scheduling core stays fast and never loads the web stack
+
+Each module is imported in a fresh interpreter a few times and the fastest
+run is compared with the budget, so one slow cold start doesn't fail it.
+Set IMPORT_BUDGET_SECONDS to check against a different budget.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must stay importable without the web stack
+CORE_MODULES = [
+    "court_allocation",
+    "court_allocation.models",
+    "court_allocation.generation",
+    "court_allocation.knockout",
+    "court_allocation.scheduling",
+    "court_allocation.coloring",
+    "court_allocation.timeline",
+    "court_allocation.venues",
+    "court_allocation.tournament",
+    "court_allocation.render",
+    "court_allocation.sweep",
+    "court_allocation.repair",
+    "court_allocation.optimize",
+    "court_allocation.overrun",
+    "court_allocation.roster",
+    "court_allocation.instrumentation",
+    "court_allocation.workers",
+    "court_allocation.store",
+    "court_allocation.live",
+    "court_allocation.export",
+]
+
+# Packages the core must never import
+FORBIDDEN_MODULES = ["gradio", "pandas", "fastapi", "starlette", "pydantic", "uvicorn"]
+
+IMPORT_BUDGET_SECONDS = float(os.environ.get("IMPORT_BUDGET_SECONDS") or 0.5)
+IMPORT_RUNS = 3
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+loaded = [name for name in {forbidden!r} if name in sys.modules]
+print(elapsed, ",".join(loaded))
+"""
+
+def measure_import(module, runs=IMPORT_RUNS):
+    """Fastest import time of a module over several fresh interpreters, and any forbidden modules it loaded"""
+    best = None
+    loaded = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, forbidden=FORBIDDEN_MODULES)],
+            cwd=REPO_ROOT, check=True, capture_output=True, text=True
+        ).stdout.strip()
+        elapsed, _, names = output.partition(" ")
+        best = float(elapsed) if best is None else min(best, float(elapsed))
+        loaded = [name for name in names.split(",") if name]
+    return best, loaded
+
+@pytest.mark.parametrize("module", CORE_MODULES)
+def test_core_module_imports_within_budget(module):
+    elapsed, loaded = measure_import(module)
+    assert not loaded, f"{module} imports {', '.join(loaded)}"
+    assert elapsed <= IMPORT_BUDGET_SECONDS, f"{module} took {elapsed * 1000:.0f} ms to import"
@@ -0,0 +1,54 @@
+"""Live board: one change log poll per schedule, fanned out to every viewer"""
+
+import asyncio
+import json
+
+from conftest import CATEGORY_PRIORITY
+
+from court_allocation.live import ChangeBroadcaster
+from court_allocation.scheduling import build_schedule_grid
+from court_allocation.store import ScheduleStore
+
+VIEWERS = 3
+
+def parse_event(message):
+    fields = dict(line.split(": ", 1) for line in message.decode().strip().split("\n"))
+    return int(fields['id']), fields['event'], json.loads(fields['data'])
+
+async def watch_one_edit(store, schedule_id, match_id):
+    broadcaster = ChangeBroadcaster(store, poll_seconds=0.05)
+    streams = [broadcaster.stream(schedule_id) for _ in range(VIEWERS)]
+    first_events = [asyncio.ensure_future(stream.__anext__()) for stream in streams]
+    await asyncio.sleep(0.2)
+    assert len(broadcaster.viewers[schedule_id]) == VIEWERS
+    assert list(broadcaster.pollers) == [schedule_id]
+    
+    await asyncio.to_thread(store.update_match, schedule_id, match_id, status="in_progress")
+    messages = await asyncio.wait_for(asyncio.gather(*first_events), 5)
+    
+    # Nothing follows the one change, though the poller saw it after every viewer caught up
+    for stream in streams:
+        try:
+            await asyncio.wait_for(stream.__anext__(), 0.3)
+        except asyncio.TimeoutError:
+            pass
+        else:
+            raise AssertionError("a viewer received a second event")
+        await stream.aclose()
+    await asyncio.sleep(0.2)
+    return messages, broadcaster
+
+def test_one_edit_reaches_every_viewer_once(tmp_path, matches):
+    store = ScheduleStore(str(tmp_path / "schedules.sqlite3"))
+    grid = build_schedule_grid(matches, "09:00", "18:00", 15, 4, False, CATEGORY_PRIORITY)
+    schedule_id = store.save_schedule(grid, {'courts_available': 4})
+    match = store.find_matches(schedule_id)[0]
+    
+    messages, broadcaster = asyncio.run(watch_one_edit(store, schedule_id, match['match_id']))
+    
+    assert len(set(messages)) == 1
+    change_id, event, change = parse_event(messages[0])
+    assert (change_id, event) == (store.last_change_id(schedule_id), "change")
+    assert change == dict(match, status="in_progress")
+    assert change['court_name'] == "Court 1"
+    assert (broadcaster.viewers, broadcaster.pollers) == ({}, {})
@@ -0,0 +1,56 @@
+"""Local search over the greedy schedule: rules kept, knockouts in order, reproducible and never worse"""
+
+import pytest
+
+from conftest import CATEGORY_PRIORITY, generate_matches, schedule_violations
+
+from court_allocation.optimize import ScheduleSearch, optimize_schedule
+from court_allocation.scheduling import build_schedule_grid, match_dependencies
+
+# Enough passes to move matches, few enough that the clock never cuts a run short
+ITERATIONS = 20
+
+SETUPS = [(4, 1), (6, 2)]
+
+def greedy_grid(courts, min_rest_slots):
+    matches, _ = generate_matches()
+    return build_schedule_grid(matches, "08:00", "22:00", 15, courts, False, CATEGORY_PRIORITY, min_rest_slots=min_rest_slots)
+
+@pytest.mark.parametrize("courts, min_rest_slots", SETUPS)
+def test_optimized_grid_breaks_no_rule(courts, min_rest_slots):
+    grid = greedy_grid(courts, min_rest_slots)
+    optimized, info = optimize_schedule(grid, 30, min_rest_slots, max_iterations=ITERATIONS)
+    
+    assert schedule_violations(optimized, min_rest_slots) == []
+    # The greedy grid it started from is left as it was
+    assert schedule_violations(grid, min_rest_slots) == []
+    assert info['unscheduled'] == int(len(grid.matches) - (optimized.cells >= 0).sum())
+
+@pytest.mark.parametrize("courts, min_rest_slots", SETUPS)
+def test_knockouts_follow_their_prerequisites(courts, min_rest_slots):
+    optimized, _ = optimize_schedule(greedy_grid(courts, min_rest_slots), 30, min_rest_slots, max_iterations=ITERATIONS)
+    slot_of = {int(optimized.cells[court_idx, slot_idx]): int(slot_idx) for court_idx, slot_idx in zip(*(optimized.cells >= 0).nonzero())}
+    prerequisites, _ = match_dependencies(optimized.matches)
+    
+    knockouts = [match_idx for match_idx in prerequisites if match_idx in slot_of]
+    assert knockouts
+    for match_idx in knockouts:
+        assert all(slot_of[prerequisite] + min_rest_slots < slot_of[match_idx] for prerequisite in prerequisites[match_idx])
+
+def test_same_seed_gives_the_same_schedule():
+    grid = greedy_grid(4, 1)
+    first, first_info = optimize_schedule(grid, 30, 1, seed=7, max_iterations=ITERATIONS)
+    second, second_info = optimize_schedule(grid, 30, 1, seed=7, max_iterations=ITERATIONS)
+    
+    assert first_info['iterations'] == second_info['iterations'] == ITERATIONS
+    assert (first.cells == second.cells).all()
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("courts, min_rest_slots", SETUPS)
+def test_never_worse_than_the_greedy_schedule(courts, min_rest_slots, seed):
+    grid = greedy_grid(courts, min_rest_slots)
+    optimized, info = optimize_schedule(grid, 30, min_rest_slots, seed=seed, max_iterations=ITERATIONS)
+    
+    assert ScheduleSearch(optimized, min_rest_slots).objective() <= ScheduleSearch(grid, min_rest_slots).objective()
+    assert info['unscheduled'] <= info['initial_unscheduled']
+    assert info['finish_time'] <= info['initial_finish_time']
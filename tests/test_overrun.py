@@ -0,0 +1,54 @@
+"""Monte Carlo overrun simulation: exact results without randomness, and the late match report"""
+
+from datetime import timedelta
+
+from conftest import CATEGORY_PRIORITY, generate_matches
+
+from court_allocation.overrun import LATE_MATCHES, simulate_overruns
+from court_allocation.scheduling import build_schedule_grid
+
+def build_grid(matches, courts=4):
+    return build_schedule_grid(matches, "08:00", "22:00", 15, courts, False, CATEGORY_PRIORITY)
+
+def test_matches_on_time_finish_as_planned(matches):
+    grid = build_grid(matches)
+    result = simulate_overruns(grid, runs=200, mean_overrun=0, variability=0, seed=1)
+    
+    last_start = max(match.start_time for match in grid.scheduled_matches())
+    assert result['planned_finish'] == result['finish_p50'] == result['finish_p90'] == last_start + timedelta(minutes=15)
+    assert result['delay_p90_minutes'] == 0
+    assert result['late_matches'] == []
+
+def test_fixed_overrun_carries_along_a_court():
+    matches, _ = generate_matches(categories=["Open"])
+    grid = build_grid(matches, courts=1)
+    result = simulate_overruns(grid, runs=50, mean_overrun=5, variability=0, seed=1)
+    
+    # One court plays its matches back to back, each five minutes late
+    finish = grid.time_slots[0]
+    for match in grid.scheduled_matches():
+        finish = max(finish, match.start_time) + timedelta(minutes=20)
+    assert result['finish_p50'] == result['finish_p90'] == finish
+    assert result['delay_p50_minutes'] == (finish - result['planned_finish']).total_seconds() / 60
+
+def test_late_matches_are_the_most_likely_ones(matches):
+    grid = build_grid(matches)
+    result = simulate_overruns(grid, runs=500, mean_overrun=3, seed=7)
+    late = result['late_matches']
+    
+    assert 0 < len(late) <= LATE_MATCHES
+    assert result['finish_p90'] >= result['finish_p50'] >= result['planned_finish']
+    assert all(0 < match['late_probability'] <= 1 for match in late)
+    assert [match['late_probability'] for match in late] == sorted((match['late_probability'] for match in late), reverse=True)
+
+def test_same_seed_gives_the_same_result(matches):
+    grid = build_grid(matches)
+    first = simulate_overruns(grid, runs=300, seed=3)
+    second = simulate_overruns(grid, runs=300, seed=3)
+    first.pop('seconds'), second.pop('seconds')
+    assert first == second
+
+def test_empty_schedule(matches):
+    grid = build_schedule_grid(matches, "08:00", "08:00", 15, 4, False, CATEGORY_PRIORITY)
+    result = simulate_overruns(grid, runs=10, seed=1)
+    assert result['finish_p50'] is None and result['late_matches'] == []
@@ -0,0 +1,64 @@
+"""Schedule view filters and paging"""
+
+from datetime import date, datetime
+
+import pytest
+
+from conftest import CATEGORY_PRIORITY
+
+from court_allocation.render import iter_schedule_page, parse_court_filter, select_schedule_cells
+from court_allocation.scheduling import build_schedule_grid
+from court_allocation.venues import build_venue_grid, parse_venues
+
+TWO_DAYS = ("2026-10-24", "2026-10-25")
+
+@pytest.fixture
+def grid(matches):
+    return build_schedule_grid(matches, "09:00", "18:00", 15, 4, False, CATEGORY_PRIORITY, event_date=date(2026, 10, 24))
+
+@pytest.fixture
+def two_day_grid(matches):
+    return build_venue_grid(matches, parse_venues("Hall: 3, 09:00-18:00"), TWO_DAYS, 15, False, CATEGORY_PRIORITY)
+
+def selected_slots(grid, cells):
+    return [grid.time_slots[slot_idx] for slot_idx, _ in cells]
+
+def test_parse_court_filter():
+    assert parse_court_filter("1, 3-5,8") == {1, 3, 4, 5, 8}
+    assert parse_court_filter(" 2 - 3 ") == {2, 3}
+    assert parse_court_filter("a, 2-x, 7") == {7}
+    assert parse_court_filter("") == parse_court_filter(None) == set()
+
+def test_select_filters_in_time_then_court_order(grid):
+    category = grid.matches[grid.cells[1, 4]].category
+    cells = select_schedule_cells(grid, "10:00", "11:00", {2, 3}, [category])
+    
+    assert len(cells) > 0
+    assert [tuple(cell) for cell in cells] == sorted(tuple(cell) for cell in cells)
+    for slot_idx, court_idx in cells:
+        assert court_idx + 1 in (2, 3)
+        assert grid.matches[grid.cells[court_idx, slot_idx]].category == category
+        assert "10:00" <= grid.time_slots[slot_idx].strftime("%H:%M") < "11:00"
+    assert len(select_schedule_cells(grid)) == grid.used_slots
+
+def test_bare_times_apply_to_every_day(two_day_grid):
+    slots = selected_slots(two_day_grid, select_schedule_cells(two_day_grid, "09:00", "09:30"))
+    assert {slot.date().isoformat() for slot in slots} == set(TWO_DAYS)
+    assert all(slot.strftime("%H:%M") < "09:30" for slot in slots)
+
+def test_dated_bounds_select_one_stretch(two_day_grid):
+    slots = selected_slots(two_day_grid, select_schedule_cells(two_day_grid, "2026-10-24 17:00", "2026-10-25 9:30"))
+    
+    assert slots
+    assert all(datetime(2026, 10, 24, 17) <= slot < datetime(2026, 10, 25, 9, 30) for slot in slots)
+    assert {slot.date().isoformat() for slot in slots} == set(TWO_DAYS)
+
+def test_pages_are_clamped(grid):
+    total = grid.used_slots
+    last_page = -(-total // 50)
+    
+    first = "".join(iter_schedule_page(grid, page=0, page_size=50))
+    assert f"<b>1</b>-<b>50</b> of <b>{total}</b> (page <b>1</b> of <b>{last_page}</b>)" in first
+    last = "".join(iter_schedule_page(grid, page=10_000, page_size=50))
+    assert f"<b>{(last_page - 1) * 50 + 1}</b>-<b>{total}</b> of <b>{total}</b> (page <b>{last_page}</b>" in last
+    assert "No scheduled matches" in "".join(iter_schedule_page(grid, courts={99}))
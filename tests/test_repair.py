@@ -0,0 +1,60 @@
+"""Schedule repair: displaced matches move, knockouts are re-checked, the cached schedule stays as it was"""
+
+import numpy as np
+import pytest
+
+from conftest import CATEGORY_PRIORITY, schedule_violations
+
+from court_allocation.repair import repair_schedule
+from court_allocation.scheduling import build_schedule_grid, match_dependencies, match_participants
+
+def build_grid(matches, courts=4):
+    return build_schedule_grid(matches, "08:00", "22:00", 15, courts, False, CATEGORY_PRIORITY)
+
+def test_closed_court_displaces_only_its_later_matches(matches):
+    grid = build_grid(matches, courts=6)
+    freeze_slot = grid.slot_index("10:00")
+    repaired, moves = repair_schedule(grid, "10:00", closed_courts=[2], category_priority=CATEGORY_PRIORITY)
+    
+    assert (repaired.cells[1, freeze_slot:] < 0).all()
+    assert (repaired.cells[:, :freeze_slot] == grid.cells[:, :freeze_slot]).all()
+    # Knockout matches elsewhere only move when a match they depend on did
+    assert {move['from_court'] for move in moves if not move['match'].stage} == {2}
+    assert all(move['to_time'] >= grid.time_slots[freeze_slot] for move in moves)
+    assert repaired.used_slots == grid.used_slots
+    assert schedule_violations(repaired) == []
+
+def test_leaves_the_original_schedule_and_shared_objects_untouched(matches):
+    grid = build_grid(matches)
+    cells = grid.cells.copy()
+    placements = [(match.court, match.start_time) for match in matches]
+    busy = {id(participant): participant.busy_slots for match in matches for participant in match_participants(match)}
+    
+    repair_schedule(grid, "09:00", closed_courts=[1, 3], blocked_cells=[(2, "12:00")])
+    
+    assert (grid.cells == cells).all()
+    assert [(match.court, match.start_time) for match in matches] == placements
+    assert all(participant.busy_slots == busy[id(participant)] for match in matches for participant in match_participants(match))
+
+def test_knockout_starting_too_soon_after_a_moved_match_is_displaced(matches):
+    grid = build_grid(matches)
+    slot_of = {int(grid.cells[court_idx, slot_idx]): int(slot_idx) for court_idx, slot_idx in zip(*np.nonzero(grid.cells >= 0))}
+    prerequisites, _ = match_dependencies(matches)
+    knockout = min(prerequisites, key=slot_of.get)
+    last_prerequisite = max(slot_of[prerequisite] for prerequisite in prerequisites[knockout])
+    
+    # Closing every slot from the last prerequisite up to the knockout pushes that prerequisite past it
+    closed_slots = [grid.time_slots[slot_idx].strftime("%H:%M") for slot_idx in range(last_prerequisite, slot_of[knockout])]
+    repaired, moves = repair_schedule(grid, "08:00", closed_slots=closed_slots, category_priority=CATEGORY_PRIORITY)
+    
+    assert knockout in {matches.index(move['match']) for move in moves}
+    assert schedule_violations(repaired) == []
+
+@pytest.mark.parametrize("closures", [
+    {'closed_courts': [9]},
+    {'closed_courts': [0]},
+    {'blocked_cells': [(5, "10:00")]},
+])
+def test_rejects_courts_that_do_not_exist(matches, closures):
+    with pytest.raises(ValueError):
+        repair_schedule(build_grid(matches), "10:00", **closures)
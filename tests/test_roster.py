@@ -0,0 +1,34 @@
+"""Roster loading: shared players across categories and a capped error report"""
+
+import pytest
+
+from court_allocation.roster import MAX_ROSTER_ERRORS, load_roster
+
+HEADER = "category,team,name,gender,skill_level,age_bracket\n"
+
+def write_roster(tmp_path, rows):
+    path = tmp_path / "roster.csv"
+    path.write_text(HEADER + "".join(row + "\n" for row in rows))
+    return str(path)
+
+def test_player_in_two_categories_is_one_player(tmp_path):
+    path = write_roster(tmp_path, [
+        "Men's Doubles,A,Ann Lee,M,Advanced,Adult",
+        "Men's Doubles,A,Bo Park,M,Advanced,Adult",
+        "Open,B,Ann Lee,M,Advanced,Adult",
+        "Open,B,Cy Moss,F,Advanced,35+",
+    ])
+    all_teams, distribution = load_roster(path)
+    
+    assert all_teams["Men's Doubles"][0].players[0] is all_teams["Open"][0].players[0]
+    assert distribution['Total'] == 3
+
+def test_every_kind_of_error_is_capped(tmp_path):
+    # One player registered as both genders gives a mismatch error on every other row
+    rows = [f"Open,T{row},Ann Lee,{'M' if row % 2 else 'F'},Advanced,Adult" for row in range(3 * MAX_ROSTER_ERRORS)]
+    with pytest.raises(ValueError) as error:
+        load_roster(write_roster(tmp_path, rows))
+    
+    message = str(error.value)
+    assert message.count("Row ") == MAX_ROSTER_ERRORS
+    assert f"and {3 * MAX_ROSTER_ERRORS // 2 - MAX_ROSTER_ERRORS} more" in message
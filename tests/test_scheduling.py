@@ -0,0 +1,51 @@
+"""Greedy slot scheduling: no double booking, rest between matches, knockouts after their groups"""
+
+import pytest
+
+from conftest import CATEGORY_PRIORITY, generate_matches, schedule_violations
+
+from court_allocation.generation import estimate_groups_and_matches
+from court_allocation.scheduling import build_schedule_grid, create_time_slots
+
+def test_schedules_every_match_without_breaking_a_rule(matches):
+    grid = build_schedule_grid(matches, "08:00", "22:00", 15, 4, False, CATEGORY_PRIORITY)
+    assert grid.used_slots == len(matches)
+    assert schedule_violations(grid) == []
+
+def test_shared_players_are_never_booked_twice_in_a_slot(matches):
+    # Plenty of courts, so only player conflicts keep matches apart
+    grid = build_schedule_grid(matches, "08:00", "22:00", 15, 16, False, CATEGORY_PRIORITY)
+    assert grid.used_slots == len(matches)
+    assert schedule_violations(grid) == []
+
+def test_minimum_rest_is_kept(matches):
+    grid = build_schedule_grid(matches, "08:00", "22:00", 15, 8, True, CATEGORY_PRIORITY, min_rest_slots=2)
+    assert grid.used_slots == len(matches)
+    assert schedule_violations(grid, 2) == []
+
+def test_highest_priority_category_starts_first():
+    matches, _ = generate_matches(categories=["Amateur", "Open"])
+    grid = build_schedule_grid(matches, "08:00", "22:00", 15, 1, True, {"Open": 1, "Amateur": 2})
+    assert grid.scheduled_matches()[0].category == "Open"
+
+def test_matches_that_do_not_fit_stay_unscheduled(matches):
+    grid = build_schedule_grid(matches, "09:00", "10:00", 15, 2, False, CATEGORY_PRIORITY)
+    assert grid.used_slots == 8
+    assert sum(match.start_time is None for match in matches) == len(matches) - 8
+    assert schedule_violations(grid) == []
+
+def test_match_placements_follow_the_grid(matches):
+    grid = build_schedule_grid(matches, "08:00", "22:00", 15, 4, False, CATEGORY_PRIORITY)
+    time_slots = create_time_slots("08:00", "22:00", 15)
+    for court_idx, slot_idx in zip(*(grid.cells >= 0).nonzero()):
+        match = matches[grid.cells[court_idx, slot_idx]]
+        assert (match.court, match.start_time) == (court_idx + 1, time_slots[slot_idx])
+
+def test_closed_form_estimate_counts_the_generated_matches(matches):
+    categories = list(CATEGORY_PRIORITY)
+    estimate = estimate_groups_and_matches(120, 0.33, 0.33, 0.3, 0.3, categories, {category: 4 for category in categories}, 2)
+    assert estimate['total_matches'] == len(matches)
+
+def test_non_positive_match_duration_is_refused():
+    with pytest.raises(ValueError):
+        create_time_slots("09:00", "18:00", 0)
@@ -0,0 +1,93 @@
+"""Stored schedule edits: clash checks, the change log and who may make them"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import CATEGORY_PRIORITY
+
+from court_allocation import api
+from court_allocation.scheduling import build_schedule_grid
+from court_allocation.store import ScheduleStore
+from court_allocation.venues import build_venue_grid, parse_venues
+
+@pytest.fixture
+def store(tmp_path):
+    return ScheduleStore(str(tmp_path / "schedules.sqlite3"))
+
+@pytest.fixture
+def schedule_id(store, matches):
+    grid = build_schedule_grid(matches, "09:00", "18:00", 15, 4, False, CATEGORY_PRIORITY)
+    return store.save_schedule(grid, {'courts_available': 4, 'match_duration': 15})
+
+def first_matches(store, schedule_id):
+    return store.find_matches(schedule_id, after="09:00", before="09:15")
+
+def test_update_records_score_and_status(store, schedule_id):
+    match = first_matches(store, schedule_id)[0]
+    updated = store.update_match(schedule_id, match['match_id'], score="21-15, 21-18", status="finished")
+    
+    assert (updated['score'], updated['status']) == ("21-15, 21-18", "finished")
+    assert store.get_match(schedule_id, match['match_id']) == updated
+
+def test_move_onto_a_busy_court_is_refused(store, schedule_id):
+    first, second = first_matches(store, schedule_id)[:2]
+    with pytest.raises(ValueError):
+        store.update_match(schedule_id, second['match_id'], court=first['court'])
+    assert store.get_match(schedule_id, second['match_id']) == second
+    assert store.changes_since(schedule_id) == []
+    
+    # A finished match no longer holds its court
+    store.update_match(schedule_id, first['match_id'], status="finished")
+    moved = store.update_match(schedule_id, second['match_id'], court=first['court'])
+    assert (moved['court'], moved['start_time']) == (first['court'], second['start_time'])
+
+def test_moved_matches_take_the_name_of_their_new_court(store, matches):
+    venues = parse_venues("Hall: 2, 09:00-18:00; Annex: 2, 09:00-18:00")
+    grid = build_venue_grid(matches, venues, ("2026-10-24",), 15, False, CATEGORY_PRIORITY)
+    schedule_id = store.save_schedule(grid, {'venues': "Hall: 2, 09:00-18:00; Annex: 2, 09:00-18:00"})
+    match = store.find_matches(schedule_id, court=1)[0]
+    assert match['court_name'] == "Hall Court 1"
+    
+    moved = store.update_match(schedule_id, match['match_id'], court=4, start_time="23:00")
+    assert moved['court_name'] == "Annex Court 2"
+    assert store.get_match(schedule_id, match['match_id']) == moved
+
+def test_unknown_status_and_court_are_refused(store, schedule_id):
+    match = first_matches(store, schedule_id)[0]
+    with pytest.raises(ValueError):
+        store.update_match(schedule_id, match['match_id'], status="postponed")
+    with pytest.raises(ValueError):
+        store.update_match(schedule_id, match['match_id'], court=5)
+    with pytest.raises(KeyError):
+        store.update_match(schedule_id, 10 ** 6, status="finished")
+
+def test_change_log_keeps_edits_in_order(store, schedule_id):
+    first, second = first_matches(store, schedule_id)[:2]
+    store.update_match(schedule_id, first['match_id'], status="in_progress")
+    store.update_match(schedule_id, second['match_id'], status="in_progress")
+    store.update_match(schedule_id, first['match_id'], score="21-10", status="finished")
+    
+    changes = store.changes_since(schedule_id)
+    assert [change['match_id'] for _, change in changes] == [first['match_id'], second['match_id'], first['match_id']]
+    assert [change_id for change_id, _ in changes] == sorted(change_id for change_id, _ in changes)
+    assert changes[-1][1]['status'] == "finished"
+    assert store.last_change_id(schedule_id) == changes[-1][0]
+    assert store.changes_since(schedule_id, since=changes[0][0]) == changes[1:]
+
+def test_api_edits_need_the_edit_token(store, schedule_id, monkeypatch):
+    monkeypatch.setattr(api, "EDIT_TOKEN", "s3cret")
+    client = TestClient(api.create_api(store))
+    match_id = first_matches(store, schedule_id)[0]['match_id']
+    path = f"/api/schedules/{schedule_id}/matches/{match_id}"
+    
+    assert client.patch(path, json={'status': "finished"}).status_code == 403
+    assert client.patch(path, json={'status': "finished"}, headers={'Authorization': "Bearer wrong"}).status_code == 403
+    assert store.changes_since(schedule_id) == []
+    response = client.patch(path, json={'status': "finished"}, headers={'Authorization': "Bearer s3cret"})
+    assert response.status_code == 200 and response.json()['status'] == "finished"
+
+def test_without_a_token_only_the_private_network_may_edit(monkeypatch):
+    monkeypatch.setattr(api, "EDIT_TOKEN", "")
+    assert api.edit_allowed("172.18.0.2", "10.0.0.7")
+    assert not api.edit_allowed("172.18.0.2", "8.8.8.8")
+    assert not api.edit_allowed("8.8.8.8", "", "anything")
@@ -0,0 +1,54 @@
+"""What-if sweeps: range parsing and rows from the shared process pool"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from court_allocation.api import ScheduleRequest
+from court_allocation import api
+from court_allocation.store import ScheduleStore
+from court_allocation.sweep import MAX_SWEEP_CONFIGURATIONS, parse_int_range, run_sweep
+
+def test_parse_int_range():
+    assert parse_int_range("4") == [4]
+    assert parse_int_range("8, 4,6") == [4, 6, 8]
+    assert parse_int_range("3-6") == [3, 4, 5, 6]
+    assert parse_int_range("15-45/15") == [15, 30, 45]
+    assert parse_int_range("", default=4) == [4]
+
+@pytest.mark.parametrize("spec", ["0", "0-30/15", "10,15", "1-1000000000", "x"])
+def test_parse_int_range_refuses_bad_values(spec):
+    with pytest.raises(ValueError):
+        parse_int_range(spec, minimum=15)
+
+def test_sweep_yields_one_row_per_configuration():
+    # An optimization budget on the base settings must not apply to every configuration
+    base_params = ScheduleRequest(optimize_seconds=30).model_dump()
+    rows = list(run_sweep(base_params, [2, 4], [15], {'open_teams': [3, 4]}, max_workers=2))
+    
+    assert sorted((row['open_teams'], row['courts_available']) for row in rows) == [(3, 2), (3, 4), (4, 2), (4, 4)]
+    for row in rows:
+        assert 0 < row['scheduled_matches'] <= row['required_matches']
+
+def test_sweep_rejects_too_many_configurations():
+    base_params = ScheduleRequest().model_dump()
+    with pytest.raises(ValueError):
+        run_sweep(base_params, list(range(1, MAX_SWEEP_CONFIGURATIONS + 2)), [15], {})
+
+@pytest.mark.parametrize("courts_values, duration_values, teams_per_group_values", [
+    ([0], [15], {}),
+    ([4], [0], {}),
+    ([4], [15], {'open_teams': [0, 4]}),
+    ([4], [15], {'total_participants': [10]}),
+])
+def test_sweep_refuses_values_no_schedule_can_use(courts_values, duration_values, teams_per_group_values):
+    with pytest.raises(ValueError):
+        run_sweep(ScheduleRequest().model_dump(), courts_values, duration_values, teams_per_group_values)
+
+@pytest.mark.parametrize("sweep", [
+    {"match_durations": "0-30/15"},
+    {"teams_per_group": {"mens_doubles_teams": "0"}},
+    {"courts": "0-2"},
+])
+def test_sweep_api_refuses_ranges_below_the_ui_minimums(sweep, tmp_path):
+    client = TestClient(api.create_api(ScheduleStore(str(tmp_path / "schedules.sqlite3"))))
+    assert client.post("/api/sweep", json=sweep).status_code == 422
@@ -0,0 +1,69 @@
+"""Minute-timeline scheduling: matches of different lengths, changeovers and rest"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import CATEGORY_PRIORITY
+
+from court_allocation.scheduling import match_dependencies, match_participants
+from court_allocation.timeline import build_timeline_grid, parse_category_durations, timeline_slot_minutes
+
+DURATIONS = (("Open", 20), ("Parent-Child", 10))
+
+def timeline_violations(matches, match_duration, changeover_minutes=0, rest_minutes=0):
+    """Overlaps on a court (changeover included) or for a team or player (rest included), and knockouts starting too soon"""
+    lengths = dict(DURATIONS)
+    placed = sorted((match.start_time, seq) for seq, match in enumerate(matches) if match.start_time is not None)
+    end_of = {seq: start + timedelta(minutes=lengths.get(matches[seq].category, match_duration)) for start, seq in placed}
+    
+    violations = []
+    court_free = {}
+    participant_free = {}
+    for start, seq in placed:
+        match = matches[seq]
+        if court_free.get(match.court, start) > start:
+            violations.append(("court", seq))
+        court_free[match.court] = end_of[seq] + timedelta(minutes=changeover_minutes)
+        for participant in match_participants(match):
+            if participant_free.get(id(participant), start) > start:
+                violations.append(("rest", seq))
+            participant_free[id(participant)] = end_of[seq] + timedelta(minutes=rest_minutes)
+    
+    prerequisites, _ = match_dependencies(matches)
+    for seq, before in prerequisites.items():
+        if seq in end_of:
+            violations.extend(("order", seq) for prerequisite in before
+                              if prerequisite not in end_of or end_of[prerequisite] + timedelta(minutes=rest_minutes) > matches[seq].start_time)
+    return violations
+
+def test_parse_category_durations():
+    assert parse_category_durations("Parent-Child: 10; Open: 20") == DURATIONS
+    with pytest.raises(ValueError):
+        parse_category_durations("Open: 0")
+    with pytest.raises(ValueError):
+        parse_category_durations("Juniors: 10", categories=list(CATEGORY_PRIORITY))
+
+def test_slot_minutes_divide_every_length():
+    assert timeline_slot_minutes(15, DURATIONS, 5) == 5
+    assert timeline_slot_minutes(15) == 15
+
+def test_different_lengths_never_overlap(matches):
+    grid = build_timeline_grid(matches, "08:00", "22:00", 15, 6, False, CATEGORY_PRIORITY, category_durations=DURATIONS)
+    assert grid.used_slots == len(matches)
+    assert timeline_violations(matches, 15) == []
+    
+    lengths = dict(DURATIONS)
+    day_end = datetime.combine(grid.time_slots[0].date(), datetime.strptime("22:00", "%H:%M").time())
+    assert all(match.start_time + timedelta(minutes=lengths.get(match.category, 15)) <= day_end for match in matches)
+
+def test_changeover_and_rest_are_kept(matches):
+    build_timeline_grid(matches, "08:00", "22:00", 15, 6, False, CATEGORY_PRIORITY, min_rest_slots=1,
+                        category_durations=DURATIONS, changeover_minutes=5)
+    assert sum(match.start_time is not None for match in matches) == len(matches)
+    assert timeline_violations(matches, 15, changeover_minutes=5, rest_minutes=15) == []
+
+def test_matches_that_do_not_fit_stay_unscheduled(matches):
+    grid = build_timeline_grid(matches, "09:00", "11:00", 15, 2, False, CATEGORY_PRIORITY, category_durations=DURATIONS)
+    assert 0 < grid.used_slots < len(matches)
+    assert timeline_violations(matches, 15) == []
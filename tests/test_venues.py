@@ -0,0 +1,55 @@
+"""Multi-venue, multi-day schedules: partitions, the group split and parallel solves"""
+
+import pytest
+
+from conftest import CATEGORY_PRIORITY, generate_matches, schedule_violations
+
+from court_allocation.scheduling import match_participants
+from court_allocation.venues import build_venue_grid, parse_days, parse_venues
+
+TWO_DAYS = ("2026-10-24", "2026-10-25")
+
+def venue_days_of_players(grid):
+    """Venues each team and player plays at on each day"""
+    venues = {}
+    for court_idx, slot_idx in zip(*(grid.cells >= 0).nonzero()):
+        match = grid.matches[grid.cells[court_idx, slot_idx]]
+        venue = grid.court_name(int(court_idx) + 1).rsplit(" Court ", 1)[0]
+        for participant in match_participants(match):
+            venues.setdefault((id(participant), grid.time_slots[slot_idx].date()), set()).add(venue)
+    return venues
+
+def test_parse_venues_and_days():
+    assert parse_venues("Main Hall: 6, 09:00-18:00; Annex: 4 courts 10:00-17:00") == (
+        ("Main Hall", 6, "09:00", "18:00"), ("Annex", 4, "10:00", "17:00"))
+    assert parse_days("2026-10-25 2026-10-24, 2026-10-25") == TWO_DAYS
+    with pytest.raises(ValueError):
+        parse_venues("Main Hall")
+    with pytest.raises(ValueError):
+        parse_days("2026-13-01")
+
+@pytest.mark.parametrize("partition_by", ["category", "group"])
+def test_players_stay_at_one_venue_a_day(matches, partition_by):
+    venues = parse_venues("Hall: 3, 09:00-18:00; Annex: 2, 10:00-16:00")
+    grid = build_venue_grid(matches, venues, TWO_DAYS, 15, False, CATEGORY_PRIORITY, partition_by=partition_by)
+    
+    assert schedule_violations(grid) == []
+    assert all(len(names) == 1 for names in venue_days_of_players(grid).values())
+
+def test_groups_split_by_group_use_the_last_day_too(matches):
+    # Groups that don't fit before the last day are played there ahead of their bracket
+    grid = build_venue_grid(matches, parse_venues("Hall: 3, 09:00-18:00"), TWO_DAYS, 15, False, CATEGORY_PRIORITY, partition_by='group')
+    assert grid.used_slots == len(matches)
+    assert schedule_violations(grid) == []
+
+def test_groups_split_by_group_on_a_single_day(matches):
+    venues = parse_venues("Hall: 4, 09:00-18:00; Annex: 3, 09:00-18:00")
+    grid = build_venue_grid(matches, venues, ("2026-10-24",), 15, False, CATEGORY_PRIORITY, partition_by='group')
+    assert grid.used_slots > 0
+    assert schedule_violations(grid) == []
+
+def test_parallel_solve_matches_the_sequential_one():
+    venues = parse_venues("Hall: 3, 09:00-18:00; Annex: 2, 10:00-16:00")
+    sequential = build_venue_grid(generate_matches()[0], venues, TWO_DAYS, 15, False, CATEGORY_PRIORITY, max_workers=1)
+    parallel = build_venue_grid(generate_matches()[0], venues, TWO_DAYS, 15, False, CATEGORY_PRIORITY, max_workers=2)
+    assert (sequential.cells == parallel.cells).all()
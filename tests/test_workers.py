@@ -0,0 +1,80 @@
+"""Schedule worker pool: results, the wait queue limit, timeouts and cancellation"""
+
+import time
+
+import pytest
+
+from court_allocation.workers import PoolBusyError, WorkerPool
+
+# Pool functions run in spawned workers, which import them from this module
+
+def sleep_then_return(seconds, value):
+    time.sleep(seconds)
+    return value
+
+def refuse(message):
+    raise ValueError(message)
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool(sleep_then_return, max_workers=1, queue_size=1, timeout=30)
+    yield pool
+    pool.close()
+
+def run_to_result(events):
+    for kind, value in events:
+        if kind == 'result':
+            return value
+
+def test_result_comes_last_and_the_worker_is_reused(pool):
+    events = list(pool.iter_run(0, "done"))
+    assert events[-1] == ('result', "done")
+    assert run_to_result(pool.iter_run(0, "again")) == "again"
+    assert (pool.started, len(pool.idle)) == (1, 1)
+
+def test_function_errors_are_raised_to_the_caller():
+    pool = WorkerPool(refuse, max_workers=1)
+    try:
+        with pytest.raises(ValueError, match="no courts"):
+            list(pool.iter_run("no courts"))
+        # The worker reported the error itself, so it is kept
+        assert len(pool.idle) == 1
+    finally:
+        pool.close()
+
+def test_full_queue_turns_requests_away(pool):
+    running = pool.iter_run(30, "slow")
+    assert next(running) == ('heartbeat', None)
+    waiting = pool.iter_run(0, "next")
+    assert next(waiting) == ('queued', 1)
+    
+    with pytest.raises(PoolBusyError):
+        next(pool.iter_run(0, "turned away"))
+    
+    # Cancelling the running request stops its worker and lets the queued one start
+    running.close()
+    assert run_to_result(waiting) == "next"
+
+def test_cancelling_stops_the_worker(pool):
+    started = []
+    start_worker = pool.start_worker
+    pool.start_worker = lambda: started.append(start_worker()) or started[-1]
+    
+    running = pool.iter_run(30, "slow")
+    next(running)
+    running.close()
+    
+    process, _ = started[0]
+    assert not process.is_alive()
+    assert (pool.started, pool.idle) == (0, [])
+
+def test_slow_requests_time_out():
+    pool = WorkerPool(sleep_then_return, max_workers=1, timeout=1)
+    try:
+        started = time.monotonic()
+        with pytest.raises(TimeoutError):
+            list(pool.iter_run(30, "slow"))
+        assert time.monotonic() - started < 10
+        assert (pool.started, pool.idle) == (0, [])
+    finally:
+        pool.close()